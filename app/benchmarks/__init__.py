@@ -0,0 +1 @@
+"""Micro-benchmark del servizio utenti. Da eseguire dalla cartella app, es. ``python -m benchmarks.bench_validation``."""
@@ -0,0 +1,105 @@
+"""Micro-benchmark della decodifica degli item utente letti da una scan.
+
+Confronta il percorso del livello resource di boto3 (TypeDeserializer su ogni
+attributo, numeri in Decimal poi convertiti da pydantic) con il codec
+dedicato del client low-level. Gli item sono nel formato attribute-value già
+parsato da botocore, con gli attributi di servizio del change feed.
+
+Uso (dalla cartella app):
+    python -m benchmarks.bench_codec --items 10000
+"""
+
+import argparse
+import os
+import timeit
+from typing import Dict, List
+
+for name, value in {
+    "AWS_ACCESS_KEY_ID": "bench",
+    "AWS_SECRET_ACCESS_KEY": "bench",
+    "DYNAMODB_REGION": "eu-west-1",
+    "DYNAMODB_TABLE": "bench",
+}.items():
+    os.environ.setdefault(name, value)
+
+from boto3.dynamodb.types import TypeDeserializer
+
+from benchmarks.bench_validation import users_adapter
+from v1.model.codec import decode_user
+
+PAYLOAD = {
+    "nome": "Mario",
+    "cognome": "Rossi",
+    "cf": "RSSMRA80A01F205X",
+    "p_iva": "12345678903",
+    "email": "mario.rossi@example.com",
+    "n_telefono": "+39 333 1234567",
+    "indirizzo_residenza": "Via Roma 1, 20121 Milano (MI)",
+    "indirizzo_fatturazione": "Via Roma 1, 20121 Milano (MI)",
+}
+
+
+def make_items(count: int) -> List[Dict]:
+    return [
+        {
+            "user_id": {"N": str(i)},
+            **{field: {"S": value} for field, value in PAYLOAD.items()},
+            "feed": {"S": "users"},
+            "updated_at": {"N": str(1_700_000_000_000_000 + i)},
+        }
+        for i in range(count)
+    ]
+
+
+def _resource(items: List[Dict]) -> List:
+    deserializer = TypeDeserializer()
+    decoded = [
+        {key: deserializer.deserialize(value) for key, value in item.items()}
+        for item in items
+    ]
+    return users_adapter.validate_python(decoded)
+
+
+def _codec(items: List[Dict]) -> List:
+    return users_adapter.validate_python([decode_user(item) for item in items])
+
+
+def _decode_resource(items: List[Dict]) -> List:
+    deserializer = TypeDeserializer()
+    return [
+        {key: deserializer.deserialize(value) for key, value in item.items()}
+        for item in items
+    ]
+
+
+def _decode_codec(items: List[Dict]) -> List:
+    return [decode_user(item) for item in items]
+
+
+CASES = {
+    "solo decodifica": (_decode_resource, _decode_codec),
+    "decodifica+modello": (_resource, _codec),
+}
+
+
+def _per_item(func, items: List[Dict]) -> float:
+    best = min(timeit.repeat(lambda: func(items), number=1, repeat=5))
+    return best / len(items) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10000)
+    args = parser.parse_args()
+
+    items = make_items(args.items)
+    print(f"{args.items} item per scan")
+    print(f"{'caso':<20}{'resource (us)':>15}{'codec (us)':>13}{'risparmio':>12}")
+    for name, (resource, codec) in CASES.items():
+        before = _per_item(resource, items)
+        after = _per_item(codec, items)
+        print(f"{name:<20}{before:>15.2f}{after:>13.2f}{1 - after / before:>11.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Simulazione dell'effetto delle letture hedged sulla coda di latenza.
+
+Una GetItem simulata risponde in qualche millisecondo, ma una piccola
+frazione delle richieste resta bloccata molto più a lungo (GC, rete,
+partizione calda). Confronta p50, p99 e p99.9 senza e con hedging e riporta
+quante richieste extra sono state inviate.
+
+Uso (dalla cartella app):
+    python -m benchmarks.bench_hedging --requests 3000
+"""
+
+import argparse
+import random
+import time
+from typing import Callable, List
+
+from v1.model.hedging import Hedger
+from v1.utils.metrics import metrics
+
+
+def make_get_item(rng: random.Random, slow_rate: float) -> Callable[..., dict]:
+    def get_item(**kwargs) -> dict:
+        delay = rng.lognormvariate(-6.2, 0.3)  # ~2 ms
+        if rng.random() < slow_rate:
+            delay += 0.05
+        time.sleep(delay)
+        return {"Item": {}}
+
+    return get_item
+
+
+def percentiles(samples: List[float]) -> str:
+    ordered = sorted(samples)
+    values = [
+        ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+        for q in (0.5, 0.99, 0.999)
+    ]
+    return "".join(f"{v * 1000:>12.1f}" for v in values)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--slow-rate", type=float, default=0.02)
+    args = parser.parse_args()
+
+    print(
+        f"{'modalità':<12}{'p50 (ms)':>12}{'p99 (ms)':>12}{'p99.9 (ms)':>12}{'extra':>8}"
+    )
+    get_item = make_get_item(random.Random(1), args.slow_rate)
+    samples = []
+    for _ in range(args.requests):
+        start = time.perf_counter()
+        get_item()
+        samples.append(time.perf_counter() - start)
+    print(f"{'diretta':<12}{percentiles(samples)}{0:>8}")
+
+    hedger = Hedger(percentile=95, budget_percent=5, min_delay=0.002)
+    get_item = make_get_item(random.Random(1), args.slow_rate)
+    samples = []
+    for _ in range(args.requests):
+        start = time.perf_counter()
+        hedger.call(get_item)
+        samples.append(time.perf_counter() - start)
+    hedger.close()
+    fired = int(metrics.get("dynamodb_hedged_requests_total", outcome="fired"))
+    print(f"{'hedged':<12}{percentiles(samples)}{fired:>8}")
+
+
+if __name__ == "__main__":
+    main()
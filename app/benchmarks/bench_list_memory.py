@@ -0,0 +1,103 @@
+"""Benchmark della memoria usata da GET /v1/users, misurata con tracemalloc.
+
+Per ogni percorso, dalla pagina di item attribute-value alla risposta JSON,
+riporta per utente:
+
+- la memoria e i blocchi allocati per le righe tenute in vita tra la lettura
+  e la serializzazione;
+- il picco di memoria dell'intero percorso, risposta compresa.
+
+Uso (dalla cartella app):
+    python -m benchmarks.bench_list_memory --items 20000
+"""
+
+import argparse
+import gc
+import os
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+for name, value in {
+    "AWS_ACCESS_KEY_ID": "bench",
+    "AWS_SECRET_ACCESS_KEY": "bench",
+    "DYNAMODB_REGION": "eu-west-1",
+    "DYNAMODB_TABLE": "bench",
+}.items():
+    os.environ.setdefault(name, value)
+
+import orjson
+from boto3.dynamodb.types import TypeDeserializer
+
+from benchmarks.bench_codec import make_items
+from benchmarks.bench_validation import users_adapter
+from v1.model.codec import decode_user, decode_user_record
+from v1.views import GetAllUsersResponse
+
+
+def _resource_models(items: List[Dict]) -> List:
+    deserializer = TypeDeserializer()
+    decoded = [
+        {key: deserializer.deserialize(value) for key, value in item.items()}
+        for item in items
+    ]
+    return users_adapter.validate_python(decoded)
+
+
+def _codec_models(items: List[Dict]) -> List:
+    return users_adapter.validate_python([decode_user(item) for item in items])
+
+
+def _codec_records(items: List[Dict]) -> List:
+    return [decode_user_record(item) for item in items]
+
+
+def _dump_models(users: List) -> bytes:
+    body = GetAllUsersResponse.model_construct(status="ok", users=users)
+    return body.model_dump_json().encode()
+
+
+def _dump_records(users: List) -> bytes:
+    return orjson.dumps({"status": "ok", "users": users})
+
+
+PATHS: Dict[str, Tuple[Callable, Callable]] = {
+    "resource+pydantic": (_resource_models, _dump_models),
+    "codec dict+pydantic": (_codec_models, _dump_models),
+    "UserRecord+orjson": (_codec_records, _dump_records),
+}
+
+
+def measure(decode: Callable, dump: Callable, items: List[Dict]) -> Tuple[int, int, int]:
+    """Ritorna byte e blocchi delle righe decodificate e picco del percorso."""
+    gc.collect()
+    tracemalloc.start()
+    rows = decode(items)
+    snapshot = tracemalloc.take_snapshot()
+    rows_bytes, _ = tracemalloc.get_traced_memory()
+    rows_blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+    body = dump(rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows, body
+    return rows_bytes, rows_blocks, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=20000)
+    args = parser.parse_args()
+
+    items = make_items(args.items)
+    count = len(items)
+    print(f"{count} utenti")
+    print(f"{'percorso':<22}{'righe (B)':>11}{'blocchi':>9}{'picco (B)':>11}")
+    for name, (decode, dump) in PATHS.items():
+        rows_bytes, rows_blocks, peak = measure(decode, dump, items)
+        print(
+            f"{name:<22}{rows_bytes / count:>11.0f}"
+            f"{rows_blocks / count:>9.1f}{peak / count:>11.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
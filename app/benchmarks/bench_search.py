@@ -0,0 +1,96 @@
+"""Micro-benchmark dell'indice di ricerca in memoria.
+
+Costruisce l'indice con utenti sintetici e misura il tempo di costruzione,
+la memoria occupata e la latenza delle ricerche tipiche del completamento
+automatico, dalle più generiche alle più selettive.
+
+Uso (dalla cartella app):
+    python -m benchmarks.bench_search --users 100000
+"""
+
+import argparse
+import os
+import random
+import time
+import timeit
+import tracemalloc
+
+for name, value in {
+    "AWS_ACCESS_KEY_ID": "bench",
+    "AWS_SECRET_ACCESS_KEY": "bench",
+    "DYNAMODB_REGION": "eu-west-1",
+    "DYNAMODB_TABLE": "bench",
+}.items():
+    os.environ.setdefault(name, value)
+
+from v1.model.search_index import SearchIndex
+from v1.model.user import UserRecord
+
+NOMI = ["Mario", "Luca", "Giulia", "Anna", "Marco", "Francesca", "Niccolò", "Sara"]
+COGNOMI = ["Rossi", "Russo", "Ferrari", "Esposito", "Bianchi", "Romano", "Colombo"]
+VIE = ["Roma", "Garibaldi", "Mazzini", "Dante", "Verdi", "Cavour", "Manzoni"]
+CITTA = ["Milano", "Torino", "Roma", "Napoli", "Bologna", "Firenze", "Genova"]
+QUERIES = ["r", "ro", "ross", "rossi mario", "via garibaldi 12", "esposito napoli"]
+
+
+def make_user(user_id: int, rng: random.Random) -> UserRecord:
+    nome, cognome = rng.choice(NOMI), f"{rng.choice(COGNOMI)}{rng.randrange(500)}"
+    indirizzo = (
+        f"Via {rng.choice(VIE)} {rng.randrange(1, 200)}, "
+        f"{rng.randrange(10000, 99999)} {rng.choice(CITTA)}"
+    )
+    return UserRecord(
+        nome,
+        cognome,
+        "RSSMRA80A01F205X",
+        "",
+        f"{nome.lower()}.{cognome.lower()}@example.com",
+        "+39 333 1234567",
+        indirizzo,
+        indirizzo,
+        user_id,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    users = [make_user(i, rng) for i in range(1, args.users + 1)]
+
+    def build() -> SearchIndex:
+        # Come la scan iniziale: caricamento a pagine, vocabolario ordinato alla fine
+        index = SearchIndex()
+        for i in range(0, len(users), 4000):
+            index.load(users[i : i + 4000])
+        index.search("a", 1)
+        return index
+
+    start = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    index = build()
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{args.users} utenti: costruzione {elapsed:.1f} s, "
+        f"indice {memory / 2**20:.0f} MiB (record esclusi)"
+    )
+    updates = [make_user(rng.randrange(1, args.users + 1), rng) for _ in range(1000)]
+    best = min(
+        timeit.repeat(lambda: [index.upsert(u) for u in updates], number=1, repeat=3)
+    )
+    print(f"aggiornamento dal change feed: {best:.3f} ms per utente")
+
+    print(f"{'query':<20}{'risultati':>10}{'latenza (ms)':>14}")
+    for query in QUERIES:
+        results = len(index.search(query, 20))
+        best = min(timeit.repeat(lambda: index.search(query, 20), number=5, repeat=3))
+        print(f"{query:<20}{results:>10}{best / 5 * 1000:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
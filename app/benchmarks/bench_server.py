@@ -0,0 +1,120 @@
+"""Benchmark del throughput del server: processo singolo contro multi-worker.
+
+Avvia serve.py con un numero diverso di worker e misura le richieste al
+secondo su un endpoint che non interroga DynamoDB. Il carico è generato da più
+processi client, così il client non diventa il collo di bottiglia.
+
+Uso (dalla cartella app):
+    python -m benchmarks.bench_server --requests 20000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List
+
+import httpx
+
+from serve import worker_count
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+SERVER_ENV = {
+    "AWS_ACCESS_KEY_ID": "bench",
+    "AWS_SECRET_ACCESS_KEY": "bench",
+    "DYNAMODB_REGION": "eu-west-1",
+    "DYNAMODB_TABLE": "bench",
+    "SERVER_ACCESS_LOG": "false",
+}
+
+
+async def _load(url: str, requests: int, concurrency: int) -> int:
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        remaining = requests
+
+        async def worker() -> int:
+            nonlocal remaining
+            ok = 0
+            while remaining > 0:
+                remaining -= 1
+                response = await client.get(url)
+                ok += response.status_code == 200
+            return ok
+
+        return sum(await asyncio.gather(*(worker() for _ in range(concurrency))))
+
+
+def _run_client(url: str, requests: int, concurrency: int) -> int:
+    return asyncio.run(_load(url, requests, concurrency))
+
+
+def _wait_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Il server non risponde su {url}")
+
+
+def run(workers: int, args: argparse.Namespace) -> float:
+    """Avvia il server con il numero di worker indicato e misura le richieste al secondo."""
+    env = {**os.environ, **SERVER_ENV}
+    env["SERVER_WORKERS"] = str(workers)
+    env["SERVER_PORT"] = str(args.port)
+    url = f"http://127.0.0.1:{args.port}{args.path}"
+    server = subprocess.Popen(
+        [sys.executable, "serve.py"],
+        cwd=APP_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_ready(url)
+        per_client = args.requests // args.clients
+        with ProcessPoolExecutor(args.clients) as pool:
+            start = time.perf_counter()
+            futures = [
+                pool.submit(
+                    _run_client, url, per_client, args.concurrency // args.clients
+                )
+                for _ in range(args.clients)
+            ]
+            ok = sum(future.result() for future in futures)
+            elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+    return ok / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--path", default="/v1/ready")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--workers", type=int, nargs="*", default=None)
+    args = parser.parse_args()
+
+    configurations: List[int] = args.workers or sorted({1, worker_count(0)})
+    results = {workers: run(workers, args) for workers in configurations}
+    baseline = results[configurations[0]]
+    print(f"{'worker':>8}{'req/s':>12}{'speedup':>10}")
+    for workers, throughput in results.items():
+        print(f"{workers:>8}{throughput:>12.0f}{throughput / baseline:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Benchmark della cache utenti condivisa tra processi.
+
+Confronta una cache privata per worker (dizionario user_id -> JSON, come la
+terrebbe ogni processo) con la cache su file mappato in memoria: memoria
+totale al crescere dei worker e costo di una lettura. Le letture sulla cache
+condivisa sono eseguite da processi separati, come i worker di uvicorn.
+
+Uso (dalla cartella app):
+    python -m benchmarks.bench_shared_cache --users 50000 --workers 4
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from typing import Tuple
+
+for name, value in {
+    "AWS_ACCESS_KEY_ID": "bench",
+    "AWS_SECRET_ACCESS_KEY": "bench",
+    "DYNAMODB_REGION": "eu-west-1",
+    "DYNAMODB_TABLE": "bench",
+}.items():
+    os.environ.setdefault(name, value)
+
+import orjson
+
+from v1.model.shared_cache import SharedUserCache
+
+
+def make_user(user_id: int) -> bytes:
+    return orjson.dumps(
+        {
+            "nome": f"Nome{user_id}",
+            "cognome": f"Cognome{user_id}",
+            "cf": "RSSMRA80A01F205X",
+            "p_iva": "12345678903",
+            "email": f"utente{user_id}@example.com",
+            "n_telefono": "3331234567",
+            "indirizzo_residenza": f"Via Roma {user_id}, 20121 Milano (MI)",
+            "indirizzo_fatturazione": f"Via Roma {user_id}, 20121 Milano (MI)",
+            "user_id": user_id,
+        }
+    )
+
+
+def read_shared(args: Tuple[str, int, int]) -> Tuple[float, float]:
+    """Eseguita in un processo separato: ritorna µs per lettura e percentuale di hit."""
+    path, users, lookups = args
+    cache = SharedUserCache.open(path)
+    rng = random.Random(os.getpid())
+    ids = [rng.randint(1, users) for _ in range(lookups)]
+    start = time.perf_counter()
+    hits = sum(cache.get(user_id) is not None for user_id in ids)
+    elapsed = time.perf_counter() - start
+    cache.close()
+    return elapsed / lookups * 1e6, hits / lookups * 100
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--lookups", type=int, default=200000)
+    parser.add_argument("--slot-size", type=int, default=512)
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    private = {user_id: make_user(user_id) for user_id in range(1, args.users + 1)}
+    private_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    rng = random.Random(1)
+    ids = [rng.randint(1, args.users) for _ in range(args.lookups)]
+    start = time.perf_counter()
+    for user_id in ids:
+        private.get(user_id)
+    private_us = (time.perf_counter() - start) / args.lookups * 1e6
+
+    # Il doppio degli slot rispetto agli utenti limita le collisioni
+    path = os.path.join(tempfile.gettempdir(), f"bench-users-cache-{os.getpid()}")
+    cache = SharedUserCache.create(path, args.users * 2, args.slot_size)
+    clean = time.time_ns() // 1000
+    for user_id, payload in private.items():
+        cache.put(user_id, payload, clean)
+    shared_bytes = os.path.getsize(path)
+
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(args.workers) as pool:
+        results = pool.map(
+            read_shared, [(path, args.users, args.lookups)] * args.workers
+        )
+    cache.close(unlink=True)
+    shared_us = sum(r[0] for r in results) / len(results)
+    hit_rate = sum(r[1] for r in results) / len(results)
+
+    print(
+        f"{'cache':<12}{'MiB totali':>14}{'MiB/worker':>14}{'µs/lettura':>14}{'hit %':>8}"
+    )
+    mib = 1024 * 1024
+    print(
+        f"{'privata':<12}{private_bytes * args.workers / mib:>14.1f}"
+        f"{private_bytes / mib:>14.1f}{private_us:>14.2f}{100:>8.1f}"
+    )
+    print(
+        f"{'condivisa':<12}{shared_bytes / mib:>14.1f}"
+        f"{shared_bytes / args.workers / mib:>14.1f}{shared_us:>14.2f}{hit_rate:>8.1f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
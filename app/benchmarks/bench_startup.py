@@ -0,0 +1,79 @@
+"""Benchmark del tempo di avvio (import di main) con ``python -X importtime``.
+
+Esegue l'import dell'applicazione in un processo separato, riporta i moduli
+più lenti e fallisce se il tempo totale supera il budget o se all'import
+vengono caricati moduli che devono restare lazy (boto3).
+
+Uso (dalla cartella app):
+    python -m benchmarks.bench_startup --budget-ms 1200
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+# Moduli che non devono essere importati all'avvio
+LAZY_MODULES = ("boto3",)
+
+
+def measure_imports() -> List[Tuple[str, int, int]]:
+    """Importa main in un nuovo interprete e raccoglie i tempi di import.
+
+    Returns:
+        List[Tuple[str, int, int]]: Modulo, tempo proprio e cumulativo in microsecondi.
+    """
+    # Nessuna variabile d'ambiente: l'import non deve leggere la configurazione
+    env: Dict[str, str] = {"PATH": os.environ.get("PATH", "")}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=APP_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:") :].split("|")
+        rows.append((module.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=1200.0)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    rows = measure_imports()
+    total_ms = next(cum for name, _, cum in rows if name == "main") / 1000
+    own_ms = sum(own for name, own, _ in rows if name.split(".")[0] in ("main", "v1"))
+
+    print(f"{'modulo':<45}{'self (ms)':>12}")
+    for name, own, _ in sorted(rows, key=lambda row: row[1], reverse=True)[: args.top]:
+        print(f"{name:<45}{own / 1000:>12.1f}")
+    print(
+        f"\nimport main: {total_ms:.1f} ms (di cui codice applicativo {own_ms / 1000:.1f} ms)"
+    )
+
+    errors = []
+    loaded = {name for name, _, _ in rows}
+    for module in LAZY_MODULES:
+        if module in loaded:
+            errors.append(f"{module} importato all'avvio")
+    if total_ms > args.budget_ms:
+        errors.append(f"budget superato: {total_ms:.1f} ms > {args.budget_ms:.1f} ms")
+    for error in errors:
+        print(f"ERRORE: {error}")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
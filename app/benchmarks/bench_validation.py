@@ -0,0 +1,132 @@
+"""Micro-benchmark della validazione pydantic su inserimenti ed errori.
+
+Confronta i modelli precedenti (EmailStr e root_validator in stile v1) con i
+validatori nativi v2 e il TypeAdapter precompilato della lista utenti.
+
+Uso (dalla cartella app):
+    python -m benchmarks.bench_validation
+"""
+
+import os
+import timeit
+import warnings
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional
+
+for name, value in {
+    "AWS_ACCESS_KEY_ID": "bench",
+    "AWS_SECRET_ACCESS_KEY": "bench",
+    "DYNAMODB_REGION": "eu-west-1",
+    "DYNAMODB_TABLE": "bench",
+}.items():
+    os.environ.setdefault(name, value)
+
+from pydantic import BaseModel, EmailStr, TypeAdapter
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore")
+    from pydantic import root_validator
+
+from v1.model.user import User, UserResponse
+from v1.views import ErrorResponse, GetAllUsersResponse
+
+# TypeAdapter costruito una sola volta: la costruzione dello schema è costosa.
+# Il servizio non lo usa più (la lista utenti passa per UserRecord), serve
+# come riferimento anche a bench_codec e bench_list_memory
+users_adapter = TypeAdapter(List[UserResponse])
+
+PAYLOAD = {
+    "nome": "Mario",
+    "cognome": "Rossi",
+    "cf": "RSSMRA80A01F205X",
+    "p_iva": "12345678903",
+    "email": "mario.rossi@example.com",
+    "n_telefono": "+39 333 1234567",
+    "indirizzo_residenza": "Via Roma 1, 20121 Milano (MI)",
+    "indirizzo_fatturazione": "Via Roma 1, 20121 Milano (MI)",
+}
+ITEMS = [{**PAYLOAD, "user_id": i} for i in range(1000)]
+
+
+class LegacyUser(BaseModel):
+    nome: str
+    cognome: str
+    cf: str
+    p_iva: str
+    email: EmailStr
+    n_telefono: str
+    indirizzo_residenza: str
+    indirizzo_fatturazione: str
+
+
+class LegacyUserResponse(LegacyUser):
+    user_id: int
+
+
+class LegacyUsersResponse(BaseModel):
+    status: str
+    users: Optional[List[LegacyUserResponse]] = None
+
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore")
+
+    class LegacyErrorModel(BaseModel):
+        code: int
+        message: str
+        details: Optional[List[Dict[str, Any]]] = None
+
+        @root_validator(pre=False, skip_on_failure=True)
+        def _set_status(cls, values: Dict[str, Any]) -> Dict[str, Any]:
+            values["status"] = HTTPStatus(values["code"]).name
+            return values
+
+
+class LegacyErrorResponse(BaseModel):
+    error: LegacyErrorModel
+
+    def __init__(self, **kwargs):
+        super().__init__(error=LegacyErrorModel(**kwargs))
+
+
+def _legacy_list():
+    # Costruzione del modello nel controller e seconda validazione di FastAPI
+    body = LegacyUsersResponse(status="ok", users=ITEMS)
+    LegacyUsersResponse.model_validate(body.model_dump()).model_dump_json()
+
+
+def _fast_list():
+    users = users_adapter.validate_python(ITEMS)
+    GetAllUsersResponse.model_construct(status="ok", users=users).model_dump_json()
+
+
+CASES = {
+    "insert payload": (
+        lambda: LegacyUser.model_validate(PAYLOAD),
+        lambda: User.model_validate(PAYLOAD),
+    ),
+    "error response": (
+        lambda: LegacyErrorResponse(code=502, message="Errore").model_dump(
+            exclude_none=True
+        ),
+        lambda: ErrorResponse(code=502, message="Errore").model_dump(exclude_none=True),
+    ),
+    "list 1000 users": (_legacy_list, _fast_list),
+}
+
+
+def _per_call(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main() -> None:
+    print(f"{'caso':<18}{'prima (us)':>14}{'dopo (us)':>14}{'risparmio':>12}")
+    for name, (legacy, fast) in CASES.items():
+        number = 20 if name.startswith("list") else 5000
+        before = _per_call(legacy, number)
+        after = _per_call(fast, number)
+        print(f"{name:<18}{before:>14.1f}{after:>14.1f}{1 - after / before:>11.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,143 @@
+from contextlib import asynccontextmanager
+import asyncio
+import os
+
+from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
+
 from v1.router import router_v1
 from v1.exceptions import http_exception_handler, HTTPException
-from fastapi import FastAPI
-import os
+from v1.middleware import (
+    CapacityMiddleware,
+    CompressionMiddleware,
+    DeadlineMiddleware,
+    IdempotencyMiddleware,
+    ProfilingMiddleware,
+    RateLimitMiddleware,
+    TracingMiddleware,
+)
+from v1.config.app_settings import get_settings
+from v1.config.db_credentials import get_credentials
+from v1.controller.insert_user import get_insert_buffer
+from v1.controller.get_stats import get_stats_reconciler
+from v1.controller.search_users import get_search_updater
+from v1.model.dynamo_context_manager import DynamoConnection, get_connection
+from v1.model.replicas import replica_credentials
+from v1.utils.custom_logger import LogSetupper
+from v1.utils.profiling import parse_routes, profiler
+from v1.utils.tracing import exporter_from_settings, tracer
+from v1.utils.worker_state import get_worker_state
+
+logger = LogSetupper(__name__).setup()
+
 
-# Setup dell'applicazione in locale
-if os.getenv("ENV") == "local":
-    from v1.model.dynamo_context_manager import DynamoConnection
-    from v1.utils.custom_logger import LogSetupper
+def setup_local_tables(connection: DynamoConnection) -> None:
+    """Crea le tabelle mancanti quando il servizio gira in ambiente local.
 
-    logger = LogSetupper(__name__).setup()
-    connection = DynamoConnection()
-    if connection.is_alive and not connection.table_exists:
+    Args:
+        connection (DynamoConnection): Connessione a DynamoDB
+    """
+    if not connection.table_exists:
         logger.warning(
             f"Tabella {connection.table_name} non trovata e ambiente di esecuzione local, la creo..."
         )
+        connection.create_users_table()
+        logger.info(f"Tabella {connection.table_name} creata con successo")
+    if not connection.meta_table_exists:
+        logger.warning(
+            f"Tabella {connection.meta_table_name} non trovata e ambiente di esecuzione local, la creo..."
+        )
+        connection.create_meta_table()
+        logger.info(f"Tabella {connection.meta_table_name} creata con successo")
+    # Le repliche locali sono istanze indipendenti: anche loro hanno bisogno
+    # delle tabelle, ma non ricevono i dati scritti sulla principale
+    for endpoint in connection.replica_endpoints:
+        replica = DynamoConnection(
+            credentials=replica_credentials(connection.credentials, endpoint)
+        )
         try:
-            connection.create_users_table()
-            logger.info(f"Tabella {connection.table_name} creata con successo")
-        except Exception as e:
-            logger.error(f"Errore nella creazione della tabella: {e}")
-            exit(1)
+            setup_local_tables(replica)
+        finally:
+            replica.close()
+
+
+async def warm_up(connection: DynamoConnection) -> None:
+    """Prepara la connessione a DynamoDB senza bloccare l'avvio del servizio.
+
+    Args:
+        connection (DynamoConnection): Connessione da preparare
+    """
+    try:
+        # Creazione del client boto3 (lenta) e prima connessione HTTP fuori
+        # dall'event loop, così la prima richiesta non ne paga il costo; le
+        # tabelle presenti restano in cache per i controlli delle scritture
+        await run_in_threadpool(connection.refresh_tables)
+        if os.getenv("ENV") == "local":
+            await run_in_threadpool(setup_local_tables, connection)
+    except Exception as e:
+        logger.error(f"Errore nella preparazione della connessione a DynamoDB: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Configurazione letta e validata una sola volta: errori bloccanti all'avvio
+    settings = get_settings()
+    get_credentials()
+    tracer.configure(
+        exporter_from_settings(settings.tracingExporter, settings.tracingFile),
+        settings.tracingSampleRate,
+    )
+    profiler.configure(
+        enabled=settings.profilingEnabled,
+        sample_rate=settings.profilingSampleRate,
+        interval_ms=settings.profilingIntervalMs,
+        routes=parse_routes(settings.profilingRoutes),
+    )
+    # Con serve.py metriche e profiler sono condivisi con gli altri worker; il
+    # profiler passa alla configurazione modificata a runtime, se presente
+    worker_state = get_worker_state()
+    if worker_state is not None:
+        worker_state.start()
+
+    connection = get_connection()
+    warm_up_task = asyncio.create_task(warm_up(connection))
+    search_updater = get_search_updater()
+    if search_updater is not None:
+        # Costruzione e aggiornamento dell'indice in un thread, non bloccano l'avvio
+        search_updater.start()
+    stats_reconciler = get_stats_reconciler()
+    if stats_reconciler is not None:
+        stats_reconciler.start()
+    yield
+
+    warm_up_task.cancel()
+    if search_updater is not None:
+        search_updater.stop()
+    if stats_reconciler is not None:
+        stats_reconciler.stop()
+    insert_buffer = get_insert_buffer()
+    if insert_buffer is not None:
+        # Scrivo gli inserimenti ancora in coda prima di spegnere il servizio
+        await insert_buffer.close()
+    connection.close()
+    tracer.shutdown()
+    if worker_state is not None:
+        worker_state.stop()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Import dei router
 app.include_router(router_v1)
 app.add_exception_handler(HTTPException, http_exception_handler)
+# Il più interno: le risposte salvate non sono compresse e le repliche
+# riportano la capacità consumata dalla lettura della risposta salvata
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(CapacityMiddleware)
+# Scadenza impostata prima di qualsiasi chiamata DynamoDB della richiesta
+app.add_middleware(DeadlineMiddleware)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(TracingMiddleware)
+# Aggiunto per ultimo: è il middleware più esterno e scarta le richieste prima di tutto
+app.add_middleware(RateLimitMiddleware)
@@ -0,0 +1,93 @@
+"""Entry point di produzione: uvicorn multi-worker con uvloop e httptools.
+
+Il numero di worker segue le CPU disponibili per il processo (SERVER_WORKERS=0),
+ogni worker prepara la propria connessione a DynamoDB nel lifespan e, se
+SERVER_MAX_REQUESTS è maggiore di zero, viene riciclato dopo quel numero di
+richieste. Alla ricezione di SIGTERM uvicorn smette di accettare connessioni e
+attende le richieste in corso per al massimo SERVER_GRACEFUL_TIMEOUT secondi.
+
+Il processo padre crea anche la cartella in cui i worker condividono metriche e
+profiler (vedi ``v1.utils.worker_state``), così ``/v1/metrics`` e gli endpoint
+admin del profiler coprono tutti i worker qualunque sia quello che risponde.
+
+Con USER_CACHE_ENABLED il processo padre crea la cache utenti condivisa prima
+di avviare i worker e la tiene aggiornata per tutta la vita del server.
+"""
+
+import os
+
+import uvicorn
+
+from v1.config.app_settings import get_settings
+from v1.model.dynamo_context_manager import DynamoConnection
+from v1.model.shared_cache import SharedUserCache, UserCacheFiller, cache_path
+from v1.utils.custom_logger import LogSetupper
+from v1.utils.worker_state import WorkerState, state_path
+
+logger = LogSetupper(__name__).setup()
+
+
+def worker_count(configured: int) -> int:
+    """Calcola il numero di worker da avviare.
+
+    Args:
+        configured (int): Numero di worker configurato, 0 per il dimensionamento automatico
+
+    Returns:
+        int: Numero di worker
+    """
+    if configured > 0:
+        return configured
+    # sched_getaffinity rispetta i limiti di CPU assegnati al container
+    if hasattr(os, "sched_getaffinity"):
+        return max(len(os.sched_getaffinity(0)), 1)
+    return os.cpu_count() or 1
+
+
+def main() -> None:
+    settings = get_settings()
+    workers = worker_count(settings.serverWorkers)
+    logger.info(
+        f"Avvio del server su {settings.serverHost}:{settings.serverPort} con {workers} worker"
+    )
+    worker_path = state_path(settings)
+    WorkerState.prepare(worker_path)
+    # Anche il padre pubblica le proprie metriche, es. quelle della cache
+    parent_state = WorkerState(worker_path, settings.workerStateIntervalMs / 1000)
+    parent_state.start()
+    cache, filler = None, None
+    if settings.userCacheEnabled:
+        cache = SharedUserCache.create(
+            cache_path(settings), settings.userCacheSlots, settings.userCacheSlotSize
+        )
+        filler = UserCacheFiller(
+            cache,
+            DynamoConnection(),
+            segments=settings.searchScanSegments,
+            interval=settings.userCacheRefreshIntervalMs / 1000,
+        )
+        filler.start()
+        logger.info(f"Cache utenti condivisa in {cache.path}")
+    try:
+        uvicorn.run(
+            "main:app",
+            host=settings.serverHost,
+            port=settings.serverPort,
+            workers=workers,
+            loop="uvloop",
+            http="httptools",
+            timeout_keep_alive=settings.serverKeepAlive,
+            timeout_graceful_shutdown=settings.serverGracefulTimeout,
+            limit_max_requests=settings.serverMaxRequests or None,
+            access_log=settings.serverAccessLog,
+        )
+    finally:
+        if filler is not None:
+            filler.stop()
+            cache.close(unlink=True)
+        parent_state.stop()
+        WorkerState.remove(worker_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Configurazione condivisa dei test.
+
+I test girano in ambiente local contro server moto avviati nel processo: la
+configurazione del servizio viene letta una sola volta, quindi le variabili
+d'ambiente vanno impostate qui, prima dell'import dell'applicazione.
+"""
+
+import os
+import socket
+from typing import Callable, Iterator, Tuple
+
+import pytest
+from fastapi.testclient import TestClient
+from moto.server import ThreadedMotoServer
+
+
+def free_port() -> int:
+    """Ritorna una porta TCP libera sull'interfaccia di loopback."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+HOME_PORT = free_port()
+
+os.environ.update(
+    ENV="local",
+    AWS_ACCESS_KEY_ID="testing",
+    AWS_SECRET_ACCESS_KEY="testing",
+    AWS_ENDPOINT_URL=f"http://127.0.0.1:{HOME_PORT}",
+    DYNAMODB_REGION="eu-south-1",
+    DYNAMODB_TABLE="users-test",
+    DYNAMODB_META_TABLE="users-test-meta",
+    # Un server moto fermato accetta ancora connessioni senza rispondere:
+    # timeout brevi, così i test di failover non aspettano i default di botocore
+    DYNAMODB_CONNECT_TIMEOUT_S="1",
+    DYNAMODB_READ_TIMEOUT_S="1",
+    # La riconciliazione all'avvio girerebbe in background durante i test
+    STATS_RECONCILE_INTERVAL_S="0",
+)
+
+USER = {
+    "nome": "Mario",
+    "cognome": "Rossi",
+    "cf": "RSSMRA80A01F205X",
+    "p_iva": "12345678903",
+    "email": "mario.rossi@example.com",
+    "n_telefono": "3331234567",
+    "indirizzo_residenza": "Via Roma 1, 20121 Milano (MI)",
+    "indirizzo_fatturazione": "Via Roma 1, 20121 Milano (MI)",
+}
+
+
+@pytest.fixture(scope="session", autouse=True)
+def home_server() -> Iterator[str]:
+    """DynamoDB della regione principale, condiviso da tutti i test."""
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=HOME_PORT)
+    server.start()
+    yield os.environ["AWS_ENDPOINT_URL"]
+    server.stop()
+
+
+@pytest.fixture
+def moto_server() -> Iterator[Callable[[], Tuple[ThreadedMotoServer, str]]]:
+    """Avvia server moto aggiuntivi, fermati alla fine del test.
+
+    La factory ritorna il server e il suo URL.
+
+    I server dello stesso processo condividono i dati per regione: due
+    endpoint sono indipendenti solo se puntati su regioni diverse.
+    """
+    servers = []
+
+    def start() -> Tuple[ThreadedMotoServer, str]:
+        port = free_port()
+        server = ThreadedMotoServer(ip_address="127.0.0.1", port=port)
+        server.start()
+        servers.append(server)
+        return server, f"http://127.0.0.1:{port}"
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def connection(home_server):
+    """Connessione condivisa dai controller, con le tabelle ricreate vuote."""
+    from botocore.exceptions import ClientError
+
+    from main import setup_local_tables
+    from v1.model.dynamo_context_manager import get_connection
+
+    connection = get_connection()
+    client = connection.dynamo_db.meta.client
+    for table_name in (connection.table_name, connection.meta_table_name):
+        try:
+            client.delete_table(TableName=table_name)
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ResourceNotFoundException":
+                raise
+    connection.refresh_tables()
+    setup_local_tables(connection)
+    return connection
+
+
+@pytest.fixture
+def client() -> Iterator[TestClient]:
+    """Client HTTP dell'applicazione, con il lifespan che crea le tabelle."""
+    from main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
@@ -0,0 +1,87 @@
+import pytest
+
+from conftest import USER
+from v1.model import dynamo_context_manager
+from v1.model.dynamo_context_manager import now_micros
+
+
+@pytest.fixture
+def no_holdback(monkeypatch):
+    # Le modifiche sono visibili subito, senza aspettare i 2 secondi del feed
+    monkeypatch.setattr(dynamo_context_manager, "FEED_SAFETY_LAG_US", 0)
+
+
+def read_all(client, since=None, limit=100):
+    """Segue next_token fino all'ultima pagina, ritorna modifiche e token finale."""
+    changes = []
+    while True:
+        params = {"limit": limit} if since is None else {"limit": limit, "since": since}
+        response = client.get("/v1/users/changes", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        changes += page["changes"]
+        since = page["next_token"]
+        if not page["has_more"]:
+            return changes, since
+
+
+def test_pages_follow_the_token_without_gaps_or_repeats(
+    connection, client, no_holdback
+):
+    ids = [client.post("/v1/users", json=USER).json()["user_id"] for _ in range(5)]
+
+    changes, _ = read_all(client, limit=2)
+
+    assert [str(change["user_id"]) for change in changes] == ids
+    assert all(change["op"] == "upsert" for change in changes)
+    updated_at = [change["updated_at"] for change in changes]
+    assert updated_at == sorted(updated_at)
+
+
+def test_token_returns_only_later_changes(connection, client, no_holdback):
+    first, second = (
+        client.post("/v1/users", json=USER).json()["user_id"] for _ in range(2)
+    )
+    _, token = read_all(client)
+
+    client.put(f"/v1/users/{first}", json={**USER, "nome": "Luigi"})
+    client.delete(f"/v1/users/{second}")
+    changes, next_token = read_all(client, since=token)
+
+    assert [(str(c["user_id"]), c["op"]) for c in changes] == [
+        (first, "upsert"),
+        (second, "delete"),
+    ]
+    assert changes[0]["user"]["nome"] == "Luigi"
+    assert changes[1]["user"] is None
+    assert int(next_token) > int(token)
+
+
+def test_token_advances_without_changes(connection, client):
+    token = str(now_micros() - 10_000_000)
+
+    response = client.get("/v1/users/changes", params={"since": token})
+
+    assert response.status_code == 200
+    assert response.json()["changes"] == []
+    # Il token segue il tempo, al netto del ritardo di sicurezza del feed
+    assert int(response.json()["next_token"]) > int(token)
+
+
+def test_recent_changes_wait_for_the_holdback(connection, client):
+    token = str(now_micros())
+    client.post("/v1/users", json=USER)
+
+    page = client.get("/v1/users/changes", params={"since": token}).json()
+
+    assert page["changes"] == []
+    assert page["next_token"] == token
+
+
+@pytest.mark.parametrize(
+    "since, status", [("abc", 400), ("1", 410)], ids=["invalid", "expired"]
+)
+def test_bad_tokens_are_rejected(connection, client, since, status):
+    response = client.get("/v1/users/changes", params={"since": since})
+
+    assert response.status_code == status
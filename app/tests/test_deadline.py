@@ -0,0 +1,54 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from v1.exceptions import DeadlineExceeded
+from v1.model.deadline import Deadline, current_deadline, run_until_deadline
+
+
+def run(coro_fn, deadline):
+    async def main():
+        current_deadline.set(deadline)
+        return await coro_fn()
+
+    return asyncio.run(main())
+
+
+def test_returns_the_result_within_the_deadline():
+    result = run(lambda: run_until_deadline("op", lambda x: x * 2, 21), Deadline(5))
+    assert result == 42
+
+
+def test_answers_at_the_deadline_while_the_call_is_still_running():
+    release = threading.Event()
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded) as error:
+        run(lambda: run_until_deadline("op", release.wait, 5), Deadline(0.1))
+    release.set()
+    assert time.monotonic() - start < 1
+    assert not error.value.disconnected
+
+
+def test_answers_when_the_client_disconnects():
+    deadline = Deadline()
+    release = threading.Event()
+
+    async def disconnect_then_wait():
+        asyncio.get_running_loop().call_later(0.1, deadline.cancel)
+        return await run_until_deadline("op", release.wait, 5)
+
+    with pytest.raises(DeadlineExceeded) as error:
+        run(disconnect_then_wait, deadline)
+    release.set()
+    assert error.value.disconnected
+
+
+def test_expired_deadline_skips_the_call():
+    calls = []
+    deadline = Deadline()
+    deadline.cancel()
+    with pytest.raises(DeadlineExceeded):
+        run(lambda: run_until_deadline("op", calls.append, 1), deadline)
+    assert calls == []
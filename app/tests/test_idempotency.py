@@ -0,0 +1,78 @@
+import pytest
+
+from conftest import USER
+from v1.middleware import IdempotencyMiddleware
+from v1.model.dynamo_context_manager import IDEMPOTENCY_PREFIX
+
+
+@pytest.fixture
+def middleware(client):
+    """Middleware dell'app, con la cache locale delle risposte svuotata."""
+    app = client.app.middleware_stack
+    while not isinstance(app, IdempotencyMiddleware):
+        app = app.app
+    app.cache.clear()
+    return app
+
+
+def stored_keys(connection):
+    client = connection.dynamo_db.meta.client
+    items = client.scan(TableName=connection.meta_table_name)["Items"]
+    return [item for item in items if item["pk"].startswith(IDEMPOTENCY_PREFIX)]
+
+
+def test_retry_replays_the_stored_response(connection, client, middleware):
+    headers = {"Idempotency-Key": "insert-1"}
+
+    first = client.post("/v1/users", json=USER, headers=headers)
+    # Il tentativo arriva a un altro worker: risposta letta dalla tabella
+    middleware.cache.clear()
+    retry = client.post("/v1/users", json=USER, headers=headers)
+
+    assert first.status_code == 200
+    assert retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert len(connection.get_users(consistent=True)) == 1
+
+
+def test_key_reused_with_another_body_is_rejected(connection, client, middleware):
+    headers = {"Idempotency-Key": "insert-2"}
+    assert client.post("/v1/users", json=USER, headers=headers).status_code == 200
+
+    response = client.post("/v1/users", json={**USER, "nome": "Luigi"}, headers=headers)
+
+    assert response.status_code == 422
+    assert len(connection.get_users(consistent=True)) == 1
+
+
+def test_retry_while_the_first_request_runs_gets_409(connection, client, middleware):
+    headers = {"Idempotency-Key": "insert-3"}
+    assert client.post("/v1/users", json=USER, headers=headers).status_code == 200
+    # Riporto la chiave allo stato di una richiesta ancora in esecuzione
+    (item,) = stored_keys(connection)
+    connection.dynamo_db.meta.client.put_item(
+        TableName=connection.meta_table_name,
+        Item={
+            "pk": item["pk"],
+            "state": "in_progress",
+            "fingerprint": item["fingerprint"],
+            "expires_at": item["expires_at"],
+        },
+    )
+    middleware.cache.clear()
+
+    response = client.post("/v1/users", json=USER, headers=headers)
+
+    assert response.status_code == 409
+    assert response.headers["Retry-After"] == "1"
+    assert len(connection.get_users(consistent=True)) == 1
+
+
+def test_server_error_releases_the_key(connection, client, middleware):
+    connection.dynamo_db.meta.client.delete_table(TableName=connection.table_name)
+
+    response = client.post("/v1/users", json=USER, headers={"Idempotency-Key": "x"})
+
+    assert response.status_code >= 500
+    assert stored_keys(connection) == []
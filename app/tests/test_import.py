@@ -0,0 +1,61 @@
+import json
+
+from conftest import USER
+from v1.model.dynamo_context_manager import DynamoConnection
+from v1.model.user import User
+from v1.model.user_stats import stats_from_item
+from v1.tools import users as tool
+
+
+def write_ndjson(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+    return str(path)
+
+
+def test_import_reserves_explicit_ids_before_writing(connection, tmp_path, monkeypatch):
+    calls = []
+    for name in ("reserve_user_ids_up_to", "put_users"):
+        original = getattr(DynamoConnection, name)
+
+        def record(self, *args, _name=name, _original=original):
+            calls.append(_name)
+            return _original(self, *args)
+
+        monkeypatch.setattr(DynamoConnection, name, record)
+
+    path = write_ndjson(
+        tmp_path / "users.ndjson",
+        [{**USER, "user_id": 10}, {**USER, "user_id": 11}, USER],
+    )
+    assert tool.main(["import", path, "--no-reconcile"]) == 0
+
+    assert calls == ["reserve_user_ids_up_to", "put_users"]
+    # Il record senza id riceve il primo id dopo quelli espliciti
+    assert connection.get_user(12, consistent=True)["cf"] == USER["cf"]
+    assert connection.insert_user(User(**USER)) == 13
+
+
+def test_import_with_explicit_ids_fails_without_meta_table(connection, tmp_path):
+    connection.dynamo_db.meta.client.delete_table(TableName=connection.meta_table_name)
+    path = write_ndjson(tmp_path / "users.ndjson", [{**USER, "user_id": 1}])
+
+    assert tool.main(["import", path]) == 2
+    assert connection.get_users(consistent=True) == []
+
+
+def test_import_reconciles_stats_of_overwritten_users(connection, tmp_path):
+    user_id = connection.insert_user(User(**USER))
+    moved = {
+        **USER,
+        "user_id": user_id,
+        "p_iva": "",
+        "indirizzo_residenza": "Via del Corso 1, 00186 Roma (RM)",
+    }
+    path = write_ndjson(tmp_path / "users.ndjson", [moved])
+
+    assert tool.main(["import", path]) == 0
+
+    stats = stats_from_item(connection.get_user_stats(consistent=True))
+    assert stats["total"] == 1
+    assert stats["with_p_iva"] == 0
+    assert stats["by_province"] == {"RM": 1}
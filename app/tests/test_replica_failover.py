@@ -0,0 +1,56 @@
+from dataclasses import replace
+
+from fastapi.testclient import TestClient
+
+from conftest import USER
+from main import app, setup_local_tables
+from v1.config.db_credentials import get_credentials
+from v1.controller import get_user
+from v1.model.dynamo_context_manager import DynamoConnection
+from v1.model.replicas import parse_endpoints, replica_credentials
+from v1.model.user import User
+from v1.utils.metrics import metrics
+
+
+def test_get_user_is_served_by_replica_when_home_is_down(moto_server, monkeypatch):
+    home, home_url = moto_server()
+    _, replica_url = moto_server()
+    credentials = replace(
+        get_credentials(),
+        endpointUrl=home_url,
+        # Regione diversa dalla principale: dati separati anche in moto
+        replicaEndpoints=f"eu-west-1={replica_url}",
+    )
+
+    # Le istanze locali non replicano: l'utente viene scritto su entrambe
+    setup = DynamoConnection(credentials=credentials)
+    replica = DynamoConnection(
+        credentials=replica_credentials(
+            credentials, parse_endpoints(credentials.replicaEndpoints)[0]
+        )
+    )
+    try:
+        setup_local_tables(setup)
+        user_id = setup.insert_user(User(**USER))
+        replica.put_users([(user_id, User(**USER))])
+    finally:
+        setup.close()
+        replica.close()
+    home.stop()
+
+    connection = DynamoConnection(credentials=credentials)
+    monkeypatch.setattr(get_user, "connection", connection)
+    served = metrics.get(
+        "dynamodb_replica_reads_total", replica=replica_url, outcome="ok"
+    )
+    try:
+        response = TestClient(app).get(f"/v1/users/{user_id}")
+    finally:
+        connection.close()
+
+    assert response.status_code == 200
+    assert response.json()["detail"]["cf"] == USER["cf"]
+    assert (
+        metrics.get("dynamodb_replica_reads_total", replica=replica_url, outcome="ok")
+        == served + 1
+    )
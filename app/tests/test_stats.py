@@ -0,0 +1,58 @@
+from conftest import USER
+from v1.model.user import User
+
+ROMA = "Via del Corso 1, 00186 Roma (RM)"
+
+
+def test_stats_follow_inserts_updates_and_deletes(connection, client):
+    ids = []
+    for residence, p_iva in ((USER["indirizzo_residenza"], USER["p_iva"]), (ROMA, "")):
+        response = client.post(
+            "/v1/users", json={**USER, "indirizzo_residenza": residence, "p_iva": p_iva}
+        )
+        assert response.status_code == 200
+        ids.append(response.json()["user_id"])
+
+    stats = client.get("/v1/users/stats?consistent=true").json()
+    assert (stats["total"], stats["with_p_iva"], stats["private"]) == (2, 1, 1)
+    assert stats["by_province"] == {"MI": 1, "RM": 1}
+
+    # Il primo utente si trasferisce a Roma e perde la partita IVA
+    response = client.put(
+        f"/v1/users/{ids[0]}",
+        json={**USER, "indirizzo_residenza": ROMA, "p_iva": ""},
+    )
+    assert response.status_code == 200
+    assert client.delete(f"/v1/users/{ids[1]}").status_code == 200
+
+    stats = client.get("/v1/users/stats", headers={"X-Consistent-Read": "true"}).json()
+    assert (stats["total"], stats["with_p_iva"], stats["private"]) == (1, 0, 1)
+    assert {province: n for province, n in stats["by_province"].items() if n} == {
+        "RM": 1
+    }
+
+
+def test_reconciliation_counts_users_written_outside_the_api(connection, client):
+    assert client.post("/v1/users", json=USER).status_code == 200
+    # Un utente scritto senza passare dai contatori, come fa l'import
+    connection.put_users([(100, User(**USER))])
+
+    stats = client.get("/v1/users/stats?consistent=true").json()
+    assert stats["total"] == 1
+    assert stats["reconciled_at"] is None
+
+    correction = connection.reconcile_stats()
+
+    assert correction["total"] == 1
+    stats = client.get("/v1/users/stats?consistent=true").json()
+    assert (stats["total"], stats["with_p_iva"]) == (2, 2)
+    assert stats["by_province"]["MI"] == 2
+    assert stats["reconciled_at"] is not None
+
+
+def test_stats_without_meta_table_return_502(connection, client):
+    connection.dynamo_db.meta.client.delete_table(TableName=connection.meta_table_name)
+
+    response = client.get("/v1/users/stats")
+
+    assert response.status_code == 502
@@ -0,0 +1,117 @@
+import pytest
+from botocore.awsrequest import AWSResponse
+
+from conftest import USER
+from v1.exceptions import DeadlineExceeded
+from v1.model.deadline import Deadline, current_deadline
+from v1.model.user import User
+from v1.utils.tracing import (
+    SPAN_KIND_CLIENT,
+    SPAN_KIND_SERVER,
+    InMemoryExporter,
+    tracer,
+)
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+CALLER_SPAN_ID = "00f067aa0ba902b7"
+
+
+@pytest.fixture
+def exporter(client):
+    # Il lifespan del client configura il tracer dalle impostazioni: lo
+    # sostituisco dopo l'avvio
+    exporter = InMemoryExporter()
+    tracer.configure(exporter, 1.0)
+    yield exporter
+    tracer.configure(None)
+
+
+class _Body:
+    def __init__(self, content: bytes) -> None:
+        self.content = content
+
+    def stream(self, **kwargs):
+        yield self.content
+
+
+def _throttle_once(calls):
+    def handler(request, **kwargs):
+        calls.append(request.url)
+        if len(calls) > 1:
+            return None
+        body = b'{"__type":"com.amazonaws.dynamodb.v20120810#ProvisionedThroughputExceededException","message":"Rate exceeded"}'
+        return AWSResponse(request.url, 400, {}, _Body(body))
+
+    return handler
+
+
+def test_request_continues_the_callers_trace(connection, client, exporter):
+    user_id = connection.insert_user(User(**USER))
+    exporter.clear()
+
+    response = client.get(
+        f"/v1/users/{user_id}",
+        headers={"traceparent": f"00-{TRACE_ID}-{CALLER_SPAN_ID}-01"},
+    )
+
+    assert response.status_code == 200
+    server = next(s for s in exporter.spans if s.kind == SPAN_KIND_SERVER)
+    assert server.trace_id == TRACE_ID
+    assert server.parent_span_id == CALLER_SPAN_ID
+    assert server.attributes["http.route"] == "/v1/users/{user_id}"
+    assert response.headers["traceresponse"] == server.traceparent
+
+    get_item = next(s for s in exporter.spans if s.name == "DynamoDB.GetItem")
+    assert get_item.kind == SPAN_KIND_CLIENT
+    assert get_item.trace_id == TRACE_ID
+    assert get_item.parent_span_id == server.span_id
+    assert get_item.attributes["aws.dynamodb.table_names"] == [connection.table_name]
+    assert get_item.attributes["aws.dynamodb.consumed_capacity_units"] > 0
+
+
+def test_client_span_counts_throttled_retries(connection, client, exporter):
+    user_id = connection.insert_user(User(**USER))
+    exporter.clear()
+    calls = []
+    handler = _throttle_once(calls)
+    events = connection.client.meta.events
+    events.register_first("before-send.dynamodb.GetItem", handler)
+    try:
+        response = client.get(f"/v1/users/{user_id}")
+    finally:
+        events.unregister("before-send.dynamodb.GetItem", handler)
+
+    assert response.status_code == 200
+    assert len(calls) == 2
+    spans = [s for s in exporter.spans if s.name == "DynamoDB.GetItem"]
+    # Un solo span per la chiamata, con i tentativi come attributi
+    assert len(spans) == 1
+    assert spans[0].attributes["aws.retry_attempts"] == 1
+    assert spans[0].attributes["aws.dynamodb.throttled_attempts"] == 1
+    assert spans[0].attributes["aws.dynamodb.consumed_capacity_units"] > 0
+
+
+def test_call_stopped_by_the_deadline_leaves_no_open_span(
+    connection, exporter, monkeypatch
+):
+    opened = []
+    start_span = tracer.start_span
+
+    def recording_start_span(*args, **kwargs):
+        span = start_span(*args, **kwargs)
+        opened.append(span)
+        return span
+
+    monkeypatch.setattr(tracer, "start_span", recording_start_span)
+    deadline = Deadline()
+    deadline.cancel()
+    token = current_deadline.set(deadline)
+    try:
+        with tracer.span("request"):
+            with pytest.raises(DeadlineExceeded):
+                connection.get_user(1)
+    finally:
+        current_deadline.reset(token)
+
+    assert [span.name for span in opened] == ["request"]
+    assert all(span.end_ns is not None for span in opened)
@@ -0,0 +1,110 @@
+import os
+import subprocess
+import sys
+
+import orjson
+import pytest
+
+from v1.utils.metrics import metrics
+from v1.utils.profiling import profiler
+from v1.utils.worker_state import PROFILING_FILE, WorkerState
+
+
+@pytest.fixture
+def dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+@pytest.fixture
+def worker_state(tmp_path, monkeypatch):
+    # Il profiler è globale: ogni test parte dallo stato iniziale
+    for name in ("enabled", "sample_rate", "interval_ms", "routes", "generation"):
+        monkeypatch.setattr(profiler, name, getattr(profiler, name))
+    monkeypatch.setattr(profiler, "_sampler", None)
+    WorkerState.prepare(str(tmp_path))
+    return WorkerState(str(tmp_path), 1.0)
+
+
+def write(worker_state, name, content):
+    with open(os.path.join(worker_state.path, name), "wb") as f:
+        f.write(orjson.dumps(content))
+
+
+def other_worker_metrics(counter, gauge):
+    return {
+        "meta": {
+            "test_requests_total": ["Richieste di test", "counter"],
+            "test_documents": ["Documenti di test", "gauge"],
+        },
+        "values": {
+            "test_requests_total": [[[["route", "/a"]], counter]],
+            "test_documents": [[[], gauge]],
+        },
+    }
+
+
+def test_metrics_sum_counters_and_label_gauges_of_live_workers(worker_state, dead_pid):
+    metrics.describe("test_requests_total", "Richieste di test", "counter")
+    metrics.describe("test_documents", "Documenti di test", "gauge")
+    own = metrics.get("test_requests_total", route="/a")
+    metrics.inc("test_requests_total", 2, route="/a")
+    metrics.set("test_documents", 5)
+    # Il padre di pytest è un processo attivo, dead_pid è già terminato
+    write(worker_state, f"metrics-{os.getppid()}.json", other_worker_metrics(3, 7))
+    write(worker_state, f"metrics-{dead_pid}.json", other_worker_metrics(4, 9))
+
+    lines = worker_state.render_metrics().splitlines()
+
+    assert f'test_requests_total{{route="/a"}} {own + 2 + 3 + 4:g}' in lines
+    assert f'test_documents{{worker="{os.getpid()}"}} 5' in lines
+    assert f'test_documents{{worker="{os.getppid()}"}} 7' in lines
+    assert not any(f'worker="{dead_pid}"' in line for line in lines)
+
+
+def test_profiler_configuration_reaches_the_other_workers(worker_state):
+    worker_state.update_profiler({"enabled": True, "sample_rate": 0.5})
+
+    with open(os.path.join(worker_state.path, PROFILING_FILE), "rb") as f:
+        shared = orjson.loads(f.read())
+    assert shared["enabled"] is True
+    assert shared["sample_rate"] == 0.5
+
+    # Un altro worker cambia la configurazione e azzera i campioni
+    write(
+        worker_state,
+        PROFILING_FILE,
+        {**shared, "routes": ["/v1/users"], "generation": 1},
+    )
+    profiler.sampler.merge({"samples": 1, "stacks": {"GET /v1/users;f": 1}})
+    worker_state.sync_profiler()
+
+    assert profiler.enabled is True
+    assert profiler.routes == ("/v1/users",)
+    assert profiler.generation == 1
+    assert profiler.sampler.samples == 0
+
+
+def test_profile_merges_stacks_of_the_current_generation(worker_state, dead_pid):
+    profiler.sampler.merge({"samples": 2, "stacks": {"GET /v1/users;f": 2}})
+    write(
+        worker_state,
+        f"profile-{dead_pid}.json",
+        {
+            "samples": 3,
+            "stacks": {"GET /v1/users;f": 1, "GET /v1/users;g": 2},
+            "generation": 0,
+        },
+    )
+    write(
+        worker_state,
+        f"profile-{os.getppid()}.json",
+        {"samples": 5, "stacks": {"GET /v1/users;h": 5}, "generation": -1},
+    )
+
+    merged = worker_state.profile()
+
+    # Gli stack dei worker terminati restano, quelli azzerati no
+    assert merged.samples == 5
+    assert merged.stacks == {"GET /v1/users;f": 3, "GET /v1/users;g": 2}
@@ -0,0 +1,232 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+from .db_credentials import env_field
+
+
+def _as_bool(value: str) -> bool:
+    return value.lower() == "true"
+
+
+@dataclass(frozen=True, slots=True)
+class AppSettings:
+    """Definisce i parametri applicativi configurabili tramite variabili d'ambiente."""
+
+    compressionMinimumSize: int = env_field(
+        "COMPRESSION_MIN_SIZE", default="1024", cast=int
+    )
+    compressionLevel: int = env_field("COMPRESSION_LEVEL", default="6", cast=int)
+    changeFeedRetentionDays: int = env_field(
+        "CHANGE_FEED_RETENTION_DAYS", default="7", cast=int
+    )
+    validationMode: str = env_field("VALIDATION_MODE", default="fast", cast=str.lower)
+    insertBatching: bool = env_field("INSERT_BATCHING", default="false", cast=_as_bool)
+    insertBatchMaxSize: int = env_field("INSERT_BATCH_MAX_SIZE", default="25", cast=int)
+    insertBatchMaxDelayMs: int = env_field(
+        "INSERT_BATCH_MAX_DELAY_MS", default="10", cast=int
+    )
+    rateLimitRate: float = env_field("RATE_LIMIT_RATE", default="0", cast=float)
+    rateLimitBurst: float = env_field("RATE_LIMIT_BURST", default="50", cast=float)
+    rateLimitRouteCosts: str = env_field(
+        "RATE_LIMIT_ROUTE_COSTS", default="GET /v1/users=10"
+    )
+    maxInflightCost: int = env_field("MAX_INFLIGHT_COST", default="0", cast=int)
+    serverHost: str = env_field("SERVER_HOST", default="0.0.0.0")
+    serverPort: int = env_field("SERVER_PORT", default="8080", cast=int)
+    serverWorkers: int = env_field("SERVER_WORKERS", default="0", cast=int)
+    serverMaxRequests: int = env_field("SERVER_MAX_REQUESTS", default="0", cast=int)
+    serverGracefulTimeout: int = env_field(
+        "SERVER_GRACEFUL_TIMEOUT", default="30", cast=int
+    )
+    serverKeepAlive: int = env_field("SERVER_KEEP_ALIVE", default="5", cast=int)
+    serverAccessLog: bool = env_field(
+        "SERVER_ACCESS_LOG", default="true", cast=_as_bool
+    )
+    capacityMode: str = env_field(
+        "CAPACITY_MODE", default="PAY_PER_REQUEST", cast=str.upper
+    )
+    readCapacity: int = env_field("TABLE_READ_CAPACITY", default="10", cast=int)
+    writeCapacity: int = env_field("TABLE_WRITE_CAPACITY", default="10", cast=int)
+    autoscalingMaxReadCapacity: int = env_field(
+        "AUTOSCALING_MAX_READ_CAPACITY", default="0", cast=int
+    )
+    autoscalingMaxWriteCapacity: int = env_field(
+        "AUTOSCALING_MAX_WRITE_CAPACITY", default="0", cast=int
+    )
+    autoscalingTargetUtilization: float = env_field(
+        "AUTOSCALING_TARGET_UTILIZATION", default="70", cast=float
+    )
+    tracingExporter: str = env_field("TRACING_EXPORTER", default="none", cast=str.lower)
+    tracingFile: str = env_field("TRACING_FILE", default="traces.ndjson")
+    tracingSampleRate: float = env_field("TRACING_SAMPLE_RATE", default="1", cast=float)
+    profilingEnabled: bool = env_field(
+        "PROFILING_ENABLED", default="false", cast=_as_bool
+    )
+    profilingSampleRate: float = env_field(
+        "PROFILING_SAMPLE_RATE", default="0.01", cast=float
+    )
+    profilingIntervalMs: int = env_field("PROFILING_INTERVAL_MS", default="5", cast=int)
+    profilingRoutes: str = env_field("PROFILING_ROUTES", default="")
+    adminToken: str = env_field("ADMIN_TOKEN", default="")
+    deleteMode: str = env_field("DELETE_MODE", default="hard", cast=str.lower)
+    softDeleteRetentionDays: int = env_field(
+        "SOFT_DELETE_RETENTION_DAYS", default="7", cast=int
+    )
+    searchIndexEnabled: bool = env_field(
+        "SEARCH_INDEX_ENABLED", default="false", cast=_as_bool
+    )
+    searchRefreshIntervalMs: int = env_field(
+        "SEARCH_REFRESH_INTERVAL_MS", default="1000", cast=int
+    )
+    searchScanSegments: int = env_field("SEARCH_SCAN_SEGMENTS", default="4", cast=int)
+    statsReconcileIntervalS: int = env_field(
+        "STATS_RECONCILE_INTERVAL_S", default="3600", cast=int
+    )
+    metaCounterShards: int = env_field("META_COUNTER_SHARDS", default="4", cast=int)
+    idempotencyTtlHours: int = env_field(
+        "IDEMPOTENCY_TTL_HOURS", default="24", cast=int
+    )
+    idempotencyCacheSize: int = env_field(
+        "IDEMPOTENCY_CACHE_SIZE", default="10000", cast=int
+    )
+    hedgingEnabled: bool = env_field("HEDGING_ENABLED", default="false", cast=_as_bool)
+    hedgingPercentile: float = env_field("HEDGING_PERCENTILE", default="95", cast=float)
+    hedgingBudgetPercent: float = env_field(
+        "HEDGING_BUDGET_PERCENT", default="5", cast=float
+    )
+    hedgingMinDelayMs: float = env_field(
+        "HEDGING_MIN_DELAY_MS", default="2", cast=float
+    )
+    requestTimeoutS: float = env_field("REQUEST_TIMEOUT_S", default="0", cast=float)
+    requestTimeoutRoutes: str = env_field("REQUEST_TIMEOUT_ROUTES", default="")
+    dynamodbConnectTimeoutS: float = env_field(
+        "DYNAMODB_CONNECT_TIMEOUT_S", default="0", cast=float
+    )
+    dynamodbReadTimeoutS: float = env_field(
+        "DYNAMODB_READ_TIMEOUT_S", default="0", cast=float
+    )
+    userCacheEnabled: bool = env_field(
+        "USER_CACHE_ENABLED", default="false", cast=_as_bool
+    )
+    userCacheSlots: int = env_field("USER_CACHE_SLOTS", default="65536", cast=int)
+    userCacheSlotSize: int = env_field("USER_CACHE_SLOT_SIZE", default="512", cast=int)
+    userCacheRefreshIntervalMs: int = env_field(
+        "USER_CACHE_REFRESH_INTERVAL_MS", default="1000", cast=int
+    )
+    userCachePath: str = env_field("USER_CACHE_PATH", default="")
+    workerStatePath: str = env_field("WORKER_STATE_PATH", default="")
+    workerStateIntervalMs: int = env_field(
+        "WORKER_STATE_INTERVAL_MS", default="1000", cast=int
+    )
+    replicaHealthCheckIntervalS: float = env_field(
+        "REPLICA_HEALTH_CHECK_INTERVAL_S", default="5", cast=float
+    )
+    replicaFailureThreshold: int = env_field(
+        "REPLICA_FAILURE_THRESHOLD", default="3", cast=int
+    )
+    replicaConnectTimeoutS: float = env_field(
+        "REPLICA_CONNECT_TIMEOUT_S", default="1", cast=float
+    )
+
+    def __post_init__(self) -> None:
+        if self.validationMode not in ("fast", "strict"):
+            raise EnvironmentError(
+                f"VALIDATION_MODE deve essere 'fast' o 'strict', trovato '{self.validationMode}'"
+            )
+        if not 1 <= self.compressionLevel <= 9:
+            raise EnvironmentError("COMPRESSION_LEVEL deve essere compreso tra 1 e 9")
+        if not 1 <= self.insertBatchMaxSize <= 25:
+            raise EnvironmentError(
+                "INSERT_BATCH_MAX_SIZE deve essere compreso tra 1 e 25"
+            )
+        if self.capacityMode not in ("PAY_PER_REQUEST", "PROVISIONED"):
+            raise EnvironmentError(
+                f"CAPACITY_MODE deve essere 'PAY_PER_REQUEST' o 'PROVISIONED', trovato '{self.capacityMode}'"
+            )
+        if self.readCapacity < 1 or self.writeCapacity < 1:
+            raise EnvironmentError(
+                "TABLE_READ_CAPACITY e TABLE_WRITE_CAPACITY devono essere almeno 1"
+            )
+        if not 20 <= self.autoscalingTargetUtilization <= 90:
+            raise EnvironmentError(
+                "AUTOSCALING_TARGET_UTILIZATION deve essere compreso tra 20 e 90"
+            )
+        if self.tracingExporter not in ("none", "memory", "file"):
+            raise EnvironmentError(
+                f"TRACING_EXPORTER deve essere 'none', 'memory' o 'file', trovato '{self.tracingExporter}'"
+            )
+        if not 0 <= self.tracingSampleRate <= 1:
+            raise EnvironmentError("TRACING_SAMPLE_RATE deve essere compreso tra 0 e 1")
+        if not 0 <= self.profilingSampleRate <= 1:
+            raise EnvironmentError(
+                "PROFILING_SAMPLE_RATE deve essere compreso tra 0 e 1"
+            )
+        if self.profilingIntervalMs < 1:
+            raise EnvironmentError("PROFILING_INTERVAL_MS deve essere almeno 1")
+        if self.deleteMode not in ("hard", "soft"):
+            raise EnvironmentError(
+                f"DELETE_MODE deve essere 'hard' o 'soft', trovato '{self.deleteMode}'"
+            )
+        if self.softDeleteRetentionDays < 0:
+            raise EnvironmentError("SOFT_DELETE_RETENTION_DAYS non può essere negativo")
+        if self.searchRefreshIntervalMs < 100:
+            raise EnvironmentError("SEARCH_REFRESH_INTERVAL_MS deve essere almeno 100")
+        if self.searchScanSegments < 1:
+            raise EnvironmentError("SEARCH_SCAN_SEGMENTS deve essere almeno 1")
+        if self.statsReconcileIntervalS < 0:
+            raise EnvironmentError("STATS_RECONCILE_INTERVAL_S non può essere negativo")
+        if self.metaCounterShards < 1:
+            raise EnvironmentError("META_COUNTER_SHARDS deve essere almeno 1")
+        if self.idempotencyTtlHours < 1:
+            raise EnvironmentError("IDEMPOTENCY_TTL_HOURS deve essere almeno 1")
+        if self.idempotencyCacheSize < 0:
+            raise EnvironmentError("IDEMPOTENCY_CACHE_SIZE non può essere negativo")
+        if not 50 <= self.hedgingPercentile < 100:
+            raise EnvironmentError(
+                "HEDGING_PERCENTILE deve essere compreso tra 50 e 100 (escluso)"
+            )
+        if not 0 <= self.hedgingBudgetPercent <= 100:
+            raise EnvironmentError(
+                "HEDGING_BUDGET_PERCENT deve essere compreso tra 0 e 100"
+            )
+        if self.hedgingMinDelayMs < 0:
+            raise EnvironmentError("HEDGING_MIN_DELAY_MS non può essere negativo")
+        if self.requestTimeoutS < 0:
+            raise EnvironmentError("REQUEST_TIMEOUT_S non può essere negativo")
+        if self.dynamodbConnectTimeoutS < 0 or self.dynamodbReadTimeoutS < 0:
+            raise EnvironmentError(
+                "DYNAMODB_CONNECT_TIMEOUT_S e DYNAMODB_READ_TIMEOUT_S non possono essere negativi"
+            )
+        if self.userCacheSlots < 1:
+            raise EnvironmentError("USER_CACHE_SLOTS deve essere almeno 1")
+        if self.userCacheSlotSize < 128:
+            raise EnvironmentError("USER_CACHE_SLOT_SIZE deve essere almeno 128")
+        if self.userCacheRefreshIntervalMs < 100:
+            raise EnvironmentError(
+                "USER_CACHE_REFRESH_INTERVAL_MS deve essere almeno 100"
+            )
+        if self.workerStateIntervalMs < 100:
+            raise EnvironmentError("WORKER_STATE_INTERVAL_MS deve essere almeno 100")
+        if self.replicaHealthCheckIntervalS <= 0:
+            raise EnvironmentError(
+                "REPLICA_HEALTH_CHECK_INTERVAL_S deve essere positivo"
+            )
+        if self.replicaFailureThreshold < 1:
+            raise EnvironmentError("REPLICA_FAILURE_THRESHOLD deve essere almeno 1")
+        if self.replicaConnectTimeoutS <= 0:
+            raise EnvironmentError("REPLICA_CONNECT_TIMEOUT_S deve essere positivo")
+
+
+@lru_cache(maxsize=None)
+def get_settings() -> AppSettings:
+    """Legge e valida i parametri applicativi una sola volta, al primo utilizzo.
+
+    Returns:
+        AppSettings: I parametri condivisi da tutto il processo.
+    """
+    return AppSettings()
+
+
+if __name__ == "__main__":
+    settings = get_settings()
+    print(settings)
@@ -1,8 +1,10 @@
 from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Optional
 import os
 
 
-def get_env_variable(var_name: str, default) -> str:
+def get_env_variable(var_name: str, default: Optional[str] = None) -> str:
     """Esegui il parsing di una variabile d'ambiente.
 
     Args:
@@ -17,7 +19,7 @@ def get_env_variable(var_name: str, default) -> str:
     """
     val = os.getenv(var_name)
     if not val:
-        if not default:
+        if default is None:
             raise EnvironmentError(
                 f"La variabile {var_name} non è stata impostata correttamente."
             )
@@ -25,19 +27,45 @@ def get_env_variable(var_name: str, default) -> str:
     return val
 
 
+def env_field(var_name: str, default: Optional[str] = None, cast=str):
+    """Campo di dataclass letto dalla variabile d'ambiente alla creazione dell'istanza.
+
+    Args:
+        var_name (str): Nome della variabile d'ambiente.
+        default (str, optional): Valore di default.
+        cast (Callable, optional): Conversione da applicare al valore letto.
+
+    Returns:
+        dataclasses.Field: Campo con default_factory che legge la variabile.
+    """
+    return field(default_factory=lambda: cast(get_env_variable(var_name, default)))
+
+
 @dataclass(frozen=True, slots=True)
 class DynamoCredentials:
     """Definisce il modello delle credenziali per la connessione a DynamoDB."""
 
-    awsAccessKeyId: str = field(default=get_env_variable("AWS_ACCESS_KEY_ID"))
-    awsSecretAccessKey: str = field(default=get_env_variable("AWS_SECRET_ACCESS_KEY"))
-    endpointUrl: str = field(
-        default=get_env_variable("AWS_ENDPOINT_URL", default="prod")
-    )
-    regionName: str = field(default=get_env_variable("DYNAMODB_REGION"))
-    tableName: str = field(default=get_env_variable("DYNAMODB_TABLE"))
+    awsAccessKeyId: str = env_field("AWS_ACCESS_KEY_ID")
+    awsSecretAccessKey: str = env_field("AWS_SECRET_ACCESS_KEY")
+    endpointUrl: str = env_field("AWS_ENDPOINT_URL", default="prod")
+    regionName: str = env_field("DYNAMODB_REGION")
+    tableName: str = env_field("DYNAMODB_TABLE")
+    metaTableName: str = env_field("DYNAMODB_META_TABLE", default="MCDE2023-users-meta")
+    # Repliche per le letture, es. "eu-south-1,eu-central-1" o, in locale,
+    # "eu-west-1=http://dynamodb-replica:8000"
+    replicaEndpoints: str = env_field("DYNAMODB_REPLICAS", default="")
+
+
+@lru_cache(maxsize=None)
+def get_credentials() -> DynamoCredentials:
+    """Legge e valida le credenziali una sola volta, al primo utilizzo.
+
+    Returns:
+        DynamoCredentials: Le credenziali condivise da tutto il processo.
+    """
+    return DynamoCredentials()
 
 
 if __name__ == "__main__":
-    credentials = DynamoCredentials()
+    credentials = get_credentials()
     print(credentials)
@@ -0,0 +1,141 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from ..views import (
+    ErrorResponse,
+    ProfilingConfig,
+    ProfilingFrame,
+    ProfilingStatusResponse,
+)
+from ..utils.admin import require_admin_token
+from ..utils.custom_logger import LogSetupper
+from ..utils.profiling import StackSampler, profiler
+from ..utils.worker_state import get_worker_state
+
+router = APIRouter(dependencies=[Depends(require_admin_token)])
+logger = LogSetupper(__name__).setup()
+
+
+def _samples() -> StackSampler:
+    # Con serve.py gli stack sono quelli di tutti i worker
+    workers = get_worker_state()
+    return profiler.sampler if workers is None else workers.profile()
+
+
+def _update(changes: Dict[str, Any], reset: bool = False) -> None:
+    # Con serve.py la modifica arriva anche agli altri worker
+    workers = get_worker_state()
+    if workers is not None:
+        workers.update_profiler(changes, reset)
+        return
+    profiler.configure(**changes)
+    if reset:
+        profiler.reset()
+
+
+def _status() -> ProfilingStatusResponse:
+    sampler = _samples()
+    return ProfilingStatusResponse(
+        status="ok",
+        enabled=profiler.enabled,
+        sample_rate=profiler.sample_rate,
+        interval_ms=profiler.interval_ms,
+        routes=list(profiler.routes),
+        samples=sampler.samples,
+        stacks=len(sampler.stacks),
+        top_frames=[
+            ProfilingFrame(frame=frame, samples=samples)
+            for frame, samples in sampler.top_frames()
+        ],
+    )
+
+
+@router.get(
+    "/admin/profiling",
+    tags=["Admin"],
+    response_model=ProfilingStatusResponse,
+    summary="Stato del profiler e funzioni più campionate.",
+    status_code=200,
+    responses={403: {"model": ErrorResponse}},
+)
+async def get_profiling() -> ProfilingStatusResponse:
+    """Funzione per leggere configurazione e risultati del profiler di tutti i worker
+
+    Raises:
+        HTTPException: 403 se il token di amministrazione non è valido
+
+    Returns:
+        ProfilingStatusResponse: Configurazione corrente e funzioni più campionate
+    """
+    return _status()
+
+
+@router.put(
+    "/admin/profiling",
+    tags=["Admin"],
+    response_model=ProfilingStatusResponse,
+    summary="Accende, spegne o riconfigura il profiler.",
+    status_code=200,
+    responses={403: {"model": ErrorResponse}},
+)
+async def configure_profiling(config: ProfilingConfig) -> ProfilingStatusResponse:
+    """Funzione per modificare il profiler a runtime, senza riavviare il servizio
+
+    Gli altri worker applicano la modifica entro WORKER_STATE_INTERVAL_MS.
+
+    Args:
+        config (ProfilingConfig): Parametri da modificare, quelli assenti restano invariati
+
+    Raises:
+        HTTPException: 403 se il token di amministrazione non è valido
+
+    Returns:
+        ProfilingStatusResponse: Configurazione aggiornata
+    """
+    _update(config.model_dump(exclude_none=True))
+    logger.warning(f"Profiler riconfigurato: {config.model_dump(exclude_none=True)}")
+    return _status()
+
+
+@router.delete(
+    "/admin/profiling",
+    tags=["Admin"],
+    response_model=ProfilingStatusResponse,
+    summary="Azzera i campioni raccolti dal profiler.",
+    status_code=200,
+    responses={403: {"model": ErrorResponse}},
+)
+async def reset_profiling() -> ProfilingStatusResponse:
+    """Funzione per azzerare gli stack raccolti, lasciando invariata la configurazione
+
+    Raises:
+        HTTPException: 403 se il token di amministrazione non è valido
+
+    Returns:
+        ProfilingStatusResponse: Stato del profiler dopo l'azzeramento
+    """
+    _update({}, reset=True)
+    return _status()
+
+
+@router.get(
+    "/admin/profiling/folded",
+    tags=["Admin"],
+    response_class=PlainTextResponse,
+    summary="Stack campionati in formato folded per i flamegraph.",
+    status_code=200,
+    responses={403: {"model": ErrorResponse}},
+)
+async def get_profiling_folded() -> PlainTextResponse:
+    """Funzione per scaricare gli stack aggregati, una riga "frame;frame;frame N" per stack
+
+    Il risultato si passa a flamegraph.pl, inferno o speedscope.
+
+    Raises:
+        HTTPException: 403 se il token di amministrazione non è valido
+
+    Returns:
+        PlainTextResponse: Stack nel formato folded
+    """
+    return PlainTextResponse(_samples().folded())
@@ -0,0 +1,74 @@
+from fastapi import APIRouter
+from ..views import BulkDeleteRequest, UsersDeletedResponse, ErrorResponse
+from ..exceptions import ErrorCatalogue, DynamoTableDoesNotExist, DeadlineExceeded
+from ..model.dynamo_context_manager import get_connection
+from ..model.deadline import run_until_deadline
+from ..model.shared_cache import invalidate_cached_user
+from botocore.exceptions import BotoCoreError, ClientError
+from ..utils.custom_logger import LogSetupper
+
+router = APIRouter()
+connection = get_connection()
+logger = LogSetupper(__name__).setup()
+
+
+@router.post(
+    "/users/bulk-delete",
+    tags=["Delete users"],
+    response_model=UsersDeletedResponse,
+    summary="Cancella più utenti, fino a 1000 per richiesta.",
+    status_code=200,
+    responses={
+        502: {"model": ErrorResponse},
+        500: {"model": ErrorResponse},
+    },
+)
+async def delete_users(request: BulkDeleteRequest) -> UsersDeletedResponse:
+    """Funzione per eliminare più utenti con una sola chiamata
+
+    Gli id non presenti (o già cancellati) non sono un errore: vengono
+    riportati nel campo not_found della risposta. Gli id la cui cancellazione
+    fallisce per un errore di DynamoDB sono nel campo failed e le altre
+    cancellazioni restano valide.
+
+    Args:
+        request (BulkDeleteRequest): Id degli utenti da eliminare
+
+    Raises:
+        HTTPException: 502 se la connessione a Dynamo DB non è riuscita
+        HTTPException: 502 se la tabella non esiste
+        HTTPException: 500 per un errore legato al client Dynamo db
+        HTTPException: 500 per un errore generico
+
+    Returns:
+        UsersDeletedResponse: Id cancellati, non trovati e falliti
+    """
+    logger.debug(f"Comincio cancellazione di {len(request.user_ids)} utenti")
+
+    try:
+        deleted, not_found, failed = await run_until_deadline(
+            "delete_users", connection.delete_users, request.user_ids
+        )
+        for user_id in deleted:
+            invalidate_cached_user(user_id)
+        logger.info(
+            f"Utenti eliminati: {len(deleted)}, non trovati: {len(not_found)}, falliti: {len(failed)}"
+        )
+    except DynamoTableDoesNotExist as e:
+        logger.error(f"Tabella non trovata: {e}")
+        raise ErrorCatalogue.TABLE_NOT_FOUND.exception()
+    except ClientError as e:
+        logger.error(f"Errore client DynamoDB: {e}")
+        raise ErrorCatalogue.DYNAMO_CLIENT_ERROR.exception()
+    except BotoCoreError as e:
+        logger.error(f"Connessione a DynamoDB non riuscita: {e}")
+        raise ErrorCatalogue.DYNAMO_UNREACHABLE.exception()
+    except DeadlineExceeded as e:
+        logger.error(f"Richiesta interrotta: {e}")
+        raise ErrorCatalogue.DEADLINE_EXCEEDED.exception()
+    except Exception as e:
+        logger.error(f"Errore sconosciuto: {e}")
+        raise ErrorCatalogue.UNKNOWN_ERROR.exception()
+    return UsersDeletedResponse(
+        status="ok", deleted=deleted, not_found=not_found, failed=failed
+    )
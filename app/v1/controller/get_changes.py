@@ -0,0 +1,106 @@
+from typing import Optional
+
+from fastapi import APIRouter, Query
+from ..views import GetChangesResponse, UserChange, ErrorResponse
+from ..exceptions import (
+    ErrorCatalogue,
+    DynamoTableDoesNotExist,
+    ChangeTokenExpired,
+    DeadlineExceeded,
+)
+from ..model.dynamo_context_manager import get_connection, TOMBSTONES_FEED
+from ..model.deadline import run_until_deadline
+from ..utils.custom_logger import LogSetupper
+from botocore.exceptions import BotoCoreError, ClientError
+
+router = APIRouter()
+logger = LogSetupper(__name__).setup()
+connection = get_connection()
+
+
+@router.get(
+    "/users/changes",
+    tags=["Get user changes"],
+    response_model=GetChangesResponse,
+    summary="Ritorna gli utenti inseriti, aggiornati o cancellati dopo un token.",
+    status_code=200,
+    responses={
+        400: {"model": ErrorResponse},
+        410: {"model": ErrorResponse},
+        502: {"model": ErrorResponse},
+        500: {"model": ErrorResponse},
+    },
+)
+async def get_changes(
+    since: Optional[str] = Query(
+        default=None, description="Token ritornato dalla chiamata precedente"
+    ),
+    limit: int = Query(default=100, ge=1, le=1000),
+) -> GetChangesResponse:
+    """Funzione per la sincronizzazione incrementale degli utenti
+
+    Senza token ritorna tutte le modifiche ancora presenti nel change feed. Il
+    campo next_token della risposta va passato come since alla chiamata
+    successiva. Le modifiche degli ultimi secondi arrivano alla chiamata dopo,
+    e la stessa modifica può arrivare più volte: va applicata come upsert.
+
+    Args:
+        since (Optional[str]): Token dell'ultima modifica già ricevuta
+        limit (int): Numero massimo di modifiche da ritornare
+
+    Raises:
+        HTTPException: 400 se il token non è valido
+        HTTPException: 410 se il token è scaduto ed è necessaria una sincronizzazione completa
+        HTTPException: 502 se la connessione a Dynamo DB non è riuscita
+        HTTPException: 502 se la tabella non esiste
+        HTTPException: 500 per un errore legato al client Dynamo db
+        HTTPException: 500 per un errore generico
+
+    Returns:
+        GetChangesResponse: Elenco delle modifiche con il token per la chiamata successiva
+    """
+    logger.info(f"Comincio retrieve delle modifiche dal token {since}")
+
+    try:
+        token = int(since) if since else 0
+    except ValueError:
+        logger.error(f"Token non valido: {since}")
+        raise ErrorCatalogue.INVALID_TOKEN.exception()
+
+    try:
+        items, has_more, next_token = await run_until_deadline(
+            "get_changes", connection.get_changes, since=token, limit=limit
+        )
+        logger.info(f"Trovate {len(items)} modifiche dal token {token}")
+
+    except ChangeTokenExpired as e:
+        logger.error(f"Token scaduto: {e}")
+        raise ErrorCatalogue.TOKEN_EXPIRED.exception()
+    except DynamoTableDoesNotExist as e:
+        logger.error(f"Tabella non trovata: {e}")
+        raise ErrorCatalogue.TABLE_NOT_FOUND.exception()
+    except ClientError as e:
+        logger.error(f"Errore client DynamoDB: {e}")
+        raise ErrorCatalogue.DYNAMO_CLIENT_ERROR.exception()
+    except BotoCoreError as e:
+        logger.error(f"Connessione a DynamoDB non riuscita: {e}")
+        raise ErrorCatalogue.DYNAMO_UNREACHABLE.exception()
+    except DeadlineExceeded as e:
+        logger.error(f"Richiesta interrotta: {e}")
+        raise ErrorCatalogue.DEADLINE_EXCEEDED.exception()
+    except Exception as e:
+        logger.error(f"Errore sconosciuto: {e}")
+        raise ErrorCatalogue.UNKNOWN_ERROR.exception()
+
+    changes = [
+        UserChange(
+            user_id=item["user_id"],
+            op="delete" if item["feed"] == TOMBSTONES_FEED else "upsert",
+            updated_at=item["updated_at"],
+            user=None if item["feed"] == TOMBSTONES_FEED else item,
+        )
+        for item in items
+    ]
+    return GetChangesResponse(
+        status="ok", changes=changes, next_token=str(next_token), has_more=has_more
+    )
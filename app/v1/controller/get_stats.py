@@ -0,0 +1,86 @@
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import APIRouter, Depends
+from ..views import UserStatsResponse, ErrorResponse
+from ..exceptions import ErrorCatalogue, DeadlineExceeded
+from ..model.dynamo_context_manager import DynamoConnection, get_connection
+from ..model.deadline import run_until_deadline
+from ..model.stats_reconciler import StatsReconciler
+from ..model.user_stats import stats_from_item
+from ..utils.consistency import consistent_read
+from ..utils.custom_logger import LogSetupper
+from botocore.exceptions import BotoCoreError, ClientError
+
+router = APIRouter()
+logger = LogSetupper(__name__).setup()
+connection = get_connection()
+
+
+@lru_cache(maxsize=None)
+def get_stats_reconciler() -> Optional[StatsReconciler]:
+    """Ritorna la riconciliazione periodica delle statistiche, None se disattivata.
+
+    La riconciliazione usa una connessione dedicata, separata da quella condivisa.
+    """
+    interval = connection.settings.statsReconcileIntervalS
+    if not interval:
+        return None
+    return StatsReconciler(DynamoConnection(), interval)
+
+
+@router.get(
+    "/users/stats",
+    tags=["User statistics"],
+    response_model=UserStatsResponse,
+    summary="Ritorna il numero di utenti e le statistiche aggregate.",
+    status_code=200,
+    responses={
+        502: {"model": ErrorResponse},
+        500: {"model": ErrorResponse},
+    },
+)
+async def get_stats(consistent: bool = Depends(consistent_read)) -> UserStatsResponse:
+    """Funzione per ottenere il numero di utenti, quanti hanno una partita IVA
+    e la loro distribuzione per provincia di residenza
+
+    I valori sono contatori aggiornati a ogni scrittura: la chiamata legge un
+    solo item e il suo costo non dipende dal numero di utenti. reconciled_at è
+    l'ultima volta in cui i contatori sono stati ricalcolati con una scan,
+    null se non è ancora successo.
+
+    Args:
+        consistent (bool): True per una lettura fortemente consistente
+
+    Raises:
+        HTTPException: 502 se la connessione a Dynamo DB non è riuscita
+        HTTPException: 502 se la tabella di metadati non esiste
+        HTTPException: 500 per un errore legato al client Dynamo db
+        HTTPException: 500 per un errore generico
+
+    Returns:
+        UserStatsResponse: Statistiche degli utenti
+    """
+    try:
+        item = await run_until_deadline(
+            "get_user_stats", connection.get_user_stats, consistent=consistent
+        )
+    except ClientError as e:
+        logger.error(f"Errore client DynamoDB: {e}")
+        raise ErrorCatalogue.DYNAMO_CLIENT_ERROR.exception()
+    except BotoCoreError as e:
+        logger.error(f"Connessione a DynamoDB non riuscita: {e}")
+        raise ErrorCatalogue.DYNAMO_UNREACHABLE.exception()
+    except DeadlineExceeded as e:
+        logger.error(f"Richiesta interrotta: {e}")
+        raise ErrorCatalogue.DEADLINE_EXCEEDED.exception()
+    except Exception as e:
+        logger.error(f"Errore sconosciuto: {e}")
+        raise ErrorCatalogue.UNKNOWN_ERROR.exception()
+
+    if item is None:
+        logger.error(f"Tabella non trovata: {connection.meta_table_name}")
+        raise ErrorCatalogue.TABLE_NOT_FOUND.exception()
+    stats = stats_from_item(item)
+    logger.debug(f"Statistiche lette: {stats['total']} utenti")
+    return UserStatsResponse(status="ok", **stats)
@@ -1,8 +1,11 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Response
 from ..views import GetUserResponse, ErrorResponse
-from ..exceptions import HTTPException, UserNotFound, DynamoTableDoesNotExist
-from ..model.dynamo_context_manager import DynamoConnection
-from botocore.exceptions import ClientError
+from ..exceptions import ErrorCatalogue, UserNotFound, DynamoTableDoesNotExist, DeadlineExceeded
+from ..model.dynamo_context_manager import get_connection
+from ..model.deadline import run_until_deadline
+from ..model.shared_cache import get_user_cache
+from botocore.exceptions import BotoCoreError, ClientError
+from ..utils.consistency import consistent_read
 from ..utils.custom_logger import LogSetupper
 
 
@@ -10,7 +13,7 @@ router = APIRouter()
 logger = LogSetupper(__name__).setup()
 
 # Check if DynamoDB is up and running
-connection = DynamoConnection()
+connection = get_connection()
 
 
 @router.get(
@@ -25,11 +28,17 @@ connection = DynamoConnection()
         500: {"model": ErrorResponse},
     },
 )
-async def get_user(user_id: int) -> GetUserResponse:
+async def get_user(
+    user_id: int, consistent: bool = Depends(consistent_read)
+) -> GetUserResponse:
     """Funzione per ottenere i dettagli di un utente dato il suo user id
 
     Args:
         user_id (int): user id dell'utente che si vuole ottenere
+        consistent (bool): True per una lettura fortemente consistente
+
+    Con la cache condivisa attiva le letture non consistenti vengono servite,
+    se possibile, dal JSON già serializzato nella cache, senza chiamare DynamoDB.
 
     Raises:
         HTTPException: 502 se la connessione a Dynamo DB non è riuscita
@@ -43,49 +52,39 @@ async def get_user(user_id: int) -> GetUserResponse:
     """
     logger.debug(f"Comincio la chiamata /users/{user_id}")
 
-    if not connection.is_alive:
-        logger.error("Connesisone a DynamoDB non riuscita")
-        raise HTTPException(
-            status_code=502,
-            content=ErrorResponse(
-                code=502, message="Connessione a DynamoDB non riuscita"
-            ).model_dump(exclude_none=True),
-        )
+    # Un hit della cache non tocca DynamoDB, neanche per il controllo di connessione
+    cache = get_user_cache()
+    if cache is not None and not consistent:
+        payload = cache.get(user_id)
+        if payload is not None:
+            return Response(
+                content=b'{"status":"ok","detail":' + payload + b"}",
+                media_type="application/json",
+            )
+
     try:
-        user = connection.get_user(user_id=user_id)
+        user = await run_until_deadline(
+            "get_user", connection.get_user, user_id=user_id, consistent=consistent
+        )
         logger.info(f"Utente {user_id} trovato")
 
     except UserNotFound as e:
         logger.error(f"Utenta non trovato: {e}")
-        raise HTTPException(
-            status_code=404,
-            content=ErrorResponse(code=404, message="User not found").model_dump(
-                exclude_none=True
-            ),
-        )
+        raise ErrorCatalogue.USER_NOT_FOUND.exception()
     except DynamoTableDoesNotExist as e:
         logger.error(f"Tabella non trovata: {e}")
-        raise HTTPException(
-            status_code=502,
-            content=ErrorResponse(code=502, message="Tabella non trovata").model_dump(
-                exclude_none=True
-            ),
-        )
+        raise ErrorCatalogue.TABLE_NOT_FOUND.exception()
     except ClientError as e:
         logger.error(f"Errore client DynamoDB: {e}")
-        raise HTTPException(
-            status_code=500,
-            content=ErrorResponse(
-                code=500, message="Errore client DynamoDB"
-            ).model_dump(exclude_none=True),
-        )
+        raise ErrorCatalogue.DYNAMO_CLIENT_ERROR.exception()
+    except BotoCoreError as e:
+        logger.error(f"Connessione a DynamoDB non riuscita: {e}")
+        raise ErrorCatalogue.DYNAMO_UNREACHABLE.exception()
+    except DeadlineExceeded as e:
+        logger.error(f"Richiesta interrotta: {e}")
+        raise ErrorCatalogue.DEADLINE_EXCEEDED.exception()
     except Exception as e:
         logger.error(f"Errore sconosciuto: {e}")
-        raise HTTPException(
-            status_code=500,
-            content=ErrorResponse(code=500, message="Errore sconosciuto").model_dump(
-                exclude_none=True
-            ),
-        )
+        raise ErrorCatalogue.UNKNOWN_ERROR.exception()
 
     return GetUserResponse(status="ok", detail=user)
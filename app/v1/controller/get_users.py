@@ -1,14 +1,20 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Request, Response
 from ..views import GetAllUsersResponse, ErrorResponse
-from ..exceptions import HTTPException, DynamoTableDoesNotExist
-from ..model.dynamo_context_manager import DynamoConnection
-from typing import List
+from ..exceptions import ErrorCatalogue, DynamoTableDoesNotExist, DeadlineExceeded
+from ..model.dynamo_context_manager import get_connection
+from ..model.deadline import run_until_deadline
+from ..model.user_query import UserQuery
+from ..utils.consistency import consistent_read
 from ..utils.custom_logger import LogSetupper
-from botocore.exceptions import ClientError
+from ..utils.http_cache import cache_headers, is_not_modified
+from ..utils.list_query import user_list_query
+from ..utils.tracing import tracer
+from botocore.exceptions import BotoCoreError, ClientError
+import orjson
 
 router = APIRouter()
 logger = LogSetupper(__name__).setup()
-connection = DynamoConnection()
+connection = get_connection()
 
 
 @router.get(
@@ -17,12 +23,33 @@ connection = DynamoConnection()
     response_model=GetAllUsersResponse,
     summary="Esegue il retrieve di tutti gli utenti.",
     status_code=200,
-    responses={502: {"model": ErrorResponse}, 500: {"model": ErrorResponse}},
+    responses={
+        304: {"description": "La lista non è cambiata dall'ultima richiesta"},
+        400: {"model": ErrorResponse},
+        502: {"model": ErrorResponse},
+        500: {"model": ErrorResponse},
+    },
 )
-async def get_all_user() -> GetAllUsersResponse:
+async def get_all_user(
+    request: Request,
+    consistent: bool = Depends(consistent_read),
+    query: UserQuery = Depends(user_list_query),
+) -> GetAllUsersResponse:
     """Esegue il retrieve di tutti gli utenti
 
+    Se la tabella di metadati è disponibile la risposta riporta ETag e
+    Last-Modified; se il client invia un validatore ancora valido risponde 304
+    senza eseguire la scan della tabella. Con una lettura consistente anche il
+    contatore delle modifiche viene letto in modo consistente, così un client
+    che ha appena scritto non riceve un 304 obsoleto.
+
+    Args:
+        request (Request): Richiesta HTTP, usata per gli header condizionali
+        consistent (bool): True per letture fortemente consistenti
+        query (UserQuery): Filtri, ordinamento e limite della lista
+
     Raises:
+        HTTPException: 400 se un filtro o l'ordinamento non sono validi
         HTTPException: 502 se la connessione a Dynamo DB non è riuscita
         HTTPException: 502 se la tabella non esiste
         HTTPException: 500 per un errore legato al client Dynamo db
@@ -33,44 +60,48 @@ async def get_all_user() -> GetAllUsersResponse:
 
     logger.info("Comincio retrieve di tutti gli utenti")
 
-    # Check if DynamoDB is up and running
+    headers = {}
+    try:
+        try:
+            version = await run_until_deadline(
+                "get_table_version",
+                connection.get_table_version,
+                consistent=consistent,
+            )
+        except BotoCoreError as e:
+            # Il contatore è nella regione principale: se non risponde la
+            # lista arriva comunque dalle repliche, senza ETag e Last-Modified
+            logger.warning(f"Versione della tabella non disponibile: {e}")
+            version = None
+        if version is not None:
+            headers = cache_headers(*version)
+            if is_not_modified(request, headers["ETag"], version[1]):
+                logger.info("Lista utenti non modificata, rispondo 304")
+                return Response(status_code=304, headers=headers)
 
-    if not connection.is_alive:
-        logger.error("Connesisone a DynamoDB non riuscita")
-        raise HTTPException(
-            status_code=502,
-            content=ErrorResponse(
-                code=502, message="Connessione a DynamoDB non riuscita"
-            ).model_dump(exclude_none=True),
+        # Gli utenti arrivano come UserRecord già tipizzati dal codec: niente
+        # modelli pydantic intermedi, orjson serializza direttamente i record
+        users = await run_until_deadline(
+            "get_users", connection.get_users, consistent=consistent, query=query
         )
-
-    try:
-        users: List = connection.get_users()
         logger.info(f"Fetch di tutti gli utenti eseguito.")
 
     except DynamoTableDoesNotExist as e:
         logger.error(f"Tabella non trovata: {e}")
-        raise HTTPException(
-            status_code=502,
-            content=ErrorResponse(code=502, message="Tabella non trovata").model_dump(
-                exclude_none=True
-            ),
-        )
+        raise ErrorCatalogue.TABLE_NOT_FOUND.exception()
     except ClientError as e:
         logger.error(f"Errore client DynamoDB: {e}")
-        raise HTTPException(
-            status_code=500,
-            content=ErrorResponse(
-                code=500, message="Errore client DynamoDB"
-            ).model_dump(exclude_none=True),
-        )
+        raise ErrorCatalogue.DYNAMO_CLIENT_ERROR.exception()
 
+    except BotoCoreError as e:
+        logger.error(f"Connessione a DynamoDB non riuscita: {e}")
+        raise ErrorCatalogue.DYNAMO_UNREACHABLE.exception()
+    except DeadlineExceeded as e:
+        logger.error(f"Richiesta interrotta: {e}")
+        raise ErrorCatalogue.DEADLINE_EXCEEDED.exception()
     except Exception as e:
         logger.error(f"Errore sconosciuto: {e}")
-        raise HTTPException(
-            status_code=500,
-            content=ErrorResponse(
-                code=500, message=f"Errore sconosciuto: {e}"
-            ).model_dump(exclude_none=True),
-        )
-    return GetAllUsersResponse(status="ok", users=users)
+        raise ErrorCatalogue.UNKNOWN_ERROR.exception()
+    with tracer.span("users.serialize", attributes={"users.count": len(users)}):
+        content = orjson.dumps({"status": "ok", "users": users})
+    return Response(content=content, media_type="application/json", headers=headers)
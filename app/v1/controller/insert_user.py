@@ -1,17 +1,37 @@
+from functools import lru_cache
+from typing import Optional
+
 from fastapi import APIRouter
 from ..views import UserInsertedResponse, ErrorResponse
-from ..exceptions import HTTPException, DynamoTableDoesNotExist
-from ..model.dynamo_context_manager import DynamoConnection
+from ..exceptions import ErrorCatalogue, DynamoTableDoesNotExist, DeadlineExceeded
+from ..model.dynamo_context_manager import DynamoConnection, get_connection
+from ..model.deadline import run_until_deadline
 from ..model.user import User
-from botocore.exceptions import ClientError
+from ..model.write_buffer import InsertBuffer
+from botocore.exceptions import BotoCoreError, ClientError
 from ..utils.custom_logger import LogSetupper
 
 
 router = APIRouter()
-connection = DynamoConnection()
+connection = get_connection()
 logger = LogSetupper(__name__).setup()
 
 
+@lru_cache(maxsize=None)
+def get_insert_buffer() -> Optional[InsertBuffer]:
+    """Ritorna il buffer della modalità write-behind, None se disattivata.
+
+    Il buffer usa una connessione dedicata, separata da quella condivisa.
+    """
+    if not connection.settings.insertBatching:
+        return None
+    return InsertBuffer(
+        DynamoConnection(),
+        max_batch_size=connection.settings.insertBatchMaxSize,
+        max_delay=connection.settings.insertBatchMaxDelayMs / 1000,
+    )
+
+
 @router.post(
     "/users",
     tags=["Insert new user"],
@@ -40,45 +60,30 @@ async def insert_user(user: User) -> UserInsertedResponse:
     """
     logger.info("Comincio l'inserimento di un nuovo utente")
 
-    # Check if DynamoDB is up and running
-
-    if not connection.is_alive:
-        logger.error("Connesisone a DynamoDB non riuscita")
-        raise HTTPException(
-            status_code=502,
-            content=ErrorResponse(
-                code=502, message="Connessione a DynamoDB non riuscita"
-            ).model_dump(exclude_none=True),
-        )
-
     try:
-        user_id = connection.insert_user(user)
+        buffer = get_insert_buffer()
+        if buffer is not None:
+            user_id = await buffer.submit(user)
+        else:
+            user_id = await run_until_deadline(
+                "insert_user", connection.insert_user, user
+            )
         logger.info(f"Utente inserito con id {user_id}")
 
     except ClientError as e:
         logger.error(f"Errore client DynamoDB: {e}")
-        raise HTTPException(
-            status_code=500,
-            content=ErrorResponse(
-                code=500, message="Errore client DynamoDB"
-            ).model_dump(exclude_none=True),
-        )
+        raise ErrorCatalogue.DYNAMO_CLIENT_ERROR.exception()
     except DynamoTableDoesNotExist as e:
         logger.error(f"Tabella non trovata: {e}")
-        raise HTTPException(
-            status_code=502,
-            content=ErrorResponse(code=502, message="Tabella non trovata").model_dump(
-                exclude_none=True
-            ),
-        )
+        raise ErrorCatalogue.TABLE_NOT_FOUND.exception()
+    except BotoCoreError as e:
+        logger.error(f"Connessione a DynamoDB non riuscita: {e}")
+        raise ErrorCatalogue.DYNAMO_UNREACHABLE.exception()
+    except DeadlineExceeded as e:
+        logger.error(f"Richiesta interrotta: {e}")
+        raise ErrorCatalogue.DEADLINE_EXCEEDED.exception()
     except Exception as e:
         logger.error(f"Errore sconosciuto: {e}")
-        raise HTTPException(
-            status_code=500,
-            content=ErrorResponse(
-                code=500,
-                message="Errore sconosciuto",
-            ).model_dump(exclude_none=True),
-        )
+        raise ErrorCatalogue.UNKNOWN_ERROR.exception()
 
     return UserInsertedResponse(status="ok", user_id=str(user_id))
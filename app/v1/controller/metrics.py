@@ -0,0 +1,32 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from ..utils.custom_logger import LogSetupper
+from ..utils.metrics import metrics
+from ..utils.worker_state import get_worker_state
+
+router = APIRouter()
+logger = LogSetupper(__name__).setup()
+
+
+@router.get(
+    "/metrics",
+    tags=["Metrics"],
+    response_class=PlainTextResponse,
+    summary="Metriche del servizio in formato Prometheus.",
+    status_code=200,
+)
+async def get_metrics() -> PlainTextResponse:
+    """Funzione per esporre le metriche raccolte dal servizio, es. i throttling di DynamoDB.
+
+    Con ``serve.py`` i contatori sono sommati su tutti i worker e le gauge
+    riportano l'etichetta ``worker``; i valori degli altri worker hanno al
+    massimo WORKER_STATE_INTERVAL_MS di ritardo.
+
+    Returns:
+        PlainTextResponse: Metriche nel formato testuale di Prometheus
+    """
+    workers = get_worker_state()
+    content = metrics.render() if workers is None else workers.render_metrics()
+    return PlainTextResponse(
+        content, media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
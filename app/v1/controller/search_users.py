@@ -0,0 +1,79 @@
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import APIRouter, Query, Response
+from ..views import SearchUsersResponse, ErrorResponse
+from ..exceptions import ErrorCatalogue
+from ..model.dynamo_context_manager import DynamoConnection, get_connection
+from ..model.search_index import SearchIndex, SearchIndexUpdater
+from ..utils.custom_logger import LogSetupper
+from ..utils.tracing import tracer
+import orjson
+
+router = APIRouter()
+logger = LogSetupper(__name__).setup()
+connection = get_connection()
+
+
+@lru_cache(maxsize=None)
+def get_search_updater() -> Optional[SearchIndexUpdater]:
+    """Ritorna l'aggiornamento dell'indice di ricerca, None se disattivato.
+
+    L'aggiornamento usa una connessione dedicata, separata da quella condivisa.
+    """
+    settings = connection.settings
+    if not settings.searchIndexEnabled:
+        return None
+    return SearchIndexUpdater(
+        SearchIndex(),
+        DynamoConnection(),
+        segments=settings.searchScanSegments,
+        interval=settings.searchRefreshIntervalMs / 1000,
+    )
+
+
+@router.get(
+    "/users/search",
+    tags=["Search users"],
+    response_model=SearchUsersResponse,
+    summary="Cerca gli utenti per nome, cognome, email o indirizzo.",
+    status_code=200,
+    responses={
+        503: {"model": ErrorResponse},
+    },
+)
+async def search_users(
+    q: str = Query(min_length=1, max_length=200, description="Testo da cercare"),
+    limit: int = Query(default=20, ge=1, le=100),
+) -> SearchUsersResponse:
+    """Funzione per la ricerca degli utenti, pensata per il completamento automatico
+
+    Ogni parola di q deve essere l'inizio di una parola di nome, cognome,
+    email o indirizzi, senza distinzione di maiuscole e accenti. La ricerca
+    usa l'indice in memoria del processo e non interroga DynamoDB.
+
+    Args:
+        q (str): Testo da cercare, es. "ross mil"
+        limit (int): Numero massimo di risultati
+
+    Raises:
+        HTTPException: 503 se l'indice è disattivato o non ancora costruito
+
+    Returns:
+        SearchUsersResponse: Utenti trovati
+    """
+    updater = get_search_updater()
+    if updater is None or not updater.ready.is_set():
+        logger.error("Indice di ricerca non disponibile")
+        raise ErrorCatalogue.SEARCH_UNAVAILABLE.exception()
+
+    # Il testo cercato contiene dati personali: non finisce in log e tracce
+    with tracer.span("users.search") as span:
+        users = updater.index.search(q, limit)
+        if span is not None:
+            span.set_attribute("search.results", len(users))
+    logger.debug(f"Ricerca completata: {len(users)} utenti")
+    return Response(
+        content=orjson.dumps({"status": "ok", "users": users}),
+        media_type="application/json",
+    )
@@ -1,14 +1,16 @@
 from fastapi import APIRouter
 from ..views import UserUpdatedResponse, ErrorResponse
-from ..exceptions import HTTPException, UserNotFound, DynamoTableDoesNotExist
-from ..model.dynamo_context_manager import DynamoConnection
+from ..exceptions import ErrorCatalogue, UserNotFound, DynamoTableDoesNotExist, DeadlineExceeded
+from ..model.dynamo_context_manager import get_connection
+from ..model.deadline import run_until_deadline
+from ..model.shared_cache import invalidate_cached_user
 from ..model.user import User
 from ..utils.custom_logger import LogSetupper
-from botocore.exceptions import ClientError
+from botocore.exceptions import BotoCoreError, ClientError
 
 
 router = APIRouter()
-connection = DynamoConnection()
+connection = get_connection()
 logger = LogSetupper(__name__).setup()
 
 
@@ -43,54 +45,31 @@ async def update_user(user_id: int, user: User) -> UserUpdatedResponse:
     """
     logger.info(f"Cominziato l'update PUT /users/{user_id}")
 
-    # Check if DynamoDB is up and running
-
-    if not connection.is_alive:
-        logger.error("Connesisone a DynamoDB non riuscita")
-        raise HTTPException(
-            status_code=502,
-            content=ErrorResponse(
-                code=502, message="Connessione a DynamoDB non riuscita"
-            ).model_dump(exclude_none=True),
-        )
-
     try:
-        user_id = connection.update_user(user_id=user_id, user_data=user)
+        user_id = await run_until_deadline(
+            "update_user", connection.update_user, user_id=user_id, user_data=user
+        )
+        invalidate_cached_user(user_id)
         logger.info(f"Utente {user_id} aggiornato")
 
     except ClientError as e:
         logger.error(f"Errore client DynamoDB: {e}")
-        raise HTTPException(
-            status_code=500,
-            content=ErrorResponse(
-                code=500, message="Errore client DynamoDB"
-            ).model_dump(exclude_none=True),
-        )
+        raise ErrorCatalogue.DYNAMO_CLIENT_ERROR.exception()
     except DynamoTableDoesNotExist as e:
         logger.error(f"Tabella non trovata: {e}")
-        raise HTTPException(
-            status_code=502,
-            content=ErrorResponse(code=502, message="Tabella non trovata").model_dump(
-                exclude_none=True
-            ),
-        )
+        raise ErrorCatalogue.TABLE_NOT_FOUND.exception()
     except UserNotFound as e:
         logger.error(f"Utente non trovato: {e}")
-        raise HTTPException(
-            status_code=404,
-            content=ErrorResponse(code=404, message="Utente non trovato").model_dump(
-                exclude_none=True
-            ),
-        )
+        raise ErrorCatalogue.USER_NOT_FOUND.exception()
 
+    except BotoCoreError as e:
+        logger.error(f"Connessione a DynamoDB non riuscita: {e}")
+        raise ErrorCatalogue.DYNAMO_UNREACHABLE.exception()
+    except DeadlineExceeded as e:
+        logger.error(f"Richiesta interrotta: {e}")
+        raise ErrorCatalogue.DEADLINE_EXCEEDED.exception()
     except Exception as e:
         logger.error(f"Errore sconosciuto: {e}")
-        raise HTTPException(
-            status_code=500,
-            content=ErrorResponse(
-                code=500,
-                message="Errore sconosciuto",
-            ).model_dump(exclude_none=True),
-        )
+        raise ErrorCatalogue.UNKNOWN_ERROR.exception()
 
     return UserUpdatedResponse(status="ok", user_id=str(user_id))
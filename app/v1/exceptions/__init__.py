@@ -10,8 +10,12 @@ from .dynamo import (
     DynamoTableAlreadyExists,
     UserNotFound,
     EmptyTable,
+    ChangeTokenExpired,
+    DeadlineExceeded,
 )
 
+from .catalogue import ErrorCatalogue
+
 __all__ = (
     "HTTPException",
     "http_exception_handler",
@@ -19,4 +23,7 @@ __all__ = (
     "DynamoTableAlreadyExists",
     "UserNotFound",
     "EmptyTable",
+    "ChangeTokenExpired",
+    "DeadlineExceeded",
+    "ErrorCatalogue",
 )
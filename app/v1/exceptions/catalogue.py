@@ -0,0 +1,55 @@
+"""Catalogo degli errori HTTP con messaggio fisso.
+
+I body JSON vengono renderizzati una sola volta all'avvio: sollevare un errore
+del catalogo non richiede validazione pydantic né serializzazione, così anche
+durante un disservizio di DynamoDB la gestione degli errori costa pochissimo.
+"""
+
+from enum import Enum
+
+from ..views.error import ErrorResponse
+from .http import HTTPException
+
+
+class ErrorCatalogue(Enum):
+    """Errori HTTP pre-renderizzati, identificati da codice e messaggio."""
+
+    DYNAMO_UNREACHABLE = (502, "Connessione a DynamoDB non riuscita")
+    TABLE_NOT_FOUND = (502, "Tabella non trovata")
+    USER_NOT_FOUND = (404, "Utente non trovato")
+    DYNAMO_CLIENT_ERROR = (500, "Errore client DynamoDB")
+    UNKNOWN_ERROR = (500, "Errore sconosciuto")
+    INVALID_TOKEN = (400, "Token non valido")
+    TOKEN_EXPIRED = (410, "Token scaduto, eseguire una sincronizzazione completa")
+    RATE_LIMITED = (429, "Troppe richieste, riprovare più tardi")
+    OVERLOADED = (503, "Servizio sovraccarico, riprovare più tardi")
+    ADMIN_FORBIDDEN = (403, "Token di amministrazione mancante o non valido")
+    INVALID_QUERY = (400, "Filtro o ordinamento non valido")
+    SEARCH_UNAVAILABLE = (503, "Indice di ricerca non disponibile")
+    INVALID_IDEMPOTENCY_KEY = (400, "Idempotency-Key non valida")
+    IDEMPOTENCY_KEY_IN_USE = (409, "Richiesta con la stessa Idempotency-Key in corso")
+    IDEMPOTENCY_KEY_REUSED = (
+        422,
+        "Idempotency-Key già usata per una richiesta diversa",
+    )
+    DEADLINE_EXCEEDED = (504, "Tempo a disposizione della richiesta esaurito")
+
+    def __init__(self, status_code: int, message: str) -> None:
+        self.status_code = status_code
+        self.message = message
+        self.body = (
+            ErrorResponse(code=status_code, message=message)
+            .model_dump_json(exclude_none=True)
+            .encode()
+        )
+
+    def exception(self) -> HTTPException:
+        """Crea l'eccezione HTTP con il body già renderizzato.
+
+        Ogni chiamata crea una nuova eccezione (costo trascurabile): sollevare
+        più volte la stessa istanza ne farebbe crescere il traceback.
+
+        Returns:
+            HTTPException: Eccezione da sollevare nel controller.
+        """
+        return HTTPException(status_code=self.status_code, content=self.body)
@@ -27,3 +27,19 @@ class EmptyTable(Exception):
         self.table_name = table_name
         self.message = f"Tabella {table_name} vuota"
         super().__init__(self.message)
+
+
+class ChangeTokenExpired(Exception):
+    def __init__(self, token: int):
+        self.token = token
+        self.message = f"Token {token} più vecchio della retention del change feed"
+        super().__init__(self.message)
+
+
+class DeadlineExceeded(Exception):
+    def __init__(self, operation: str, disconnected: bool = False):
+        self.operation = operation
+        self.disconnected = disconnected
+        reason = "Client disconnesso" if disconnected else "Richiesta scaduta"
+        self.message = f"{reason} prima della chiamata {operation}"
+        super().__init__(self.message)
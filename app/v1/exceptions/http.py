@@ -3,7 +3,7 @@
 from typing import Any, Optional, Dict
 
 from fastapi import Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 
 
 class HTTPException(Exception):
@@ -29,7 +29,8 @@ class HTTPException(Exception):
 
         Args:
             status_code (int): HTTP error status code.
-            content (Any): Response body.
+            content (Any): Response body. Bytes are sent as an already
+                rendered JSON body.
             headers (Optional[Dict[str, Any]]): Additional response headers.
 
         """
@@ -55,7 +56,7 @@ class HTTPException(Exception):
 
 async def http_exception_handler(
     request: Request, exception: HTTPException
-) -> JSONResponse:
+) -> Response:
     """Define custom HTTPException handler.
 
     In this application custom handler is added in asgi.py while initializing
@@ -72,9 +73,17 @@ async def http_exception_handler(
 
     Returns:
         FastAPI.response.JSONResponse class object instance initialized with
-            kwargs from custom HTTPException.
+            kwargs from custom HTTPException, or a plain Response when the
+            content is already rendered (see ErrorCatalogue).
 
     """
+    if isinstance(exception.content, bytes):
+        return Response(
+            content=exception.content,
+            status_code=exception.status_code,
+            headers=exception.headers,
+            media_type="application/json",
+        )
     return JSONResponse(
         status_code=exception.status_code,
         content=exception.content,
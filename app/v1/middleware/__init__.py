@@ -0,0 +1,19 @@
+"""Application implementation - middleware ASGI."""
+
+from .capacity import CapacityMiddleware
+from .compression import CompressionMiddleware
+from .deadline import DeadlineMiddleware
+from .idempotency import IdempotencyMiddleware
+from .profiling import ProfilingMiddleware
+from .rate_limit import RateLimitMiddleware
+from .tracing import TracingMiddleware
+
+__all__ = (
+    "CapacityMiddleware",
+    "CompressionMiddleware",
+    "DeadlineMiddleware",
+    "IdempotencyMiddleware",
+    "ProfilingMiddleware",
+    "RateLimitMiddleware",
+    "TracingMiddleware",
+)
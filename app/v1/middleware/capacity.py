@@ -0,0 +1,86 @@
+"""Middleware ASGI per l'accounting della capacità DynamoDB consumata.
+
+Ogni richiesta riceve un accumulatore (``current_capacity``) alimentato dagli
+hook botocore del client; il totale viene restituito nell'header
+``X-Consumed-Capacity`` e sommato nelle metriche per route e per client.
+"""
+
+from typing import Set
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..model.instrumentation import CapacityUsage, current_capacity
+from ..utils.metrics import metrics
+from .client import client_label
+
+metrics.describe(
+    "dynamodb_route_consumed_capacity_units_total",
+    "Capacity unit consumate per route e operazione DynamoDB",
+)
+metrics.describe(
+    "dynamodb_client_consumed_capacity_units_total",
+    "Capacity unit consumate per client",
+)
+
+# Oltre questa soglia i nuovi client vengono sommati sotto "other"
+MAX_TRACKED_CLIENTS = 1000
+
+
+def route_label(scope: Scope) -> str:
+    """Ritorna metodo e template della route, es. "GET /v1/users/{user_id}"."""
+    route = scope.get("route")
+    path = getattr(route, "path", None) or "unmatched"
+    return f"{scope['method']} {path}"
+
+
+class CapacityMiddleware:
+    """Raccoglie la capacità DynamoDB consumata da ogni richiesta HTTP."""
+
+    def __init__(self, app: ASGIApp, max_clients: int = MAX_TRACKED_CLIENTS) -> None:
+        self.app = app
+        self.max_clients = max_clients
+        self.clients: Set[str] = set()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        usage = CapacityUsage()
+        token = current_capacity.set(usage)
+
+        async def send_with_capacity(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-Consumed-Capacity"] = f"{usage.total:g}"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_capacity)
+        finally:
+            current_capacity.reset(token)
+            self._record(scope, usage)
+
+    def _record(self, scope: Scope, usage: CapacityUsage) -> None:
+        if not usage.by_operation:
+            return
+        route = route_label(scope)
+        for (table, operation), units in usage.by_operation.items():
+            metrics.inc(
+                "dynamodb_route_consumed_capacity_units_total",
+                units,
+                route=route,
+                table=table,
+                operation=operation,
+            )
+
+        client = client_label(scope)
+        if client not in self.clients:
+            if len(self.clients) >= self.max_clients:
+                client = "other"
+            else:
+                self.clients.add(client)
+        metrics.inc(
+            "dynamodb_client_consumed_capacity_units_total", usage.total, client=client
+        )
@@ -0,0 +1,53 @@
+"""Identificazione del client che ha effettuato una richiesta."""
+
+import hashlib
+
+from starlette.types import Scope
+
+
+def client_ip(scope: Scope) -> str:
+    """Ritorna l'indirizzo IP del client, es. "ip:10.0.0.1".
+
+    Le API key non vengono validate: tutto ciò che deve resistere a un client
+    che ne inventa di nuove (come il rate limit) va indicizzato per IP.
+
+    Args:
+        scope (Scope): Scope ASGI della richiesta
+
+    Returns:
+        str: Chiave del client basata sull'IP
+    """
+    client = scope.get("client")
+    return f"ip:{client[0]}" if client else "ip:unknown"
+
+
+def client_key(scope: Scope) -> str:
+    """Ritorna la chiave del client: API key se presente, altrimenti l'indirizzo IP.
+
+    Args:
+        scope (Scope): Scope ASGI della richiesta
+
+    Returns:
+        str: Chiave del client, es. "key:abc" oppure "ip:10.0.0.1"
+    """
+    for name, value in scope.get("headers", []):
+        if name == b"x-api-key" and value:
+            return f"key:{value.decode('latin-1')}"
+    return client_ip(scope)
+
+
+def client_label(scope: Scope) -> str:
+    """Ritorna un'etichetta del client adatta a log e metriche.
+
+    L'API key non viene esposta: al suo posto si usa un hash abbreviato.
+
+    Args:
+        scope (Scope): Scope ASGI della richiesta
+
+    Returns:
+        str: Etichetta del client, es. "key:3f2a9c01b7de" oppure "ip:10.0.0.1"
+    """
+    key = client_key(scope)
+    if key.startswith("key:"):
+        return "key:" + hashlib.sha256(key[4:].encode()).hexdigest()[:12]
+    return key
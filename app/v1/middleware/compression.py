@@ -0,0 +1,214 @@
+"""Middleware ASGI per la compressione delle risposte HTTP.
+
+Supporta gzip (sempre disponibile) e, se installati i pacchetti opzionali
+``brotli`` e ``zstandard``, anche br e zstd. Le risposte più piccole della
+soglia configurata vengono inviate senza compressione.
+"""
+
+import zlib
+from typing import Callable, Dict, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..config.app_settings import get_settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dipendenza opzionale
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dipendenza opzionale
+    zstandard = None
+
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliEncoder:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdEncoder:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+def _available_encoders() -> Dict[str, Callable]:
+    """Ritorna gli encoder disponibili in ordine di preferenza."""
+    encoders = {}
+    if brotli is not None:
+        encoders["br"] = _BrotliEncoder
+    if zstandard is not None:
+        encoders["zstd"] = _ZstdEncoder
+    encoders["gzip"] = _GzipEncoder
+    return encoders
+
+
+def negotiate_encoding(accept_encoding: str, available: List[str]) -> Optional[str]:
+    """Sceglie la codifica da usare a partire dall'header Accept-Encoding.
+
+    Args:
+        accept_encoding (str): Valore dell'header Accept-Encoding della richiesta.
+        available (List[str]): Codifiche supportate, in ordine di preferenza.
+
+    Returns:
+        Optional[str]: La codifica scelta, None se nessuna è accettata dal client.
+    """
+    accepted = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    for encoding in available:
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    """Comprime il body delle risposte secondo la codifica negoziata con il client.
+
+    Soglia e livello di compressione, se non indicati, vengono letti dalla
+    configurazione quando lo stack dei middleware viene costruito all'avvio.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: Optional[int] = None,
+        level: Optional[int] = None,
+    ) -> None:
+        self.app = app
+        if minimum_size is None:
+            minimum_size = get_settings().compressionMinimumSize
+        if level is None:
+            level = get_settings().compressionLevel
+        self.minimum_size = minimum_size
+        self.level = level
+        self.encoders = _available_encoders()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        encoding = negotiate_encoding(
+            headers.get("accept-encoding", ""), list(self.encoders)
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(
+            self.app, encoding, self.encoders[encoding], self.level, self.minimum_size
+        )
+        await responder(scope, receive, send)
+
+
+class _CompressionResponder:
+    def __init__(
+        self,
+        app: ASGIApp,
+        encoding: str,
+        encoder_factory: Callable,
+        level: int,
+        minimum_size: int,
+    ) -> None:
+        self.app = app
+        self.encoding = encoding
+        self.encoder_factory = encoder_factory
+        self.encoder = None
+        self.level = level
+        self.minimum_size = minimum_size
+        self.send: Send = None
+        self.initial_message: Message = {}
+        self.started = False
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_with_compression)
+
+    async def send_with_compression(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # Rimando l'invio degli header finché non conosco la dimensione del body
+            self.initial_message = message
+            return
+
+        if message_type != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            if "content-encoding" in headers or (
+                len(body) < self.minimum_size and not more_body
+            ):
+                self.passthrough = True
+                await self.send(self.initial_message)
+                await self.send(message)
+                return
+
+            # L'encoder viene creato solo se la risposta va effettivamente compressa
+            self.encoder = self.encoder_factory(self.level)
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+                message["body"] = self.encoder.compress(body)
+            else:
+                message["body"] = self.encoder.compress(body) + self.encoder.flush()
+                headers["Content-Length"] = str(len(message["body"]))
+            await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        message["body"] = self.encoder.compress(body)
+        if not more_body:
+            message["body"] += self.encoder.flush()
+        await self.send(message)
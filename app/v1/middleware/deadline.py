@@ -0,0 +1,126 @@
+"""Middleware ASGI che assegna a ogni richiesta una scadenza.
+
+La scadenza arriva dall'header ``X-Request-Timeout`` (secondi) del client o
+dai default del server, globale e per rotta; vale la più breve. Le chiamate
+DynamoDB successive alla scadenza, o alla disconnessione del client, non
+vengono eseguite e la richiesta termina con 504.
+"""
+
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..config.app_settings import get_settings
+from ..exceptions import DeadlineExceeded, ErrorCatalogue
+from ..model.deadline import Deadline, current_deadline, parse_route_timeouts
+from ..utils.custom_logger import LogSetupper
+
+logger = LogSetupper(__name__).setup()
+
+
+def _header_timeout(scope: Scope) -> Optional[float]:
+    for name, value in scope.get("headers", []):
+        if name == b"x-request-timeout":
+            try:
+                timeout = float(value)
+            except ValueError:
+                return None
+            # Valori non validi vengono ignorati: l'header è solo un suggerimento
+            return timeout if 0 < timeout < float("inf") else None
+    return None
+
+
+class DeadlineMiddleware:
+    """Imposta la scadenza della richiesta e segue la disconnessione del client."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        default_timeout: Optional[float] = None,
+        route_timeouts: Optional[Dict[Tuple[str, str], float]] = None,
+    ) -> None:
+        settings = get_settings()
+        self.app = app
+        self.default_timeout = (
+            settings.requestTimeoutS if default_timeout is None else default_timeout
+        )
+        self.route_timeouts = (
+            parse_route_timeouts(settings.requestTimeoutRoutes)
+            if route_timeouts is None
+            else route_timeouts
+        )
+
+    def timeout_for(self, scope: Scope) -> Optional[float]:
+        """Ritorna i secondi a disposizione della richiesta, None se illimitati."""
+        server = self.route_timeouts.get(
+            (scope["method"], scope["path"].rstrip("/")), self.default_timeout
+        )
+        candidates = [t for t in (server, _header_timeout(scope)) if t]
+        return min(candidates) if candidates else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        deadline = Deadline(self.timeout_for(scope))
+        token = current_deadline.set(deadline)
+        watcher = _DisconnectWatcher(receive, deadline)
+        started = False
+
+        async def send_tracking(message: Message) -> None:
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, watcher.receive, send_tracking)
+        except DeadlineExceeded as e:
+            if started:
+                raise
+            logger.warning(f"{scope['method']} {scope['path']}: {e}")
+            await _reject(send, ErrorCatalogue.DEADLINE_EXCEEDED)
+        finally:
+            watcher.close()
+            current_deadline.reset(token)
+
+
+class _DisconnectWatcher:
+    """Legge i messaggi del client in un task dedicato.
+
+    Così la disconnessione viene notata anche mentre l'applicazione non sta
+    leggendo il body, e la richiesta viene segnata come abbandonata.
+    """
+
+    def __init__(self, receive: Receive, deadline: Deadline) -> None:
+        self._receive = receive
+        self._deadline = deadline
+        self._queue: "asyncio.Queue[Message]" = asyncio.Queue()
+        self._task = asyncio.ensure_future(self._pump())
+
+    async def _pump(self) -> None:
+        while True:
+            message = await self._receive()
+            await self._queue.put(message)
+            if message["type"] == "http.disconnect":
+                self._deadline.cancel()
+                return
+
+    async def receive(self) -> Message:
+        return await self._queue.get()
+
+    def close(self) -> None:
+        self._task.cancel()
+
+
+async def _reject(send: Send, error: ErrorCatalogue) -> None:
+    headers: List[Tuple[bytes, bytes]] = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(error.body)).encode()),
+    ]
+    await send(
+        {"type": "http.response.start", "status": error.status_code, "headers": headers}
+    )
+    await send({"type": "http.response.body", "body": error.body})
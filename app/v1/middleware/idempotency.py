@@ -0,0 +1,285 @@
+"""Middleware ASGI per le richieste con header ``Idempotency-Key``.
+
+La prima risposta a una chiave viene salvata nella tabella di metadati, con
+scadenza tramite TTL, e in una cache locale; i tentativi successivi con la
+stessa chiave ricevono la risposta salvata senza che la richiesta venga
+eseguita di nuovo. Così un client che ripete un POST /v1/users dopo un
+timeout non crea un secondo utente.
+"""
+
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..config.app_settings import get_settings
+from ..exceptions import DynamoTableDoesNotExist, ErrorCatalogue
+from ..model.deadline import max_request_timeout, without_deadline
+from ..model.dynamo_context_manager import get_connection
+from ..utils.custom_logger import LogSetupper
+from ..utils.metrics import metrics
+from .client import client_key
+
+logger = LogSetupper(__name__).setup()
+
+metrics.describe(
+    "idempotent_requests_total",
+    "Richieste con Idempotency-Key per esito (stored, replayed, in_use, reused, skipped)",
+)
+
+IDEMPOTENT_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+MAX_KEY_LENGTH = 255
+# Durata della prenotazione di una chiave mentre la richiesta è in esecuzione,
+# se il server non impone scadenze alle richieste
+IN_PROGRESS_SECONDS = 60
+# Oltre la scadenza della richiesta: salvataggio della risposta nella tabella
+IN_PROGRESS_MARGIN_SECONDS = 10
+# Risposte più grandi non vengono salvate (limite di 400 KB per item DynamoDB)
+MAX_STORED_BODY = 256 * 1024
+
+
+class IdempotencyMiddleware:
+    """Salva e riproduce le risposte delle richieste con Idempotency-Key.
+
+    La chiave vale per client (API key o IP): client diversi possono usare le
+    stesse chiavi. Riusare una chiave con metodo, path o body diversi ritorna
+    422; un tentativo che arriva mentre il primo è ancora in esecuzione
+    ritorna 409. Le risposte 5xx non vengono salvate, così il client può
+    riprovare.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        ttl_hours: Optional[int] = None,
+        cache_size: Optional[int] = None,
+    ) -> None:
+        settings = get_settings()
+        self.app = app
+        self.ttl = (
+            settings.idempotencyTtlHours if ttl_hours is None else ttl_hours
+        ) * 3600
+        self.cache_size = (
+            settings.idempotencyCacheSize if cache_size is None else cache_size
+        )
+        # La prenotazione deve durare quanto la richiesta più lunga ammessa:
+        # se scadesse prima, un tentativo verrebbe eseguito una seconda volta
+        timeout = max_request_timeout(settings)
+        self.claim_seconds = (
+            IN_PROGRESS_SECONDS
+            if timeout is None
+            else math.ceil(timeout) + IN_PROGRESS_MARGIN_SECONDS
+        )
+        self.cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self.connection = get_connection()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in IDEMPOTENT_METHODS:
+            await self.app(scope, receive, send)
+            return
+        raw_key = _header(scope, b"idempotency-key")
+        if raw_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not 0 < len(raw_key) <= MAX_KEY_LENGTH:
+            await _reject(send, ErrorCatalogue.INVALID_IDEMPOTENCY_KEY)
+            return
+
+        body = await _read_body(receive)
+        # Chiave e impronta vengono salvate come hash: niente API key in chiaro
+        key = hashlib.sha256(
+            f"{client_key(scope)}\n{raw_key.decode('latin-1')}".encode()
+        ).hexdigest()
+        fingerprint = hashlib.sha256(
+            b"\n".join(
+                (
+                    scope["method"].encode(),
+                    scope["path"].encode(),
+                    scope["query_string"],
+                    body,
+                )
+            )
+        ).hexdigest()
+        replay_receive = _replay(body, receive)
+
+        record = self._cached(key)
+        if record is None:
+            try:
+                record = await run_in_threadpool(
+                    self.connection.claim_idempotency_key,
+                    key,
+                    fingerprint,
+                    self.claim_seconds,
+                )
+            except DynamoTableDoesNotExist:
+                logger.warning(
+                    "Tabella di metadati non trovata, Idempotency-Key ignorata"
+                )
+                metrics.inc("idempotent_requests_total", outcome="skipped")
+                await self.app(scope, replay_receive, send)
+                return
+
+        if record is not None:
+            if record["fingerprint"] != fingerprint:
+                metrics.inc("idempotent_requests_total", outcome="reused")
+                await _reject(send, ErrorCatalogue.IDEMPOTENCY_KEY_REUSED)
+                return
+            if record["state"] != "completed":
+                metrics.inc("idempotent_requests_total", outcome="in_use")
+                await _reject(
+                    send, ErrorCatalogue.IDEMPOTENCY_KEY_IN_USE, retry_after=1
+                )
+                return
+            self._remember(key, record)
+            metrics.inc("idempotent_requests_total", outcome="replayed")
+            await _send_record(send, record)
+            return
+
+        await self._execute(scope, replay_receive, send, key, fingerprint)
+
+    async def _execute(
+        self, scope: Scope, receive: Receive, send: Send, key: str, fingerprint: str
+    ) -> None:
+        """Esegue la richiesta e ne salva la risposta prima di inviarla.
+
+        La risposta viene trattenuta finché non è salvata: un tentativo che
+        arriva subito dopo la trova già completa invece che in corso. Salvataggio
+        e rilascio della chiave ignorano la scadenza della richiesta.
+        """
+        messages: List[Message] = []
+
+        async def capture(message: Message) -> None:
+            messages.append(message)
+
+        try:
+            await self.app(scope, receive, capture)
+        except Exception:
+            await run_in_threadpool(
+                without_deadline, self.connection.release_idempotency_key, key
+            )
+            raise
+
+        start = next(m for m in messages if m["type"] == "http.response.start")
+        body = b"".join(
+            m.get("body", b"") for m in messages if m["type"] == "http.response.body"
+        )
+        status = start["status"]
+        if status < 500 and len(body) <= MAX_STORED_BODY:
+            record = {
+                "state": "completed",
+                "fingerprint": fingerprint,
+                "status": status,
+                "headers": [
+                    [name.decode("latin-1"), value.decode("latin-1")]
+                    for name, value in start.get("headers", [])
+                ],
+                "body": body,
+                "expires_at": int(time.time()) + self.ttl,
+            }
+            # Senza scadenza: se il client se ne è andato la richiesta è stata
+            # comunque eseguita, e il suo esito va salvato per i tentativi
+            await run_in_threadpool(
+                without_deadline,
+                self.connection.save_idempotent_response,
+                key,
+                fingerprint,
+                status,
+                record["headers"],
+                body,
+                self.ttl,
+            )
+            self._remember(key, record)
+            metrics.inc("idempotent_requests_total", outcome="stored")
+        else:
+            await run_in_threadpool(
+                without_deadline, self.connection.release_idempotency_key, key
+            )
+        for message in messages:
+            await send(message)
+
+    def _cached(self, key: str) -> Optional[Dict]:
+        record = self.cache.get(key)
+        if record is None:
+            return None
+        if record["expires_at"] < time.time():
+            del self.cache[key]
+            return None
+        self.cache.move_to_end(key)
+        return record
+
+    def _remember(self, key: str, record: Dict) -> None:
+        if not self.cache_size:
+            return
+        self.cache[key] = record
+        self.cache.move_to_end(key)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+
+def _header(scope: Scope, name: bytes) -> Optional[bytes]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.strip()
+    return None
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def _replay(body: bytes, receive: Receive) -> Receive:
+    """Ritorna un receive che consegna il body già letto e poi delega all'originale."""
+    sent = False
+
+    async def replay() -> Message:
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
+
+
+async def _send_record(send: Send, record: Dict) -> None:
+    body = bytes(getattr(record["body"], "value", record["body"]))
+    headers: List[Tuple[bytes, bytes]] = [
+        (name.encode("latin-1"), value.encode("latin-1"))
+        for name, value in record["headers"]
+    ]
+    headers.append((b"idempotent-replayed", b"true"))
+    await send(
+        {
+            "type": "http.response.start",
+            "status": int(record["status"]),
+            "headers": headers,
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _reject(
+    send: Send, error: ErrorCatalogue, retry_after: Optional[int] = None
+) -> None:
+    headers: List[Tuple[bytes, bytes]] = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(error.body)).encode()),
+    ]
+    if retry_after is not None:
+        headers.append((b"retry-after", str(retry_after).encode()))
+    await send(
+        {"type": "http.response.start", "status": error.status_code, "headers": headers}
+    )
+    await send({"type": "http.response.body", "body": error.body})
@@ -0,0 +1,34 @@
+"""Middleware ASGI che marca le richieste da campionare con il profiler."""
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ..utils.profiling import current_sampled_scope, profiler
+
+
+class ProfilingMiddleware:
+    """Sceglie le richieste da campionare e tiene acceso il sampler mentre sono in corso.
+
+    Il frame di ``__call__`` fa da marcatore: il sampler conta solo gli stack
+    che lo contengono con la variabile locale ``sampled`` a True.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        sampled = scope["type"] == "http" and profiler.should_sample(scope["path"])
+        if not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        sampler = profiler.sampler
+        sampler.request_started()
+        token = current_sampled_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_sampled_scope.reset(token)
+            sampler.request_finished()
+
+
+profiler.bind(ProfilingMiddleware.__call__.__code__)
@@ -0,0 +1,156 @@
+"""Middleware ASGI di rate limiting per client e di controllo di ammissione.
+
+Ogni indirizzo IP ha un token bucket; ogni richiesta consuma un
+numero di token che dipende dalla rotta, così la scan completa di GET
+/v1/users costa più di una lettura puntuale. Il controllo di ammissione limita
+il costo complessivo delle richieste in corso nel processo e scarta il carico
+in eccesso con 503 prima che sia DynamoDB a rifiutarlo.
+"""
+
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from ..config.app_settings import get_settings
+from ..exceptions import ErrorCatalogue
+from .client import client_ip
+
+
+def parse_route_costs(value: str) -> Dict[Tuple[str, str], int]:
+    """Esegue il parsing dei costi per rotta, es. "GET /v1/users=10,POST /v1/users=2".
+
+    Args:
+        value (str): Costi separati da virgola nel formato "METODO path=costo"
+
+    Returns:
+        Dict[Tuple[str, str], int]: Costo per coppia (metodo, path)
+    """
+    costs = {}
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        route, _, cost = entry.rpartition("=")
+        method, _, path = route.strip().partition(" ")
+        costs[(method.upper(), path.strip())] = int(cost)
+    return costs
+
+
+class TokenBucket:
+    """Token bucket con ricarica continua."""
+
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self, capacity: float, now: float) -> None:
+        self.tokens = capacity
+        self.updated_at = now
+
+    def take(self, cost: float, rate: float, capacity: float, now: float) -> float:
+        """Consuma cost token se disponibili.
+
+        Returns:
+            float: 0 se la richiesta è ammessa, altrimenti i secondi da attendere
+        """
+        self.tokens = min(capacity, self.tokens + (now - self.updated_at) * rate)
+        self.updated_at = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / rate
+
+
+class RateLimitMiddleware:
+    """Applica il rate limit per client e il controllo di ammissione globale."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        max_inflight_cost: Optional[int] = None,
+        route_costs: Optional[Dict[Tuple[str, str], int]] = None,
+        exempt_paths: Tuple[str, ...] = ("/v1/ready", "/v1/metrics"),
+        max_clients: int = 10000,
+    ) -> None:
+        settings = get_settings()
+        self.app = app
+        self.rate = settings.rateLimitRate if rate is None else rate
+        self.burst = settings.rateLimitBurst if burst is None else burst
+        self.max_inflight_cost = (
+            settings.maxInflightCost if max_inflight_cost is None else max_inflight_cost
+        )
+        self.route_costs = (
+            parse_route_costs(settings.rateLimitRouteCosts)
+            if route_costs is None
+            else route_costs
+        )
+        if self.rate > 0:
+            # Una rotta che costa più del burst non verrebbe mai ammessa
+            too_expensive = [
+                f"{method} {path}={cost}"
+                for (method, path), cost in self.route_costs.items()
+                if cost > self.burst
+            ]
+            if too_expensive:
+                raise EnvironmentError(
+                    "RATE_LIMIT_ROUTE_COSTS supera RATE_LIMIT_BURST per: "
+                    + ", ".join(too_expensive)
+                )
+        self.exempt_paths = exempt_paths
+        self.max_clients = max_clients
+        self.buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self.inflight_cost = 0
+
+    def route_cost(self, scope: Scope) -> int:
+        return self.route_costs.get((scope["method"], scope["path"].rstrip("/")), 1)
+
+    def _bucket(self, key: str, now: float) -> TokenBucket:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(self.burst, now)
+            # Numero di client tracciati limitato: scarto i meno recenti
+            if len(self.buckets) > self.max_clients:
+                self.buckets.popitem(last=False)
+        else:
+            self.buckets.move_to_end(key)
+        return bucket
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        cost = self.route_cost(scope)
+        if self.rate > 0:
+            now = time.monotonic()
+            wait = self._bucket(client_ip(scope), now).take(
+                cost, self.rate, self.burst, now
+            )
+            if wait > 0:
+                await _reject(send, ErrorCatalogue.RATE_LIMITED, math.ceil(wait))
+                return
+
+        if self.max_inflight_cost > 0:
+            if self.inflight_cost + cost > self.max_inflight_cost:
+                await _reject(send, ErrorCatalogue.OVERLOADED, 1)
+                return
+            self.inflight_cost += cost
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                self.inflight_cost -= cost
+            return
+
+        await self.app(scope, receive, send)
+
+
+async def _reject(send: Send, error: ErrorCatalogue, retry_after: int) -> None:
+    headers: List[Tuple[bytes, bytes]] = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(error.body)).encode()),
+        (b"retry-after", str(retry_after).encode()),
+    ]
+    await send(
+        {"type": "http.response.start", "status": error.status_code, "headers": headers}
+    )
+    await send({"type": "http.response.body", "body": error.body})
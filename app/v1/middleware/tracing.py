@@ -0,0 +1,61 @@
+"""Middleware ASGI che apre uno span server per ogni richiesta HTTP.
+
+Lo span prosegue il contesto W3C ``traceparent`` del chiamante e diventa lo
+span corrente: le chiamate DynamoDB e gli span interni ne diventano figli.
+L'header ``traceresponse`` della risposta riporta trace e span id.
+"""
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..utils.tracing import SPAN_KIND_SERVER, tracer
+from .capacity import route_label
+from .client import client_label
+
+
+class TracingMiddleware:
+    """Traccia ogni richiesta HTTP con uno span di tipo server."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        span = tracer.start_span(
+            scope["method"],
+            SPAN_KIND_SERVER,
+            {
+                "http.request.method": scope["method"],
+                "url.path": scope["path"],
+                "url.scheme": scope.get("scheme", "http"),
+                "client.id": client_label(scope),
+            },
+            traceparent=headers.get("traceparent"),
+        )
+
+        async def send_with_trace(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                span.set_attribute("http.response.status_code", status)
+                if status >= 500:
+                    span.set_error(str(status))
+                MutableHeaders(scope=message)["traceresponse"] = span.traceparent
+            await send(message)
+
+        token = tracer.activate(span)
+        try:
+            await self.app(scope, receive, send_with_trace)
+        except BaseException as e:
+            span.set_error(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            tracer.deactivate(token)
+            # Il template della route è noto solo dopo il routing
+            span.name = route_label(scope)
+            if scope.get("route") is not None:
+                span.set_attribute("http.route", scope["route"].path)
+            tracer.end_span(span)
@@ -0,0 +1,66 @@
+"""Codifica e decodifica degli item utente nel formato attribute-value di DynamoDB.
+
+Il livello resource di boto3 passa ogni attributo dal TypeDeserializer e
+trasforma ogni numero in ``Decimal``, che pydantic deve poi riconvertire in
+``int``. Lo schema degli utenti è fisso (id numerico e campi stringa), quindi
+qui la conversione è scritta a mano e produce direttamente dict con tipi
+Python nativi, oppure ``UserRecord`` compatti per la lista utenti.
+"""
+
+from typing import Dict, Optional
+
+from .user import UserData, UserRecord
+
+USER_FIELDS = tuple(UserData.model_fields)
+# Attributi letti dalle scan e dalle get: i soli necessari alla risposta
+USER_PROJECTION = ", ".join(("user_id",) + USER_FIELDS)
+
+
+def decode_user(item: Dict) -> Dict:
+    """Converte un item nel formato attribute-value in un dict utente.
+
+    Gli attributi di servizio (change feed, cancellazione soft) vengono ignorati.
+
+    Args:
+        item (Dict): Item come ritornato dal client low-level
+
+    Returns:
+        Dict: Utente con ``user_id`` intero e campi stringa
+    """
+    user = {name: item[name]["S"] for name in USER_FIELDS}
+    user["user_id"] = int(item["user_id"]["N"])
+    return user
+
+
+def decode_user_record(item: Dict) -> UserRecord:
+    """Converte un item nel formato attribute-value in un ``UserRecord``.
+
+    Args:
+        item (Dict): Item come ritornato dal client low-level
+
+    Returns:
+        UserRecord: Utente compatto, senza dict intermedi
+    """
+    return UserRecord(
+        item["nome"]["S"],
+        item["cognome"]["S"],
+        item["cf"]["S"],
+        item["p_iva"]["S"],
+        item["email"]["S"],
+        item["n_telefono"]["S"],
+        item["indirizzo_residenza"]["S"],
+        item["indirizzo_fatturazione"]["S"],
+        int(item["user_id"]["N"]),
+    )
+
+
+def encode_key(user_id: int) -> Dict:
+    """Chiave primaria di un utente nel formato attribute-value."""
+    return {"user_id": {"N": str(user_id)}}
+
+
+def decode_key(key: Optional[Dict]) -> Optional[Dict]:
+    """Converte una LastEvaluatedKey in un dict serializzabile in JSON."""
+    if not key:
+        return None
+    return {"user_id": int(key["user_id"]["N"])}
@@ -0,0 +1,215 @@
+"""Scadenza delle richieste HTTP, applicata alle chiamate DynamoDB.
+
+Il DeadlineMiddleware imposta per ogni richiesta una ``Deadline`` nel
+contesto; gli hook botocore registrati da ``enforce_deadlines`` la
+controllano prima di ogni chiamata e prima di ogni nuovo tentativo, così una
+richiesta scaduta o abbandonata dal client non consuma altra capacità.
+
+I controller eseguono le chiamate DynamoDB nel threadpool con
+``run_until_deadline``: la risposta parte alla scadenza o alla disconnessione
+anche se una chiamata è ancora in corso. Quella chiamata non può essere
+interrotta e occupa il suo thread fino alla risposta o al timeout del socket,
+limitato dalla scadenza più lunga configurata (vedi ``client_config``);
+nessun tentativo successivo viene eseguito.
+"""
+
+import asyncio
+import time
+from contextvars import ContextVar, copy_context
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from starlette.concurrency import run_in_threadpool
+
+from ..config.app_settings import AppSettings
+from ..exceptions import DeadlineExceeded
+from ..utils.metrics import metrics
+from ..utils.profiling import run_marked
+from .instrumentation import THROTTLING_ERROR_CODES
+
+T = TypeVar("T")
+
+metrics.describe(
+    "dynamodb_calls_abandoned_total",
+    "Chiamate o tentativi DynamoDB non eseguiti per richiesta scaduta o client disconnesso",
+)
+
+
+def parse_route_timeouts(value: str) -> Dict[Tuple[str, str], float]:
+    """Esegue il parsing dei timeout per rotta, es. "GET /v1/users=30,POST /v1/users=5".
+
+    Args:
+        value (str): Timeout in secondi separati da virgola nel formato "METODO path=secondi"
+
+    Returns:
+        Dict[Tuple[str, str], float]: Timeout per coppia (metodo, path)
+    """
+    timeouts = {}
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        route, _, seconds = entry.rpartition("=")
+        method, _, path = route.strip().partition(" ")
+        timeouts[(method.upper(), path.strip())] = float(seconds)
+    return timeouts
+
+
+def max_request_timeout(settings: AppSettings) -> Optional[float]:
+    """Scadenza più lunga tra REQUEST_TIMEOUT_S e REQUEST_TIMEOUT_ROUTES.
+
+    Returns:
+        Optional[float]: Secondi, None se il server non impone scadenze
+    """
+    timeouts = [settings.requestTimeoutS]
+    timeouts += parse_route_timeouts(settings.requestTimeoutRoutes).values()
+    return max(timeouts) or None
+
+
+class Deadline:
+    """Istante entro cui la richiesta deve terminare, e se il client l'ha abbandonata.
+
+    Args:
+        timeout (Optional[float]): Secondi a disposizione, None per nessuna scadenza
+    """
+
+    __slots__ = ("expires_at", "cancelled", "_disconnected")
+
+    def __init__(self, timeout: Optional[float] = None) -> None:
+        self.expires_at = None if timeout is None else time.monotonic() + timeout
+        self.cancelled = False
+        self._disconnected: Optional[asyncio.Event] = None
+
+    def remaining(self) -> Optional[float]:
+        """Secondi rimasti, None se la richiesta non ha una scadenza."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.cancelled or (
+            self.expires_at is not None and time.monotonic() >= self.expires_at
+        )
+
+    def cancel(self) -> None:
+        """Segna la richiesta come abbandonata dal client."""
+        self.cancelled = True
+        if self._disconnected is not None:
+            self._disconnected.set()
+
+    async def wait_cancelled(self) -> None:
+        """Attende che il client abbandoni la richiesta. Solo dall'event loop."""
+        if self._disconnected is None:
+            self._disconnected = asyncio.Event()
+        if not self.cancelled:
+            await self._disconnected.wait()
+
+
+# Scadenza della richiesta in corso; i thread del threadpool ricevono una
+# copia del contesto, quindi vedono lo stesso oggetto
+current_deadline: ContextVar[Optional[Deadline]] = ContextVar(
+    "current_deadline", default=None
+)
+
+
+def check_deadline(operation: str) -> None:
+    """Solleva DeadlineExceeded se la richiesta in corso è scaduta o abbandonata.
+
+    Args:
+        operation (str): Operazione che stava per essere eseguita, per log e metriche
+
+    Raises:
+        DeadlineExceeded: Se la richiesta è scaduta o il client si è disconnesso
+    """
+    deadline = current_deadline.get()
+    if deadline is None or not deadline.expired:
+        return
+    reason = "disconnected" if deadline.cancelled else "deadline"
+    metrics.inc("dynamodb_calls_abandoned_total", operation=operation, reason=reason)
+    raise DeadlineExceeded(operation, deadline.cancelled)
+
+
+async def run_until_deadline(
+    operation: str, fn: Callable[..., T], *args, **kwargs
+) -> T:
+    """Esegue fn nel threadpool e la attende al più fino alla scadenza della richiesta.
+
+    Le chiamate boto3 sono bloccanti: eseguite sull'event loop impedirebbero
+    di notare la disconnessione del client e di rispondere alla scadenza.
+
+    Args:
+        operation (str): Operazione eseguita, per log e metriche
+        fn (Callable[..., T]): Funzione bloccante da eseguire
+
+    Raises:
+        DeadlineExceeded: Se la richiesta scade o il client si disconnette
+            prima che fn termini
+
+    Returns:
+        T: Il risultato di fn
+    """
+    deadline = current_deadline.get()
+    if deadline is None:
+        return await run_in_threadpool(run_marked, fn, *args, **kwargs)
+    check_deadline(operation)
+
+    work = asyncio.ensure_future(run_in_threadpool(run_marked, fn, *args, **kwargs))
+    disconnected = asyncio.ensure_future(deadline.wait_cancelled())
+    try:
+        await asyncio.wait(
+            (work, disconnected),
+            timeout=deadline.remaining(),
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+    finally:
+        disconnected.cancel()
+    if work.done():
+        return work.result()
+
+    # Il thread termina da solo: al prossimo hook botocore trova la richiesta
+    # scaduta, e l'eventuale errore non va segnalato come mai letto
+    work.add_done_callback(lambda task: task.cancelled() or task.exception())
+    raise DeadlineExceeded(operation, deadline.cancelled)
+
+
+def without_deadline(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Esegue fn ignorando la scadenza della richiesta in corso.
+
+    Per le scritture di servizio che devono avvenire anche se il client ha
+    rinunciato, es. il salvataggio della risposta di una Idempotency-Key.
+    """
+    context = copy_context()
+    context.run(current_deadline.set, None)
+    return context.run(fn, *args, **kwargs)
+
+
+def _on_before_call(model: Any = None, **kwargs) -> None:
+    check_deadline(getattr(model, "name", ""))
+
+
+def _on_needs_retry(
+    response: Any = None,
+    caught_exception: Optional[Exception] = None,
+    operation: Any = None,
+    **kwargs,
+) -> None:
+    """Interrompe i tentativi di una chiamata fallita se la richiesta è scaduta.
+
+    Viene eseguito prima dell'handler di retry di botocore: se non solleva,
+    la decisione resta a botocore.
+    """
+    if caught_exception is None:
+        if response is None:
+            return
+        http_response, parsed = response
+        code = parsed.get("Error", {}).get("Code")
+        if http_response.status_code < 500 and code not in THROTTLING_ERROR_CODES:
+            return
+    check_deadline(getattr(operation, "name", ""))
+
+
+def enforce_deadlines(client) -> None:
+    """Registra sul client gli hook che applicano la scadenza della richiesta.
+
+    Args:
+        client (botocore.client.BaseClient): Client DynamoDB
+    """
+    client.meta.events.register("before-call.dynamodb", _on_before_call)
+    client.meta.events.register_first("needs-retry.dynamodb", _on_needs_retry)
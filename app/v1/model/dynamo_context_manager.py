@@ -1,42 +1,270 @@
-from ..config.db_credentials import DynamoCredentials
-from ..exceptions import DynamoTableDoesNotExist, DynamoTableAlreadyExists, UserNotFound
-import boto3
-from typing import List, Dict, Tuple
-from ..model.user import User
+from ..config.db_credentials import DynamoCredentials, get_credentials
+from ..config.app_settings import AppSettings, get_settings
+from ..exceptions import (
+    DynamoTableDoesNotExist,
+    DynamoTableAlreadyExists,
+    UserNotFound,
+    ChangeTokenExpired,
+)
+from botocore.exceptions import BotoCoreError, ClientError
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from functools import cached_property, lru_cache, partial
+from typing import TYPE_CHECKING, Callable, Iterator, List, Dict, Optional, Set, Tuple
+from array import array
+from ..model.user import User, UserRecord
+from .user_query import UserFilter, UserQuery
+from .codec import (
+    USER_PROJECTION,
+    decode_key,
+    decode_user,
+    decode_user_record,
+    encode_key,
+)
+from .deadline import enforce_deadlines, max_request_timeout, without_deadline
+from .hedging import Hedger
+from .instrumentation import instrument_client
+from .replicas import (
+    Endpoint,
+    Replica,
+    ReplicaRouter,
+    parse_endpoints,
+    replica_credentials,
+)
+from .user_stats import (
+    STATS_KEY,
+    code_delta,
+    combine,
+    shard_key,
+    stats_code,
+    stats_counters,
+    stats_delta,
+    stats_update,
+)
 from ..utils.custom_logger import LogSetupper
+import heapq
 import os
+import random
+import time
+
+if TYPE_CHECKING:
+    from boto3.resources.base import ServiceResource
 
 logger = LogSetupper(__name__).setup()
 
+# Chiave dell'item della tabella di metadati che contiene il contatore delle modifiche
+TABLE_VERSION_KEY = "users#version"
+# Chiave dell'item della tabella di metadati con l'ultimo id utente assegnato
+ID_SEQUENCE_KEY = "users#id_seq"
+
+# Indice secondario sparso usato dal change feed (feed + updated_at)
+CHANGES_INDEX_NAME = "changes-index"
+USERS_FEED = "users"
+TOMBSTONES_FEED = "tombstones"
+# Le modifiche più recenti di questo ritardo non vengono ancora lette dal
+# change feed: il GSI è eventualmente consistente e i writer usano ciascuno
+# il proprio orologio, quindi una modifica può comparire dopo altre successive
+FEED_SAFETY_LAG_US = 2_000_000
+
+# Prefisso degli item della tabella di metadati con le risposte idempotenti
+IDEMPOTENCY_PREFIX = "idem#"
+
+# Condizione che esclude dalle letture gli utenti cancellati in modalità soft
+NOT_DELETED = "attribute_not_exists(deleted_at)"
+# Richieste UpdateItem in parallelo durante una cancellazione massiva soft
+BULK_DELETE_WORKERS = 16
+# Utenti per transazione nella cancellazione massiva: TransactWriteItems
+# accetta 100 elementi, due per utente (cancellazione e tombstone)
+TRANSACTION_MAX_USERS = 50
+# Condizione delle scritture su un utente che deve esistere e non essere cancellato
+USER_EXISTS = f"attribute_exists(user_id) AND {NOT_DELETED}"
+# Attributi che determinano il contributo di un utente alle statistiche
+STATS_PROJECTION = "p_iva, indirizzo_residenza, deleted_at"
+# Modifiche lette per pagina dal change feed durante la riconciliazione
+RECONCILE_FEED_PAGE_SIZE = 1000
+# Timeout dei socket (s) se né il server né le variabili d'ambiente ne fissano uno
+DEFAULT_SOCKET_TIMEOUT_S = 60
+
+
+def now_micros() -> int:
+    """Ritorna il timestamp corrente in microsecondi, usato come token del change feed."""
+    return time.time_ns() // 1000
+
+
+def _changes_index(capacity: Dict) -> Dict:
+    """Definizione del GSI sparso del change feed."""
+    return {
+        "IndexName": CHANGES_INDEX_NAME,
+        "KeySchema": [
+            {"AttributeName": "feed", "KeyType": "HASH"},
+            {"AttributeName": "updated_at", "KeyType": "RANGE"},
+        ],
+        "Projection": {"ProjectionType": "ALL"},
+        **capacity,
+    }
+
+
+_FILTER_CONDITIONS = {
+    "eq": "{name} = {value}",
+    "prefix": "begins_with({name}, {value})",
+    "contains": "contains({name}, {value})",
+}
+
+
+def _filter_params(filters: Tuple[UserFilter, ...]) -> Dict:
+    """Parametri della scan che applicano i filtri della lista utenti lato DynamoDB.
+
+    I filtri vengono valutati dopo la lettura: le RCU consumate non cambiano,
+    ma gli utenti scartati non vengono trasferiti né decodificati.
+    """
+    conditions = [NOT_DELETED]
+    names = {}
+    values = {}
+    for i, user_filter in enumerate(filters):
+        name, value = f"#f{i}", f":f{i}"
+        conditions.append(
+            _FILTER_CONDITIONS[user_filter.op].format(name=name, value=value)
+        )
+        names[name] = user_filter.field
+        if user_filter.field == "user_id":
+            values[value] = {"N": str(user_filter.value)}
+        else:
+            values[value] = {"S": user_filter.value}
+    params = {"FilterExpression": " AND ".join(conditions)}
+    if filters:
+        params["ExpressionAttributeNames"] = names
+        params["ExpressionAttributeValues"] = values
+    return params
+
 
 def parse_credentials() -> DynamoCredentials:
-    return DynamoCredentials()
+    return get_credentials()
+
+
+def parse_settings() -> AppSettings:
+    return get_settings()
 
 
-def create_connection(credentials: DynamoCredentials) -> boto3.resource:
+def client_config(replica: bool = False):
+    """Timeout dei socket dei client DynamoDB.
+
+    botocore fissa i timeout alla creazione del client: la scadenza della
+    singola richiesta viene invece controllata prima di ogni chiamata e di
+    ogni nuovo tentativo (vedi ``deadline``). Se DYNAMODB_CONNECT_TIMEOUT_S o
+    DYNAMODB_READ_TIMEOUT_S valgono 0, il timeout è la scadenza più lunga
+    configurata sul server, così una chiamata già partita non le sopravvive;
+    senza scadenze resta il default di botocore.
+
+    Args:
+        replica (bool): True per i client delle letture instradate tra le
+            repliche, regione principale compresa, che rinunciano presto e
+            lasciano il nuovo tentativo alla replica successiva
+
+    Returns:
+        botocore.config.Config: Configurazione condivisa dai client DynamoDB
+    """
+    from botocore.config import Config
+
+    settings = get_settings()
+    bound = max_request_timeout(settings) or DEFAULT_SOCKET_TIMEOUT_S
+    read_timeout = settings.dynamodbReadTimeoutS or bound
+    if replica:
+        return Config(
+            connect_timeout=settings.replicaConnectTimeoutS,
+            read_timeout=read_timeout,
+            retries={"total_max_attempts": 1},
+        )
+    return Config(
+        connect_timeout=settings.dynamodbConnectTimeoutS or bound,
+        read_timeout=read_timeout,
+    )
+
+
+def create_connection(credentials: DynamoCredentials) -> "ServiceResource":
     """Crea una connessione a seconda della variabile di ambiente ENV
 
+    boto3 viene importato solo qui, alla prima connessione, per non rallentare
+    l'avvio del processo.
+
     Args:
         credentials (DynamoCredentials): Credenziali per connettersi a DynamoDB
 
     Returns:
         boto3.resource: Connessione a dynamodb configurata in base all'ambiente
     """
+    import boto3
+
     if os.getenv("ENV") == "local":
-        return boto3.resource(
+        resource = boto3.resource(
             "dynamodb",
             endpoint_url=credentials.endpointUrl,
             region_name=credentials.regionName,
             aws_access_key_id=credentials.awsAccessKeyId,
             aws_secret_access_key=credentials.awsSecretAccessKey,
+            config=client_config(),
         )
     else:
-        return boto3.resource(
+        resource = boto3.resource(
             "dynamodb",
             region_name=credentials.regionName,
             aws_access_key_id=credentials.awsAccessKeyId,
             aws_secret_access_key=credentials.awsSecretAccessKey,
+            config=client_config(),
         )
+    instrument_client(resource.meta.client)
+    enforce_deadlines(resource.meta.client)
+    return resource
+
+
+def create_client(credentials: DynamoCredentials, replica: bool = False):
+    """Crea il client low-level DynamoDB, usato dai percorsi di lettura veloci.
+
+    A differenza di ``resource.meta.client`` non ha le trasformazioni del
+    livello resource registrate: riceve e ritorna item nel formato
+    attribute-value, decodificati da ``codec``.
+
+    Args:
+        credentials (DynamoCredentials): Credenziali per connettersi a DynamoDB
+        replica (bool): True per il client delle letture instradate tra le repliche
+
+    Returns:
+        botocore.client.BaseClient: Client dynamodb instrumentato
+    """
+    import boto3
+
+    kwargs = {}
+    if os.getenv("ENV") == "local":
+        kwargs["endpoint_url"] = credentials.endpointUrl
+    client = boto3.client(
+        "dynamodb",
+        region_name=credentials.regionName,
+        aws_access_key_id=credentials.awsAccessKeyId,
+        aws_secret_access_key=credentials.awsSecretAccessKey,
+        config=client_config(replica),
+        **kwargs,
+    )
+    instrument_client(client)
+    enforce_deadlines(client)
+    return client
+
+
+def create_autoscaling_client(credentials: DynamoCredentials):
+    """Crea il client Application Auto Scaling usato per le tabelle in modalità provisioned.
+
+    Args:
+        credentials (DynamoCredentials): Credenziali per connettersi ad AWS
+
+    Returns:
+        botocore.client.BaseClient: Client application-autoscaling
+    """
+    import boto3
+
+    return boto3.client(
+        "application-autoscaling",
+        region_name=credentials.regionName,
+        aws_access_key_id=credentials.awsAccessKeyId,
+        aws_secret_access_key=credentials.awsSecretAccessKey,
+    )
 
 
 class DynamoContext:
@@ -52,21 +280,138 @@ class DynamoContext:
 
 
 class DynamoConnection:
-    def __init__(self, index_name: str = "id-index") -> None:
-        self.credentials = parse_credentials()
-        self.table_name = self.credentials.tableName
+    """Connessione a DynamoDB.
+
+    Credenziali, parametri e risorsa boto3 vengono caricati al primo utilizzo:
+    creare l'oggetto non legge la configurazione né apre connessioni.
+
+    Args:
+        index_name (str): Nome dell'indice
+        credentials (Optional[DynamoCredentials]): Credenziali da usare al posto
+            di quelle lette dall'ambiente, es. per puntare a una replica
+    """
+
+    def __init__(
+        self,
+        index_name: str = "id-index",
+        credentials: Optional[DynamoCredentials] = None,
+    ) -> None:
         self.index_name = index_name
-        self.dynamo_db = boto3.resource(
-            "dynamodb",
-            endpoint_url=self.credentials.endpointUrl,
-            region_name=self.credentials.regionName,
-            aws_access_key_id=self.credentials.awsAccessKeyId,
-            aws_secret_access_key=self.credentials.awsSecretAccessKey,
+        if credentials is not None:
+            self.credentials = credentials
+
+    @cached_property
+    def credentials(self) -> DynamoCredentials:
+        return parse_credentials()
+
+    @cached_property
+    def settings(self) -> AppSettings:
+        return parse_settings()
+
+    @property
+    def table_name(self) -> str:
+        return self.credentials.tableName
+
+    @property
+    def meta_table_name(self) -> str:
+        return self.credentials.metaTableName
+
+    @cached_property
+    def dynamo_db(self) -> "ServiceResource":
+        return create_connection(self.credentials)
+
+    @cached_property
+    def client(self):
+        return create_client(self.credentials)
+
+    @cached_property
+    def hedger(self) -> Optional[Hedger]:
+        """Hedging delle letture puntuali, None se disattivato."""
+        settings = self.settings
+        if not settings.hedgingEnabled:
+            return None
+        return Hedger(
+            settings.hedgingPercentile,
+            settings.hedgingBudgetPercent,
+            settings.hedgingMinDelayMs / 1000,
+        )
+
+    @property
+    def replica_endpoints(self) -> List[Endpoint]:
+        return parse_endpoints(self.credentials.replicaEndpoints)
+
+    @cached_property
+    def read_router(self) -> Optional[ReplicaRouter]:
+        """Instradamento delle letture tra le repliche, None senza DYNAMODB_REPLICAS.
+
+        Anche la regione principale ha qui un client con un solo tentativo:
+        con i retry del client delle scritture una regione che non risponde
+        tratterrebbe la lettura per decine di secondi prima del failover.
+        """
+        endpoints = self.replica_endpoints
+        if not endpoints:
+            return None
+        credentials = self.credentials
+        home = Replica(
+            credentials.regionName, create_client(credentials, True), home=True
         )
+        replicas = [
+            Replica(
+                endpoint.name,
+                create_client(replica_credentials(credentials, endpoint), True),
+            )
+            for endpoint in endpoints
+        ]
+        router = ReplicaRouter(
+            home,
+            replicas,
+            failure_threshold=self.settings.replicaFailureThreshold,
+            health_check=self._check_replica,
+            interval=self.settings.replicaHealthCheckIntervalS,
+        )
+        router.start()
+        return router
+
+    def _check_replica(self, replica: Replica) -> None:
+        # Lettura di un id che non esiste: verifica endpoint e tabella e
+        # misura la latenza di una GetItem, non di una chiamata di controllo
+        replica.client.get_item(
+            TableName=self.table_name,
+            Key=encode_key(0),
+            ProjectionExpression="user_id",
+        )
+
+    def _read(self, operation: str, **kwargs) -> Dict:
+        """Esegue una lettura del client low-level, sulle repliche se configurate.
+
+        Le letture fortemente consistenti vanno sempre alla regione principale:
+        le global table le garantiscono solo nella regione in cui si scrive.
+        L'esistenza della tabella non viene verificata prima con ListTables,
+        che andrebbe sempre alla regione principale: una tabella assente
+        sull'ultima replica tentata diventa DynamoTableDoesNotExist.
+
+        Raises:
+            DynamoTableDoesNotExist: Se la tabella letta non esiste
+        """
+        try:
+            if self.read_router is None or kwargs.get("ConsistentRead"):
+                return getattr(self.client, operation)(**kwargs)
+            return self.read_router.call(operation, **kwargs)
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ResourceNotFoundException":
+                raise DynamoTableDoesNotExist(kwargs["TableName"]) from e
+            raise
 
     def close(self) -> None:
         """Funzione per chiudere la connessione a Dynamo DB"""
-        self.dynamo_db.meta.client.close()
+        if self.__dict__.get("hedger") is not None:
+            self.hedger.close()
+        if self.__dict__.get("read_router") is not None:
+            self.read_router.close()
+        if "dynamo_db" in self.__dict__:
+            self.dynamo_db.meta.client.close()
+        if "client" in self.__dict__:
+            self.client.close()
 
     def list_tables(self) -> List[str]:
         """Funzione per ottenere la lista delle tabelle presenti in DynamoDB
@@ -76,6 +421,24 @@ class DynamoConnection:
         """
         return self.dynamo_db.meta.client.list_tables()["TableNames"]
 
+    @cached_property
+    def existing_tables(self) -> Set[str]:
+        """Nomi delle tabelle presenti, letti con ListTables una sola volta.
+
+        Il lifespan li legge all'avvio con refresh_tables, così le richieste
+        non pagano una ListTables per verificare che le tabelle esistano.
+        """
+        return set(self.list_tables())
+
+    def refresh_tables(self) -> Set[str]:
+        """Funzione per rileggere con ListTables le tabelle presenti.
+
+        Returns:
+            Set[str]: Nomi delle tabelle presenti
+        """
+        self.__dict__.pop("existing_tables", None)
+        return self.existing_tables
+
     # Proprietà per verificare se la tabella esiste
     @property
     def table_exists(self) -> bool:
@@ -84,12 +447,39 @@ class DynamoConnection:
         Returns:
             bool: Ritorna True se la tabella esiste, False altrimenti
         """
-        existing_tables = self.list_tables()
-        return self.table_name in existing_tables
+        return self.table_name in self.existing_tables
+
+    @property
+    def meta_table_exists(self) -> bool:
+        """Funzione per verificare se la tabella di metadati esiste.
+
+        Returns:
+            bool: Ritorna True se la tabella esiste, False altrimenti
+        """
+        return self.meta_table_name in self.existing_tables
 
-    def insert_user(self, user: User) -> str:
+    def _user_item(self, user_id: int, user: User) -> Dict:
+        """Costruisce l'item DynamoDB di un utente, con gli attributi del change feed."""
+        return {
+            "user_id": user_id,
+            "nome": user.nome,
+            "cognome": user.cognome,
+            "cf": user.cf,
+            "p_iva": user.p_iva,
+            "email": user.email,
+            "n_telefono": user.n_telefono,
+            "indirizzo_residenza": user.indirizzo_residenza,
+            "indirizzo_fatturazione": user.indirizzo_fatturazione,
+            "feed": USERS_FEED,
+            "updated_at": now_micros(),
+        }
+
+    def insert_user(self, user: User) -> int:
         """Funzione per inserire un nuovo utente.
 
+        Dopo la scrittura dell'utente vengono aggiornati statistiche e
+        contatore delle modifiche (vedi _record_write).
+
         Args:
             user (User): Dettagli utenti da inserire
 
@@ -97,31 +487,204 @@ class DynamoConnection:
             DynamoTableDoesNotExist: Se la tabella non esiste
 
         Returns:
-            str: Id dell'utente appena creato
+            int: Id dell'utente appena creato
         """
         if not self.table_exists:
             logger.error(f"La tabella '{self.table_name}' non esiste.")
             raise DynamoTableDoesNotExist(self.table_name)
 
-        new_user_id = self.get_max_table_id() + 1
+        new_user_id = self.allocate_user_ids(1)
 
-        table = self.dynamo_db.Table(self.table_name)
-        table.put_item(
-            Item={
-                "user_id": new_user_id,
-                "nome": user.nome,
-                "cognome": user.cognome,
-                "cf": user.cf,
-                "p_iva": user.p_iva,
-                "email": user.email,
-                "n_telefono": user.n_telefono,
-                "indirizzo_residenza": user.indirizzo_residenza,
-                "indirizzo_fatturazione": user.indirizzo_fatturazione,
-            }
+        self.dynamo_db.meta.client.put_item(
+            TableName=self.table_name, Item=self._user_item(new_user_id, user)
         )
+        self._record_write(stats_delta([user]))
         logger.debug(f"Utente con ID {new_user_id} inserito con successo.")
         return new_user_id
 
+    def insert_users(self, users: List[User]) -> List[int]:
+        """Funzione per inserire più utenti con BatchWriteItem.
+
+        Gli id vengono allocati in blocco con un solo aggiornamento del contatore,
+        statistiche e contatore delle modifiche con un solo aggiornamento per blocco.
+
+        Args:
+            users (List[User]): Dettagli degli utenti da inserire
+
+        Raises:
+            DynamoTableDoesNotExist: Se la tabella non esiste
+
+        Returns:
+            List[int]: Id degli utenti creati, nello stesso ordine della lista in ingresso
+        """
+        if not self.table_exists:
+            logger.error(f"La tabella '{self.table_name}' non esiste.")
+            raise DynamoTableDoesNotExist(self.table_name)
+
+        first_id = self.allocate_user_ids(len(users))
+        user_ids = list(range(first_id, first_id + len(users)))
+        self._batch_put(list(zip(user_ids, users)))
+        self._record_write(stats_delta(users))
+        logger.debug(
+            f"Inseriti {len(users)} utenti con ID {user_ids[0]}-{user_ids[-1]}."
+        )
+        return user_ids
+
+    def put_users(self, users: List[Tuple[int, User]]) -> None:
+        """Funzione per scrivere più utenti con id già assegnato tramite BatchWriteItem.
+
+        Gli utenti esistenti con lo stesso id vengono sovrascritti, per questo
+        le statistiche non vengono toccate: le corregge la riconciliazione
+        successiva. Il contatore delle modifiche viene incrementato prima della
+        scrittura e di nuovo dopo, così nessuna lista letta durante la
+        scrittura resta associata all'ETag finale.
+
+        Args:
+            users (List[Tuple[int, User]]): Coppie (id, dettagli utente) da scrivere
+        """
+        self.bump_table_version()
+        self._batch_put(users)
+        self.bump_table_version()
+
+    def _batch_put(self, users: List[Tuple[int, User]]) -> None:
+        table = self.dynamo_db.Table(self.table_name)
+        # Il batch writer divide in blocchi da 25 e ritenta gli UnprocessedItems
+        with table.batch_writer() as batch:
+            for user_id, user in users:
+                batch.put_item(Item=self._user_item(user_id, user))
+
+    def reserve_user_ids_up_to(self, user_id: int) -> None:
+        """Funzione per portare il contatore degli id almeno al valore indicato.
+
+        Va chiamata prima di scrivere utenti con id espliciti (es. import), così
+        gli inserimenti concorrenti non ricevono quegli id. Un contatore non
+        ancora inizializzato parte dall'id massimo presente in tabella.
+
+        Args:
+            user_id (int): Id più alto che verrà utilizzato
+
+        Raises:
+            DynamoTableDoesNotExist: Se la tabella di metadati non esiste
+        """
+        meta_table = self.dynamo_db.Table(self.meta_table_name)
+        for _ in range(3):
+            try:
+                meta_table.update_item(
+                    Key={"pk": ID_SEQUENCE_KEY},
+                    UpdateExpression="SET last_id = :id",
+                    ConditionExpression="last_id < :id",
+                    ExpressionAttributeValues={":id": user_id},
+                )
+                return
+            except ClientError as e:
+                code = e.response["Error"]["Code"]
+                if code == "ResourceNotFoundException":
+                    raise DynamoTableDoesNotExist(self.meta_table_name) from e
+                if code != "ConditionalCheckFailedException":
+                    raise
+            # Il contatore è già oltre l'id, oppure non esiste ancora
+            item = meta_table.get_item(
+                Key={"pk": ID_SEQUENCE_KEY}, ConsistentRead=True
+            ).get("Item")
+            if item is not None:
+                if int(item["last_id"]) >= user_id:
+                    return
+                continue
+            try:
+                meta_table.put_item(
+                    Item={
+                        "pk": ID_SEQUENCE_KEY,
+                        "last_id": max(int(self.get_max_table_id()), user_id),
+                    },
+                    ConditionExpression="attribute_not_exists(pk)",
+                )
+                return
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+        raise RuntimeError("Impossibile aggiornare il contatore degli id utente")
+
+    def scan_segment(
+        self,
+        segment: int,
+        total_segments: int,
+        start_key: Optional[Dict] = None,
+        consistent: bool = False,
+    ) -> Iterator[Tuple[List[Dict], Optional[Dict]]]:
+        """Funzione per leggere un segmento della tabella con una scan parallela.
+
+        Args:
+            segment (int): Indice del segmento da leggere
+            total_segments (int): Numero totale di segmenti
+            start_key (Optional[Dict]): Chiave da cui riprendere la lettura
+            consistent (bool): True per una scan fortemente consistente
+
+        Yields:
+            Tuple[List[Dict], Optional[Dict]]: Pagina di utenti e chiave da cui
+                riprendere, None quando il segmento è terminato
+        """
+        kwargs = {
+            "TableName": self.table_name,
+            "Segment": segment,
+            "TotalSegments": total_segments,
+            "ConsistentRead": consistent,
+            "FilterExpression": NOT_DELETED,
+            "ProjectionExpression": USER_PROJECTION,
+        }
+        if start_key:
+            kwargs["ExclusiveStartKey"] = encode_key(start_key["user_id"])
+        while True:
+            response = self._read("scan", **kwargs)
+            last_key = response.get("LastEvaluatedKey")
+            yield [decode_user(item) for item in response["Items"]], decode_key(
+                last_key
+            )
+            if not last_key:
+                return
+            kwargs["ExclusiveStartKey"] = last_key
+
+    def allocate_user_ids(self, count: int) -> int:
+        """Funzione per riservare un blocco di id utente consecutivi.
+
+        Gli id vengono presi da un contatore atomico nella tabella di metadati,
+        inizializzato al primo utilizzo con l'id massimo presente in tabella. Se la
+        tabella di metadati non esiste si ricade sulla scan dell'id massimo.
+
+        Args:
+            count (int): Numero di id da riservare
+
+        Returns:
+            int: Primo id del blocco riservato
+        """
+        meta_table = self.dynamo_db.Table(self.meta_table_name)
+        for _ in range(2):
+            try:
+                response = meta_table.update_item(
+                    Key={"pk": ID_SEQUENCE_KEY},
+                    UpdateExpression="ADD last_id :count",
+                    ConditionExpression="attribute_exists(pk)",
+                    ExpressionAttributeValues={":count": count},
+                    ReturnValues="UPDATED_NEW",
+                )
+                return int(response["Attributes"]["last_id"]) - count + 1
+            except ClientError as e:
+                code = e.response["Error"]["Code"]
+                if code == "ResourceNotFoundException":
+                    logger.debug(f"Tabella '{self.meta_table_name}' non trovata.")
+                    return int(self.get_max_table_id()) + 1
+                if code != "ConditionalCheckFailedException":
+                    raise
+            # Contatore non ancora inizializzato: lo creo a partire dall'id massimo
+            try:
+                meta_table.put_item(
+                    Item={"pk": ID_SEQUENCE_KEY, "last_id": self.get_max_table_id()},
+                    ConditionExpression="attribute_not_exists(pk)",
+                )
+            except ClientError as e:
+                if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+        raise RuntimeError("Impossibile inizializzare il contatore degli id utente")
+
     def user_exists(self, user_id: str) -> bool:
         """Funzione per verificare se un utente esiste nella tabella.
 
@@ -133,7 +696,7 @@ class DynamoConnection:
         """
         table = self.dynamo_db.Table(self.table_name)
         response = table.get_item(Key={"user_id": user_id})
-        return "Item" in response
+        return "Item" in response and "deleted_at" not in response["Item"]
 
     # Funzione per cancellare un utente
     def delete_user(self, user_id: int):
@@ -142,22 +705,339 @@ class DynamoConnection:
         Args:
             user_id (int): User ID dell'utente da eliminare
 
+        Con DELETE_MODE=soft l'utente viene solo marcato come cancellato con
+        una singola scrittura condizionale; la rimozione fisica avviene tramite
+        TTL. In modalità hard la cancellazione e la tombstone del change feed
+        sono scritte nella stessa transazione. In entrambi i casi le
+        statistiche vengono aggiornate dopo la cancellazione con i valori che
+        l'utente aveva.
+
         Raises:
             DynamoTableDoesNotExist: tabella non esistente
             UserNotFound: Utenza non trovata
         """
-        if not self.table_exists:
+        soft = self.settings.deleteMode == "soft"
+        if not soft and not self.table_exists:
             raise DynamoTableDoesNotExist(self.table_name)
 
-        if not self.user_exists(user_id):
+        item = self._remove_user(user_id, soft)
+        if item is None:
             raise UserNotFound(user_id)
+        self._record_write(stats_delta([item], sign=-1))
 
-        table = self.dynamo_db.Table(self.table_name)
+    def _remove_user(self, user_id: int, soft: bool) -> Optional[Dict]:
+        """Cancella un utente e ritorna l'item com'era prima della cancellazione.
+
+        In modalità soft è una sola UpdateItem condizionale che ritorna i
+        valori precedenti. In modalità hard l'utente viene letto e poi
+        cancellato in una transazione con la sua tombstone, così il change
+        feed non perde la cancellazione; senza tabella di metadati basta una
+        DeleteItem. Usa il client della risorsa, che a differenza della Table è
+        thread-safe, così può essere chiamata in parallelo dalla cancellazione
+        massiva.
+
+        Args:
+            user_id (int): Id dell'utente da cancellare
+            soft (bool): True per marcarlo come cancellato (tombstone del change
+                feed con rimozione tramite TTL), False per rimuoverlo
+
+        Raises:
+            DynamoTableDoesNotExist: Eccezione sollevata se la tabella non esiste.
+
+        Returns:
+            Optional[Dict]: Item cancellato, None se l'utente non esiste o era già cancellato
+        """
+        if not soft and self.meta_table_exists:
+            return self._remove_with_tombstone(user_id)
+        client = self.dynamo_db.meta.client
+        request = {
+            "TableName": self.table_name,
+            "Key": {"user_id": user_id},
+            "ConditionExpression": USER_EXISTS,
+            "ReturnValues": "ALL_OLD",
+        }
+        try:
+            if soft:
+                now = int(time.time())
+                response = client.update_item(
+                    **request,
+                    UpdateExpression="SET deleted_at = :now, expires_at = :exp, feed = :feed, updated_at = :u_at",
+                    ExpressionAttributeValues={
+                        ":now": now,
+                        ":exp": now + self.settings.softDeleteRetentionDays * 86400,
+                        ":feed": TOMBSTONES_FEED,
+                        ":u_at": now_micros(),
+                    },
+                )
+            else:
+                response = client.delete_item(**request)
+        except ClientError as e:
+            code = e.response["Error"]["Code"]
+            if code == "ConditionalCheckFailedException":
+                return None
+            if code == "ResourceNotFoundException":
+                raise DynamoTableDoesNotExist(self.table_name)
+            raise
+        return response["Attributes"]
+
+    def _remove_with_tombstone(self, user_id: int) -> Optional[Dict]:
+        """Cancella un utente nella stessa transazione della sua tombstone.
+
+        Le transazioni non ritornano i valori precedenti: l'utente viene letto
+        prima, e se cambia tra lettura e cancellazione la deriva delle
+        statistiche la corregge la riconciliazione.
+        """
+        item = self._read_stats_item(user_id)
+        if item is None:
+            return None
+        try:
+            self.dynamo_db.meta.client.transact_write_items(
+                TransactItems=[
+                    {
+                        "Delete": {
+                            "TableName": self.table_name,
+                            "Key": {"user_id": user_id},
+                            "ConditionExpression": USER_EXISTS,
+                        }
+                    },
+                    self._tombstone(user_id),
+                ]
+            )
+        except ClientError as e:
+            code = e.response["Error"]["Code"]
+            if code == "ResourceNotFoundException":
+                raise DynamoTableDoesNotExist(self.table_name)
+            reasons = {
+                reason.get("Code")
+                for reason in e.response.get("CancellationReasons") or []
+            }
+            if "ConditionalCheckFailed" in reasons:
+                return None
+            raise
+        return item
+
+    def _read_stats_item(self, user_id: int) -> Optional[Dict]:
+        """Legge con una lettura consistente gli attributi delle statistiche di un utente.
+
+        Returns:
+            Optional[Dict]: Attributi dell'utente, None se non esiste o è cancellato
+        """
+        try:
+            item = self.dynamo_db.meta.client.get_item(
+                TableName=self.table_name,
+                Key={"user_id": user_id},
+                ProjectionExpression=STATS_PROJECTION,
+                ConsistentRead=True,
+            ).get("Item")
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "ResourceNotFoundException":
+                raise DynamoTableDoesNotExist(self.table_name)
+            raise
+        if not item or "deleted_at" in item:
+            return None
+        return item
+
+    def _tombstone(self, user_id: int) -> Dict:
+        """Elemento di TransactWriteItems che registra la cancellazione hard di
+        un utente nel change feed.
+
+        La tombstone viene salvata nella tabella di metadati e rimossa tramite
+        TTL dopo il periodo di retention del change feed.
+        """
+        return {
+            "Put": {
+                "TableName": self.meta_table_name,
+                "Item": {
+                    "pk": f"users#tombstone#{user_id}",
+                    "user_id": user_id,
+                    "feed": TOMBSTONES_FEED,
+                    "updated_at": now_micros(),
+                    "expires_at": int(time.time())
+                    + self.settings.changeFeedRetentionDays * 86400,
+                },
+            }
+        }
+
+    def _unchanged_condition(self, user_id: int, item: Dict) -> Dict:
+        """Parametri di una scrittura condizionata al fatto che l'utente non sia
+        cancellato e che p_iva e indirizzo siano ancora quelli letti in item."""
+        return {
+            "TableName": self.table_name,
+            "Key": {"user_id": user_id},
+            "ConditionExpression": f"p_iva = :old_p_iva AND indirizzo_residenza = :old_i_r AND {NOT_DELETED}",
+            "ExpressionAttributeValues": {
+                ":old_p_iva": item["p_iva"],
+                ":old_i_r": item["indirizzo_residenza"],
+            },
+        }
+
+    def _transact(self, actions: List[Dict]) -> bool:
+        """Esegue più scritture con TransactWriteItems.
+
+        Raises:
+            DynamoTableDoesNotExist: Eccezione sollevata se la tabella non esiste.
+
+        Returns:
+            bool: False se la transazione è stata annullata, es. per una
+                condizione non verificata o un conflitto con un'altra scrittura
+        """
+        try:
+            self.dynamo_db.meta.client.transact_write_items(TransactItems=actions)
+            return True
+        except ClientError as e:
+            code = e.response["Error"]["Code"]
+            if code == "ResourceNotFoundException":
+                raise DynamoTableDoesNotExist(self.table_name)
+            if code != "TransactionCanceledException":
+                raise
+            return False
+
+    def _record_write(self, delta: Dict[str, int]) -> None:
+        """Aggiorna statistiche e contatore delle modifiche dopo una scrittura.
 
-        table.delete_item(Key={"user_id": user_id})
+        Sono UpdateItem con ADD fuori da ogni transazione, ciascuno su uno
+        shard scelto a caso (META_COUNTER_SHARDS), così le scritture
+        concorrenti non si contendono un unico item. L'utente è già stato
+        scritto: gli aggiornamenti vengono eseguiti anche se la richiesta è
+        scaduta e un errore viene solo registrato, la deriva delle statistiche
+        la corregge la riconciliazione periodica.
+
+        Args:
+            delta (Dict[str, int]): Variazione delle statistiche
+        """
+        if not self.meta_table_exists:
+            return
+        try:
+            without_deadline(self._update_counters, delta)
+        except (BotoCoreError, ClientError) as e:
+            logger.warning(f"Contatori non aggiornati dopo una scrittura: {e}")
+
+    def _update_counters(self, delta: Dict[str, int]) -> None:
+        self.bump_table_version()
+        update = stats_update(delta, self._counter_shard())
+        if update:
+            self.dynamo_db.meta.client.update_item(
+                TableName=self.meta_table_name, **update
+            )
+
+    def _counter_shard(self) -> int:
+        return random.randrange(self.settings.metaCounterShards)
+
+    def delete_users(
+        self, user_ids: List[int]
+    ) -> Tuple[List[int], List[int], List[int]]:
+        """Funzione per cancellare più utenti con una sola chiamata.
+
+        In modalità soft ogni utente viene marcato con una UpdateItem
+        condizionale, eseguite in parallelo. In modalità hard gli utenti
+        esistenti vengono individuati con BatchGetItem e cancellati in
+        transazioni da TRANSACTION_MAX_USERS insieme alle loro tombstone, a
+        condizione che non siano cambiati dalla lettura; se la transazione
+        viene annullata, il suo blocco viene cancellato un utente alla volta. Statistiche e contatore
+        delle modifiche vengono aggiornati una sola volta alla fine.
+
+        Un errore DynamoDB sulla cancellazione di un utente non interrompe le
+        altre: l'id viene riportato tra quelli falliti, da ripetere.
+
+        Args:
+            user_ids (List[int]): Id degli utenti da cancellare
+
+        Raises:
+            DynamoTableDoesNotExist: Eccezione sollevata se la tabella non esiste.
+
+        Returns:
+            Tuple[List[int], List[int], List[int]]: Id cancellati, id non
+                trovati e id la cui cancellazione è fallita
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        removed: Dict[int, Dict] = {}
+        failed: List[int] = []
+
+        def collect(user_id: int, remove: Callable[[], Optional[Dict]]) -> None:
+            try:
+                item = remove()
+            except (BotoCoreError, ClientError) as e:
+                logger.warning(f"Cancellazione dell'utente {user_id} fallita: {e}")
+                failed.append(user_id)
+                return
+            if item:
+                removed[user_id] = item
+
+        if self.settings.deleteMode == "soft":
+            workers = min(BULK_DELETE_WORKERS, len(user_ids)) or 1
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # Ogni thread riceve il contesto della richiesta (tracing e capacità)
+                futures = [
+                    executor.submit(
+                        copy_context().run, self._remove_user, user_id, True
+                    )
+                    for user_id in user_ids
+                ]
+                for user_id, future in zip(user_ids, futures):
+                    collect(user_id, future.result)
+        else:
+            if not self.table_exists:
+                raise DynamoTableDoesNotExist(self.table_name)
+            existing = self._existing_users(user_ids)
+            found = [user_id for user_id in user_ids if user_id in existing]
+            for start in range(0, len(found), TRANSACTION_MAX_USERS):
+                chunk = found[start : start + TRANSACTION_MAX_USERS]
+                actions = [
+                    {"Delete": self._unchanged_condition(i, existing[i])} for i in chunk
+                ]
+                if self.meta_table_exists:
+                    actions += [self._tombstone(i) for i in chunk]
+                if self._transact(actions):
+                    removed.update((i, existing[i]) for i in chunk)
+                    continue
+                for user_id in chunk:
+                    collect(user_id, partial(self._remove_user, user_id, False))
+
+        deleted = [user_id for user_id in user_ids if user_id in removed]
+        not_found = [
+            user_id
+            for user_id in user_ids
+            if user_id not in removed and user_id not in failed
+        ]
+        if deleted:
+            self._record_write(stats_delta(removed.values(), sign=-1))
+        return deleted, not_found, failed
+
+    def _existing_users(self, user_ids: List[int]) -> Dict[int, Dict]:
+        """Ritorna, per id, gli attributi delle statistiche degli utenti presenti
+        e non cancellati tra quelli indicati."""
+        return {
+            user_id: item
+            for user_id, item in self._stats_items(user_ids).items()
+            if "deleted_at" not in item
+        }
+
+    def _stats_items(self, user_ids: List[int]) -> Dict[int, Dict]:
+        """Legge con BatchGetItem consistenti gli attributi delle statistiche e
+        updated_at degli utenti indicati, compresi quelli cancellati in modalità soft.
+        """
+        items = {}
+        for start in range(0, len(user_ids), 100):
+            request = {
+                self.table_name: {
+                    "Keys": [{"user_id": i} for i in user_ids[start : start + 100]],
+                    "ProjectionExpression": f"user_id, updated_at, {STATS_PROJECTION}",
+                    "ConsistentRead": True,
+                }
+            }
+            while request:
+                response = self.dynamo_db.batch_get_item(RequestItems=request)
+                for item in response["Responses"].get(self.table_name, []):
+                    items[int(item["user_id"])] = item
+                request = response.get("UnprocessedKeys")
+        return items
 
     def update_user(self, user_id: int, user_data: User) -> int:
         """Funzione per aggiornare un user esistente
+
+        L'aggiornamento è una sola UpdateItem condizionale che ritorna i valori
+        precedenti, da cui viene calcolata la variazione delle statistiche.
+
         Args:
             user_id (int): User id dell'utente da aggiornare
             user_data (User): Nuovi dati dell'utente
@@ -169,23 +1049,37 @@ class DynamoConnection:
         """
         if not self.table_exists:
             raise DynamoTableDoesNotExist(self.table_name)
-        if not self.user_exists(user_id):
-            raise UserNotFound(user_id)
 
-        self.dynamo_db.Table(self.table_name).update_item(
-            Key={"user_id": user_id},
-            UpdateExpression="set nome=:n, cognome=:c, cf=:cf, p_iva=:p_iva, email=:e, n_telefono=:n_t, indirizzo_residenza=:i_r, indirizzo_fatturazione=:i_f",
-            ExpressionAttributeValues={
-                ":n": user_data.nome,
-                ":c": user_data.cognome,
-                ":cf": user_data.cf,
-                ":p_iva": user_data.p_iva,
-                ":e": user_data.email,
-                ":n_t": user_data.n_telefono,
-                ":i_r": user_data.indirizzo_residenza,
-                ":i_f": user_data.indirizzo_fatturazione,
-            },
-            ReturnValues="UPDATED_NEW",
+        try:
+            old = self.dynamo_db.meta.client.update_item(
+                TableName=self.table_name,
+                Key={"user_id": user_id},
+                UpdateExpression="set nome=:n, cognome=:c, cf=:cf, p_iva=:p_iva, email=:e, n_telefono=:n_t, indirizzo_residenza=:i_r, indirizzo_fatturazione=:i_f, feed=:feed, updated_at=:u_at",
+                ConditionExpression=USER_EXISTS,
+                ExpressionAttributeValues={
+                    ":n": user_data.nome,
+                    ":c": user_data.cognome,
+                    ":cf": user_data.cf,
+                    ":p_iva": user_data.p_iva,
+                    ":e": user_data.email,
+                    ":n_t": user_data.n_telefono,
+                    ":i_r": user_data.indirizzo_residenza,
+                    ":i_f": user_data.indirizzo_fatturazione,
+                    ":feed": USERS_FEED,
+                    ":u_at": now_micros(),
+                },
+                ReturnValues="ALL_OLD",
+            )["Attributes"]
+        except ClientError as e:
+            code = e.response["Error"]["Code"]
+            if code == "ConditionalCheckFailedException":
+                raise UserNotFound(user_id)
+            if code == "ResourceNotFoundException":
+                raise DynamoTableDoesNotExist(self.table_name)
+            raise
+        # Il contributo alle statistiche cambia solo con p_iva o provincia
+        self._record_write(
+            combine(stats_delta([old], sign=-1), stats_delta([user_data]))
         )
         return user_id
 
@@ -201,31 +1095,63 @@ class DynamoConnection:
         table = self.dynamo_db.Table(self.table_name)
         table.delete()
         table.meta.client.get_waiter("table_not_exists").wait(TableName=self.table_name)
+        self.existing_tables.discard(self.table_name)
+
+    def get_users(
+        self, consistent: bool = False, query: Optional[UserQuery] = None
+    ) -> List[UserRecord]:
+        """Funzione per ritornare gli utenti all'interno della tabella.
 
-    def get_users(self) -> List[Dict]:
-        """Funzione per ritornare tutti gli utenti all'interno della tabella.
+        I filtri diventano una FilterExpression della scan. Con l'ordinamento
+        ogni pagina viene fusa in un heap top-k, quindi la memoria resta
+        limitata a ``limit`` utenti più una pagina; senza ordinamento la scan
+        si ferma appena raggiunto il limite.
+
+        Args:
+            consistent (bool): True per una scan fortemente consistente
+            query (Optional[UserQuery]): Filtri, ordinamento e limite
 
         Raises:
             DynamoTableDoesNotExist: Eccezione sollevata se la tabella non esiste.
 
         Returns:
-            List[Dict]: Ritorna la lista degli utenti presenti nella tabella
+            List[UserRecord]: Ritorna la lista degli utenti presenti nella tabella
         """
-        if not self.table_exists:
-            raise DynamoTableDoesNotExist(self.table_name)
-
-        table = self.dynamo_db.Table(self.table_name)
-        response = table.scan()
-        items = response.get("Items", [])
-        if not items:
+        # Client low-level e codec dedicato: niente Decimal, un solo oggetto
+        # compatto per utente e tutte le pagine della scan, non solo il primo MB
+        query = query or UserQuery()
+        kwargs = {
+            "TableName": self.table_name,
+            "ConsistentRead": consistent,
+            "ProjectionExpression": USER_PROJECTION,
+            **_filter_params(query.filters),
+        }
+        items = []
+        while True:
+            response = self._read("scan", **kwargs)
+            items.extend(decode_user_record(item) for item in response["Items"])
+            if query.sort:
+                items = query.top(items)
+            elif query.limit and len(items) >= query.limit:
+                break
+            if "LastEvaluatedKey" not in response:
+                break
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        if query.limit:
+            items = items[: query.limit]
+        if not items and not query.filters:
             logger.warning(f"Tabella '{self.table_name}' vuota.")
         return items
 
-    def get_user(self, user_id: int) -> Dict:
+    def get_user(self, user_id: int, consistent: bool = False) -> Dict:
         """Funzione per estrarre un utente dalla tabella.
 
+        Con HEDGING_ENABLED=true una GetItem più lenta del percentile
+        configurato viene duplicata e si usa la prima risposta.
+
         Args:
             user_id (int): Id dell'utente da estrarre.
+            consistent (bool): True per una lettura fortemente consistente
 
         Raises:
             DynamoTableDoesNotExist: Eccezione sollevata se la tabella non esiste.
@@ -234,16 +1160,20 @@ class DynamoConnection:
         Returns:
             Dict: Ritorna l'utente estratto dalla tabella
         """
-        if not self.table_exists:
-            raise DynamoTableDoesNotExist(self.table_name)
-
-        table = self.dynamo_db.Table(self.table_name)
-
-        response = table.get_item(Key={"user_id": user_id})
+        request = {
+            "TableName": self.table_name,
+            "Key": encode_key(user_id),
+            "ConsistentRead": consistent,
+            "ProjectionExpression": f"{USER_PROJECTION}, deleted_at",
+        }
+        if self.hedger is not None:
+            response = self.hedger.call(partial(self._read, "get_item"), **request)
+        else:
+            response = self._read("get_item", **request)
         item = response.get("Item")
-        if not item:
+        if not item or "deleted_at" in item:
             raise UserNotFound(user_id)
-        return item
+        return decode_user(item)
 
     # Funzione per creare la tabella utenti su DynamoDB
     def create_users_table(self):
@@ -252,7 +1182,7 @@ class DynamoConnection:
         Raises:
             DynamoTableAlreadyExists: Eccezione sollevata se la tabella esiste già.
         """
-        if self.table_exists:
+        if self.table_name in self.refresh_tables():
             raise DynamoTableAlreadyExists(self.table_name)
 
         table = self.dynamo_db.create_table(
@@ -262,7 +1192,9 @@ class DynamoConnection:
                     "AttributeName": "user_id",
                     "AttributeType": "N",  # S per stringa, N per numero, etc.
                 },
-                # Aggiungi altri attributi se necessario
+                # Attributi dell'indice sparso del change feed
+                {"AttributeName": "feed", "AttributeType": "S"},
+                {"AttributeName": "updated_at", "AttributeType": "N"},
             ],
             KeySchema=[
                 {
@@ -284,17 +1216,566 @@ class DynamoConnection:
                     "Projection": {
                         "ProjectionType": "ALL"  # Tipo di proiezione, può essere 'KEYS_ONLY', 'INCLUDE' o 'ALL'
                     },
-                    "ProvisionedThroughput": {
-                        "ReadCapacityUnits": 10,
-                        "WriteCapacityUnits": 10,
-                    },
-                }
+                    **self.index_capacity,
+                },
+                _changes_index(self.index_capacity),
             ],
-            ProvisionedThroughput={"ReadCapacityUnits": 10, "WriteCapacityUnits": 10},
+            **self.table_capacity,
         )
         table.meta.client.get_waiter("table_exists").wait(TableName=self.table_name)
+        # Gli utenti cancellati in modalità soft vengono rimossi tramite TTL
+        self.dynamo_db.meta.client.update_time_to_live(
+            TableName=self.table_name,
+            TimeToLiveSpecification={"Enabled": True, "AttributeName": "expires_at"},
+        )
+        self.configure_autoscaling(
+            self.table_name, [self.index_name, CHANGES_INDEX_NAME]
+        )
+        self.existing_tables.add(self.table_name)
         logger.debug(f"Tabella '{self.table_name}' creata con successo!")
 
+    # Funzione per creare la tabella di metadati su DynamoDB
+    def create_meta_table(self):
+        """Funzione per creare la tabella di metadati (contatori e token di modifica).
+
+        Raises:
+            DynamoTableAlreadyExists: Eccezione sollevata se la tabella esiste già.
+        """
+        if self.meta_table_name in self.refresh_tables():
+            raise DynamoTableAlreadyExists(self.meta_table_name)
+
+        table = self.dynamo_db.create_table(
+            TableName=self.meta_table_name,
+            AttributeDefinitions=[
+                {"AttributeName": "pk", "AttributeType": "S"},
+                {"AttributeName": "feed", "AttributeType": "S"},
+                {"AttributeName": "updated_at", "AttributeType": "N"},
+            ],
+            KeySchema=[{"AttributeName": "pk", "KeyType": "HASH"}],
+            GlobalSecondaryIndexes=[_changes_index(self.index_capacity)],
+            **self.table_capacity,
+        )
+        table.meta.client.get_waiter("table_exists").wait(
+            TableName=self.meta_table_name
+        )
+        self.configure_autoscaling(self.meta_table_name, [CHANGES_INDEX_NAME])
+        # Le tombstone del change feed scadono tramite TTL
+        self.dynamo_db.meta.client.update_time_to_live(
+            TableName=self.meta_table_name,
+            TimeToLiveSpecification={"Enabled": True, "AttributeName": "expires_at"},
+        )
+        self.existing_tables.add(self.meta_table_name)
+        logger.debug(f"Tabella '{self.meta_table_name}' creata con successo!")
+
+    @property
+    def table_capacity(self) -> Dict:
+        """Parametri di capacità per create_table, in base a CAPACITY_MODE."""
+        if self.settings.capacityMode == "PAY_PER_REQUEST":
+            return {"BillingMode": "PAY_PER_REQUEST"}
+        return {"BillingMode": "PROVISIONED", **self.index_capacity}
+
+    @property
+    def index_capacity(self) -> Dict:
+        """Parametri di capacità dei GSI: in on-demand seguono quelli della tabella."""
+        if self.settings.capacityMode == "PAY_PER_REQUEST":
+            return {}
+        return {
+            "ProvisionedThroughput": {
+                "ReadCapacityUnits": self.settings.readCapacity,
+                "WriteCapacityUnits": self.settings.writeCapacity,
+            }
+        }
+
+    def configure_autoscaling(self, table_name: str, index_names: List[str]) -> None:
+        """Funzione per registrare l'auto-scaling target tracking di tabella e GSI.
+
+        Attivo solo in modalità PROVISIONED con AUTOSCALING_MAX_*_CAPACITY
+        maggiore della capacità iniziale; la capacità configurata fa da minimo.
+        In ambiente local viene saltato, DynamoDB Local non lo supporta.
+
+        Args:
+            table_name (str): Nome della tabella
+            index_names (List[str]): Nomi dei GSI della tabella
+        """
+        settings = self.settings
+        if settings.capacityMode != "PROVISIONED" or os.getenv("ENV") == "local":
+            return
+
+        dimensions = [
+            ("Read", settings.readCapacity, settings.autoscalingMaxReadCapacity),
+            ("Write", settings.writeCapacity, settings.autoscalingMaxWriteCapacity),
+        ]
+        resources = [("table", f"table/{table_name}")] + [
+            ("index", f"table/{table_name}/index/{index}") for index in index_names
+        ]
+        client = create_autoscaling_client(self.credentials)
+        try:
+            for kind, resource_id in resources:
+                for unit, minimum, maximum in dimensions:
+                    if maximum <= minimum:
+                        continue
+                    dimension = f"dynamodb:{kind}:{unit}CapacityUnits"
+                    client.register_scalable_target(
+                        ServiceNamespace="dynamodb",
+                        ResourceId=resource_id,
+                        ScalableDimension=dimension,
+                        MinCapacity=minimum,
+                        MaxCapacity=maximum,
+                    )
+                    client.put_scaling_policy(
+                        PolicyName=f"{resource_id.replace('/', '-')}-{unit.lower()}",
+                        ServiceNamespace="dynamodb",
+                        ResourceId=resource_id,
+                        ScalableDimension=dimension,
+                        PolicyType="TargetTrackingScaling",
+                        TargetTrackingScalingPolicyConfiguration={
+                            "TargetValue": settings.autoscalingTargetUtilization,
+                            "PredefinedMetricSpecification": {
+                                "PredefinedMetricType": f"DynamoDB{unit}CapacityUtilization"
+                            },
+                        },
+                    )
+                    logger.debug(
+                        f"Auto-scaling {dimension} su {resource_id}: {minimum}-{maximum}"
+                    )
+        finally:
+            client.close()
+
+    def bump_table_version(self) -> None:
+        """Funzione per incrementare il contatore delle modifiche della tabella utenti.
+
+        Il contatore viene usato come ETag della lista utenti. Viene
+        incrementato uno shard a caso: la versione è la somma degli shard. Se la
+        tabella di metadati non esiste l'aggiornamento viene ignorato.
+        """
+        try:
+            self.dynamo_db.meta.client.update_item(
+                TableName=self.meta_table_name,
+                Key={"pk": shard_key(TABLE_VERSION_KEY, self._counter_shard())},
+                UpdateExpression="ADD version :one SET updated_at = :now",
+                ExpressionAttributeValues={":one": 1, ":now": int(time.time())},
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ResourceNotFoundException":
+                raise
+            logger.debug(f"Tabella '{self.meta_table_name}' non trovata, salto.")
+
+    def _query_feed(
+        self, table_name: str, feed: str, since: int, until: int, limit: int
+    ) -> List[Dict]:
+        """Legge in ordine crescente gli item del change feed in (since, until]."""
+        table = self.dynamo_db.Table(table_name)
+        kwargs = {
+            "IndexName": CHANGES_INDEX_NAME,
+            "KeyConditionExpression": "feed = :feed AND updated_at BETWEEN :since AND :until",
+            "ExpressionAttributeValues": {
+                ":feed": feed,
+                ":since": since + 1,
+                ":until": until,
+            },
+            "Limit": limit,
+        }
+        items = []
+        while len(items) < limit:
+            response = table.query(**kwargs)
+            items.extend(response.get("Items", []))
+            if "LastEvaluatedKey" not in response:
+                break
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        return items[:limit]
+
+    def get_changes(self, since: int, limit: int) -> Tuple[List[Dict], bool, int]:
+        """Funzione per ottenere le modifiche alla tabella utenti successive a un token.
+
+        Il costo della chiamata dipende dal numero di modifiche e non dalla
+        dimensione della tabella: vengono interrogati i GSI sparsi del change
+        feed della tabella utenti (inserimenti, aggiornamenti e cancellazioni
+        soft) e della tabella di metadati (tombstone delle cancellazioni hard).
+
+        Vengono lette solo le modifiche più vecchie di FEED_SAFETY_LAG_US, e il
+        token successivo non supera mai quell'istante: una modifica che diventa
+        visibile in ritardo non finisce prima del token. Senza altre modifiche
+        il token avanza comunque, così un consumer di una tabella ferma non
+        scade dopo CHANGE_FEED_RETENTION_DAYS.
+
+        Args:
+            since (int): Token (timestamp in microsecondi) dell'ultima modifica già ricevuta
+            limit (int): Numero massimo di modifiche da ritornare
+
+        Raises:
+            DynamoTableDoesNotExist: Eccezione sollevata se la tabella non esiste.
+            ChangeTokenExpired: Se il token è più vecchio della retention delle tombstone.
+
+        Returns:
+            Tuple[List[Dict], bool, int]: Modifiche ordinate per updated_at, flag
+                che indica se sono presenti altre modifiche oltre il limite e
+                token da usare nella chiamata successiva.
+        """
+        if not self.table_exists:
+            raise DynamoTableDoesNotExist(self.table_name)
+
+        now = now_micros()
+        retention = self.settings.changeFeedRetentionDays * 86400 * 1_000_000
+        if since and since < now - retention:
+            raise ChangeTokenExpired(since)
+        until = now - FEED_SAFETY_LAG_US
+        if since >= until:
+            return [], False, since
+
+        # Leggo un elemento in più per sapere se ci sono altre modifiche
+        upserts = self._query_feed(self.table_name, USERS_FEED, since, until, limit + 1)
+        # Le cancellazioni soft restano sulla tabella utenti fino al TTL
+        soft_deletes = self._query_feed(
+            self.table_name, TOMBSTONES_FEED, since, until, limit + 1
+        )
+        tombstones = []
+        if self.meta_table_exists:
+            tombstones = self._query_feed(
+                self.meta_table_name, TOMBSTONES_FEED, since, until, limit + 1
+            )
+
+        changes = list(
+            heapq.merge(
+                upserts,
+                soft_deletes,
+                tombstones,
+                key=lambda x: int(x["updated_at"]),
+            )
+        )
+        if len(changes) > limit:
+            return changes[:limit], True, int(changes[limit - 1]["updated_at"])
+        return changes, False, until
+
+    def _read_counter_shards(self, key: str, consistent: bool) -> Optional[List[Dict]]:
+        """Legge con BatchGetItem gli shard di un contatore della tabella di metadati.
+
+        Args:
+            key (str): Chiave dello shard 0 del contatore
+            consistent (bool): True per una lettura fortemente consistente
+
+        Returns:
+            Optional[List[Dict]]: Item degli shard presenti, None se la tabella
+                di metadati non esiste
+        """
+        keys = [
+            {"pk": shard_key(key, shard)}
+            for shard in range(self.settings.metaCounterShards)
+        ]
+        request = {self.meta_table_name: {"Keys": keys, "ConsistentRead": consistent}}
+        items = []
+        try:
+            while request:
+                response = self.dynamo_db.batch_get_item(RequestItems=request)
+                items.extend(response["Responses"].get(self.meta_table_name, []))
+                request = response.get("UnprocessedKeys")
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ResourceNotFoundException":
+                raise
+            return None
+        return items
+
+    def get_table_version(self, consistent: bool = False) -> Optional[Tuple[int, int]]:
+        """Funzione per leggere il contatore delle modifiche della tabella utenti.
+
+        Args:
+            consistent (bool): True per una lettura fortemente consistente
+
+        Returns:
+            Optional[Tuple[int, int]]: Versione (somma degli shard) e timestamp
+                (epoch) dell'ultima modifica. None se il contatore non è disponibile.
+        """
+        shards = self._read_counter_shards(TABLE_VERSION_KEY, consistent)
+        if not shards:
+            return None
+        return (
+            sum(int(item["version"]) for item in shards),
+            max(int(item["updated_at"]) for item in shards),
+        )
+
+    def get_user_stats(self, consistent: bool = False) -> Optional[Dict]:
+        """Funzione per leggere l'item delle statistiche degli utenti.
+
+        I contatori sono la somma degli shard, gli altri attributi (es.
+        reconciled_at) vengono dallo shard 0.
+
+        Args:
+            consistent (bool): True per una lettura fortemente consistente
+
+        Returns:
+            Optional[Dict]: Item delle statistiche, {} se non ancora creato.
+                None se la tabella di metadati non esiste.
+        """
+        shards = self._read_counter_shards(STATS_KEY, consistent)
+        if shards is None:
+            return None
+        primary = next((item for item in shards if item["pk"] == STATS_KEY), {})
+        counters = stats_counters(primary)
+        item = {key: value for key, value in primary.items() if key not in counters}
+        item.update(combine(*(stats_counters(shard) for shard in shards)))
+        return item
+
+    def claim_stats_reconciliation(self, interval: int) -> bool:
+        """Funzione per prendere in carico la riconciliazione delle statistiche.
+
+        Più worker condividono la tabella: solo quello che riesce ad
+        aggiornare ``reconcile_started`` esegue la scan, gli altri aspettano
+        il giro successivo.
+
+        Args:
+            interval (int): Secondi minimi tra due riconciliazioni
+
+        Returns:
+            bool: True se la riconciliazione tocca al chiamante
+        """
+        now = int(time.time())
+        try:
+            self.dynamo_db.Table(self.meta_table_name).update_item(
+                Key={"pk": STATS_KEY},
+                UpdateExpression="SET reconcile_started = :now",
+                ConditionExpression="attribute_not_exists(reconcile_started) OR reconcile_started < :stale",
+                ExpressionAttributeValues={":now": now, ":stale": now - interval},
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] not in (
+                "ConditionalCheckFailedException",
+                "ResourceNotFoundException",
+            ):
+                raise
+            return False
+        return True
+
+    def reconcile_stats(self, segments: int = 4) -> Optional[Dict[str, int]]:
+        """Funzione per correggere le statistiche con una scan della tabella utenti.
+
+        La scan parallela conta gli utenti e ricorda il contributo di ciascuno
+        con 2 byte per utente. Finita la scan vengono letti i contatori e, dal
+        change feed, gli utenti modificati da inizio scan: per questi il
+        contributo letto dalla scan viene sostituito con quello che avevano
+        quando sono stati letti i contatori. La differenza viene applicata con
+        ADD, quindi le scritture concorrenti non vanno perse e la correzione
+        viene salvata anche sotto carico.
+
+        Un utente modificato sia prima sia dopo la lettura dei contatori, o
+        scritto poco prima ma con i contatori non ancora aggiornati, può essere
+        contato male: l'errore non si accumula, perché la riconciliazione
+        successiva lo corregge. La correzione va sullo shard 0.
+
+        Args:
+            segments (int): Segmenti della scan parallela
+
+        Raises:
+            DynamoTableDoesNotExist: Eccezione sollevata se la tabella non esiste.
+
+        Returns:
+            Optional[Dict[str, int]]: Correzione applicata ai contatori, None se
+                la tabella di metadati non esiste
+        """
+        if not self.table_exists:
+            raise DynamoTableDoesNotExist(self.table_name)
+        if not self.meta_table_exists:
+            return None
+        since = now_micros()
+        # Il client low-level è thread-safe: lo creo qui e lo condividono i segmenti
+        self.client
+        with ThreadPoolExecutor(max_workers=segments) as executor:
+            scans = list(
+                executor.map(
+                    lambda segment: self._scan_stats_segment(segment, segments),
+                    range(segments),
+                )
+            )
+        counts = combine(*(segment_counts for segment_counts, _, _ in scans))
+
+        stats = stats_counters(self.get_user_stats(consistent=True))
+        read_at = now_micros()
+        # Aspetto che il change feed mostri tutte le modifiche fino alla lettura
+        time.sleep(FEED_SAFETY_LAG_US / 1_000_000)
+        # Ultima modifica nel change feed di ogni utente modificato da inizio scan
+        changed: Dict[int, Dict] = {}
+        token, has_more = since - FEED_SAFETY_LAG_US, True
+        while has_more:
+            changes, has_more, token = self.get_changes(token, RECONCILE_FEED_PAGE_SIZE)
+            for item in changes:
+                changed[int(item["user_id"])] = item
+
+        scanned = {}
+        for _, ids, codes in scans:
+            for user_id, code in zip(ids, codes):
+                if user_id in changed:
+                    scanned[user_id] = code
+        current = self._stats_items(list(changed))
+        corrections = []
+        for user_id, change in changed.items():
+            item = current.get(user_id)
+            if item:
+                updated_at = int(item.get("updated_at", 0))
+            elif change["feed"] == TOMBSTONES_FEED:
+                # Le cancellazioni hard hanno solo la tombstone del change feed
+                updated_at = int(change["updated_at"])
+            else:
+                # Cancellato dopo la lettura del change feed, quindi dei contatori
+                continue
+            if updated_at > read_at:
+                # Modificato dopo la lettura dei contatori: vale quanto letto dalla scan
+                continue
+            code = stats_code(item) if item and "deleted_at" not in item else 0
+            corrections += [code_delta(scanned.get(user_id, 0), -1), code_delta(code)]
+        counts = combine(counts, *corrections)
+
+        correction = combine(counts, {key: -value for key, value in stats.items()})
+        now = int(time.time())
+        update = stats_update(correction) or {
+            "Key": {"pk": STATS_KEY},
+            "UpdateExpression": "",
+            "ExpressionAttributeValues": {},
+        }
+        update["UpdateExpression"] = (
+            "SET reconciled_at = :now, reconcile_started = :now "
+            + update["UpdateExpression"]
+        ).strip()
+        update["ExpressionAttributeValues"][":now"] = now
+        self.dynamo_db.Table(self.meta_table_name).update_item(**update)
+        return correction
+
+    def _scan_stats_segment(
+        self, segment: int, total_segments: int
+    ) -> Tuple[Dict[str, int], array, array]:
+        """Conta gli utenti di un segmento della scan consistente.
+
+        Returns:
+            Tuple[Dict[str, int], array, array]: Contatori del segmento, id
+                degli utenti letti e loro contributo codificato con stats_code
+        """
+        counts: Dict[str, int] = {}
+        ids, codes = array("Q"), array("H")
+        kwargs = {
+            "TableName": self.table_name,
+            "ConsistentRead": True,
+            "FilterExpression": NOT_DELETED,
+            "ProjectionExpression": "user_id, p_iva, indirizzo_residenza",
+            "Segment": segment,
+            "TotalSegments": total_segments,
+        }
+        while True:
+            response = self.client.scan(**kwargs)
+            users = [
+                {
+                    "p_iva": item["p_iva"]["S"],
+                    "indirizzo_residenza": item["indirizzo_residenza"]["S"],
+                }
+                for item in response["Items"]
+            ]
+            for key, value in stats_delta(users).items():
+                counts[key] = counts.get(key, 0) + value
+            ids.extend(int(item["user_id"]["N"]) for item in response["Items"])
+            codes.extend(stats_code(user) for user in users)
+            if "LastEvaluatedKey" not in response:
+                return counts, ids, codes
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    def claim_idempotency_key(
+        self, key: str, fingerprint: str, lock_seconds: int
+    ) -> Optional[Dict]:
+        """Funzione per prenotare una chiave di idempotenza prima di eseguire la richiesta.
+
+        La prenotazione è un item "in_progress" che scade dopo lock_seconds,
+        così una richiesta interrotta non blocca la chiave per sempre. Gli
+        item scaduti vengono considerati assenti anche se il TTL di DynamoDB
+        non li ha ancora rimossi.
+
+        Args:
+            key (str): Chiave di idempotenza, già ristretta al client
+            fingerprint (str): Impronta di metodo, path e body della richiesta
+            lock_seconds (int): Durata della prenotazione
+
+        Raises:
+            DynamoTableDoesNotExist: Se la tabella di metadati non esiste
+
+        Returns:
+            Optional[Dict]: None se la chiave è stata prenotata, altrimenti
+                l'item esistente (prenotazione in corso o risposta salvata)
+        """
+        client = self.dynamo_db.meta.client
+        pk = IDEMPOTENCY_PREFIX + key
+        for _ in range(2):
+            now = int(time.time())
+            try:
+                client.put_item(
+                    TableName=self.meta_table_name,
+                    Item={
+                        "pk": pk,
+                        "state": "in_progress",
+                        "fingerprint": fingerprint,
+                        "expires_at": now + lock_seconds,
+                    },
+                    ConditionExpression="attribute_not_exists(pk) OR expires_at < :now",
+                    ExpressionAttributeValues={":now": now},
+                )
+                return None
+            except ClientError as e:
+                code = e.response["Error"]["Code"]
+                if code == "ResourceNotFoundException":
+                    raise DynamoTableDoesNotExist(self.meta_table_name)
+                if code != "ConditionalCheckFailedException":
+                    raise
+            item = client.get_item(
+                TableName=self.meta_table_name, Key={"pk": pk}, ConsistentRead=True
+            ).get("Item")
+            # Se nel frattempo l'item è scaduto o è stato rilasciato riprovo
+            if item and int(item["expires_at"]) >= now:
+                return item
+        raise RuntimeError(f"Impossibile prenotare la chiave di idempotenza {key}")
+
+    def save_idempotent_response(
+        self,
+        key: str,
+        fingerprint: str,
+        status: int,
+        headers: List[List[str]],
+        body: bytes,
+        ttl_seconds: int,
+    ) -> None:
+        """Funzione per salvare la risposta di una richiesta idempotente.
+
+        Args:
+            key (str): Chiave di idempotenza, già ristretta al client
+            fingerprint (str): Impronta della richiesta
+            status (int): Status code della risposta
+            headers (List[List[str]]): Header della risposta, coppie [nome, valore]
+            body (bytes): Body della risposta
+            ttl_seconds (int): Secondi per cui la risposta viene conservata
+        """
+        self.dynamo_db.meta.client.put_item(
+            TableName=self.meta_table_name,
+            Item={
+                "pk": IDEMPOTENCY_PREFIX + key,
+                "state": "completed",
+                "fingerprint": fingerprint,
+                "status": status,
+                "headers": headers,
+                "body": body,
+                "expires_at": int(time.time()) + ttl_seconds,
+            },
+        )
+
+    def release_idempotency_key(self, key: str) -> None:
+        """Funzione per liberare una chiave prenotata senza salvare la risposta.
+
+        Args:
+            key (str): Chiave di idempotenza, già ristretta al client
+        """
+        try:
+            self.dynamo_db.meta.client.delete_item(
+                TableName=self.meta_table_name,
+                Key={"pk": IDEMPOTENCY_PREFIX + key},
+                ConditionExpression="#s = :in_progress",
+                ExpressionAttributeNames={"#s": "state"},
+                ExpressionAttributeValues={":in_progress": "in_progress"},
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+
     @property
     def is_alive(self) -> Tuple[bool, int]:
         response = self.dynamo_db.meta.client.list_tables()
@@ -326,3 +1807,13 @@ class DynamoConnection:
 
         max_user_id = max(items, key=lambda x: int(x["user_id"]))["user_id"]
         return max_user_id
+
+
+@lru_cache(maxsize=None)
+def get_connection() -> DynamoConnection:
+    """Ritorna la connessione condivisa dai controller del processo.
+
+    Returns:
+        DynamoConnection: Connessione creata al primo utilizzo
+    """
+    return DynamoConnection()
@@ -0,0 +1,157 @@
+"""Richieste hedged per ridurre la coda di latenza delle letture puntuali.
+
+Se una lettura non risponde entro un percentile delle latenze recenti, ne
+viene inviata una seconda identica e si usa la prima risposta. Le richieste
+extra sono limitate da un budget proporzionale al traffico: con un budget
+del 5% al massimo una lettura ogni venti viene duplicata, anche se DynamoDB
+rallenta per tutti.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from typing import Callable, Optional, TypeVar
+
+from ..utils.metrics import metrics
+
+T = TypeVar("T")
+
+# Campioni di latenza su cui viene calcolato il percentile
+WINDOW_SIZE = 1000
+# Sotto questo numero di campioni non si fanno hedge
+MIN_SAMPLES = 50
+# Il percentile viene ricalcolato ogni RECOMPUTE_EVERY campioni
+RECOMPUTE_EVERY = 50
+# Richieste hedged accumulabili nei periodi di quiete
+MAX_BUDGET = 10.0
+HEDGE_WORKERS = 32
+
+metrics.describe(
+    "dynamodb_hedged_requests_total",
+    "Letture hedged per esito (fired, won, budget_exhausted)",
+)
+metrics.describe(
+    "dynamodb_hedge_delay_seconds",
+    "Attesa corrente prima di inviare una lettura hedged",
+    "gauge",
+)
+
+
+class LatencyWindow:
+    """Latenze delle ultime richieste con il percentile ricalcolato periodicamente."""
+
+    def __init__(self, percentile: float, size: int = WINDOW_SIZE) -> None:
+        self.percentile = percentile
+        self._samples: deque = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._since_recompute = 0
+        self._threshold: Optional[float] = None
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self._since_recompute += 1
+            if len(self._samples) < MIN_SAMPLES:
+                return
+            if self._threshold is None or self._since_recompute >= RECOMPUTE_EVERY:
+                ordered = sorted(self._samples)
+                index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+                self._threshold = ordered[index]
+                self._since_recompute = 0
+
+    @property
+    def threshold(self) -> Optional[float]:
+        """Secondi oltre i quali una richiesta è lenta, None con pochi campioni."""
+        return self._threshold
+
+
+class HedgeBudget:
+    """Token bucket alimentato dalle richieste: ognuna vale ``ratio`` hedge."""
+
+    def __init__(self, ratio: float, capacity: float = MAX_BUDGET) -> None:
+        self.ratio = ratio
+        self.capacity = capacity
+        self._tokens = capacity
+        self._lock = threading.Lock()
+
+    def earn(self) -> None:
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def spend(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class Hedger:
+    """Esegue chiamate idempotenti con una seconda richiesta per quelle lente.
+
+    Args:
+        percentile (float): Percentile delle latenze oltre il quale inviare l'hedge
+        budget_percent (float): Richieste extra massime, in percentuale del traffico
+        min_delay (float): Attesa minima in secondi prima di un hedge
+    """
+
+    def __init__(
+        self, percentile: float, budget_percent: float, min_delay: float
+    ) -> None:
+        self.window = LatencyWindow(percentile)
+        self.budget = HedgeBudget(budget_percent / 100)
+        self.min_delay = min_delay
+        self._executor = ThreadPoolExecutor(
+            max_workers=HEDGE_WORKERS, thread_name_prefix="hedge"
+        )
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    def _submit(self, fn: Callable[..., T], kwargs: dict) -> Future:
+        start = time.perf_counter()
+        # Anche le richieste perdenti alimentano la finestra: senza di loro il
+        # percentile sottostimerebbe proprio le latenze lente
+        future = self._executor.submit(copy_context().run, fn, **kwargs)
+        future.add_done_callback(
+            lambda _: self.window.record(time.perf_counter() - start)
+        )
+        return future
+
+    def call(self, fn: Callable[..., T], **kwargs) -> T:
+        """Esegue fn(**kwargs) ritornando la prima risposta tra primaria e hedge.
+
+        Args:
+            fn (Callable[..., T]): Chiamata idempotente, es. client.get_item
+
+        Returns:
+            T: Risultato della prima richiesta completata con successo
+        """
+        self.budget.earn()
+        threshold = self.window.threshold
+        primary = self._submit(fn, kwargs)
+        if threshold is None:
+            return primary.result()
+        delay = max(threshold, self.min_delay)
+        metrics.set("dynamodb_hedge_delay_seconds", delay)
+        if wait([primary], timeout=delay).done:
+            return primary.result()
+        if not self.budget.spend():
+            metrics.inc("dynamodb_hedged_requests_total", outcome="budget_exhausted")
+            return primary.result()
+
+        metrics.inc("dynamodb_hedged_requests_total", outcome="fired")
+        hedge = self._submit(fn, kwargs)
+        pending = {primary, hedge}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        metrics.inc("dynamodb_hedged_requests_total", outcome="won")
+                    return future.result()
+            # Se la prima a rispondere fallisce aspetto l'altra
+            if not pending:
+                return primary.result()
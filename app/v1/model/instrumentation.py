@@ -0,0 +1,216 @@
+"""Hook botocore per osservare le chiamate a DynamoDB.
+
+Gli hook vengono registrati sul client di ogni connessione creata da
+``create_connection`` e non modificano il comportamento delle chiamate.
+"""
+
+import json
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Tuple
+
+from ..utils.custom_logger import LogSetupper
+from ..utils.metrics import metrics
+from ..utils.tracing import SPAN_KIND_CLIENT, tracer
+
+logger = LogSetupper(__name__).setup()
+
+THROTTLING_ERROR_CODES = frozenset(
+    {
+        "ProvisionedThroughputExceededException",
+        "ThrottlingException",
+        "RequestLimitExceeded",
+    }
+)
+
+metrics.describe(
+    "dynamodb_throttled_requests_total",
+    "Tentativi di chiamata a DynamoDB rifiutati per throttling",
+)
+metrics.describe(
+    "dynamodb_consumed_capacity_units_total",
+    "Capacity unit consumate su DynamoDB per tabella e operazione",
+)
+
+
+class CapacityUsage:
+    """Capacità consumata durante una richiesta HTTP, per tabella e operazione."""
+
+    __slots__ = ("by_operation", "_lock")
+
+    def __init__(self) -> None:
+        self.by_operation: Dict[Tuple[str, str], float] = {}
+        # Le operazioni massive aggiornano lo stesso accumulatore da più thread
+        self._lock = threading.Lock()
+
+    @property
+    def total(self) -> float:
+        return sum(self.by_operation.values())
+
+    def add(self, table: str, operation: str, units: float) -> None:
+        key = (table, operation)
+        with self._lock:
+            self.by_operation[key] = self.by_operation.get(key, 0.0) + units
+
+
+# Accumulatore della richiesta in corso, impostato dal CapacityMiddleware. I
+# thread del threadpool ricevono una copia del contesto, quindi condividono
+# lo stesso oggetto.
+current_capacity: ContextVar[Optional[CapacityUsage]] = ContextVar(
+    "current_capacity", default=None
+)
+
+
+def _on_before_parameter_build(params: Dict, model: Any = None, **kwargs) -> None:
+    """Chiede a DynamoDB la capacità consumata per ogni operazione che la supporta."""
+    if model is not None and "ReturnConsumedCapacity" in model.input_shape.members:
+        params.setdefault("ReturnConsumedCapacity", "TOTAL")
+
+
+def _on_after_call(
+    parsed: Dict,
+    model: Any = None,
+    context: Optional[Dict] = None,
+    http_response: Any = None,
+    **kwargs,
+) -> None:
+    span = context.pop(_SPAN_KEY, None) if context else None
+    consumed = parsed.get("ConsumedCapacity")
+    if span is not None:
+        _end_call_span(span, parsed, consumed, http_response)
+    if not consumed:
+        return
+    # BatchWriteItem, BatchGetItem e le transazioni ritornano una lista per tabella
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    operation = model.name if model is not None else ""
+    usage = current_capacity.get()
+    for entry in consumed:
+        table = entry.get("TableName", "")
+        units = float(entry.get("CapacityUnits", 0))
+        metrics.inc(
+            "dynamodb_consumed_capacity_units_total",
+            units,
+            table=table,
+            operation=operation,
+        )
+        if usage is not None:
+            usage.add(table, operation, units)
+
+
+def _table_name(request_dict: Optional[Dict]) -> str:
+    # Il body viene decodificato solo per le richieste rifiutate
+    try:
+        return json.loads(request_dict["body"]).get("TableName", "")
+    except (KeyError, TypeError, ValueError):
+        return ""
+
+
+def _on_needs_retry(
+    response: Any = None,
+    operation: Any = None,
+    attempts: int = 0,
+    request_dict: Optional[Dict] = None,
+    **kwargs,
+) -> None:
+    """Conta i tentativi rifiutati per throttling, compresi quelli poi ritentati."""
+    if response is None:
+        return
+    code = response[1].get("Error", {}).get("Code")
+    if code not in THROTTLING_ERROR_CODES:
+        return
+    table = _table_name(request_dict)
+    operation_name = getattr(operation, "name", "")
+    metrics.inc(
+        "dynamodb_throttled_requests_total",
+        table=table,
+        operation=operation_name,
+        code=code,
+    )
+    logger.warning(
+        f"Throttling DynamoDB su {operation_name} (tabella '{table}', "
+        f"tentativo {attempts}): {code}"
+    )
+    span = (request_dict or {}).get("context", {}).get(_SPAN_KEY)
+    if span is not None:
+        span.set_attribute(
+            "aws.dynamodb.throttled_attempts",
+            span.attributes.get("aws.dynamodb.throttled_attempts", 0) + 1,
+        )
+
+
+# Chiavi del contesto botocore della chiamata in cui vengono conservati lo
+# span e la tabella letta dai parametri
+_SPAN_KEY = "users_trace_span"
+_TABLE_KEY = "users_trace_table"
+
+
+def _on_read_table_name(params: Dict, context: Optional[Dict] = None, **kwargs) -> None:
+    if tracer.enabled and context is not None and "TableName" in params:
+        context[_TABLE_KEY] = params["TableName"]
+
+
+def _on_start_call_span(
+    model: Any = None, context: Optional[Dict] = None, **kwargs
+) -> None:
+    """Apre lo span client della chiamata, figlio dello span corrente.
+
+    Viene eseguito per ultimo tra gli hook before-call: se uno degli altri
+    solleva (es. la scadenza della richiesta) la chiamata non parte e lo span
+    non viene aperto. Dopo questo punto lo chiudono after-call o after-call-error.
+    """
+    if not tracer.enabled or model is None or context is None:
+        return
+    attributes = {
+        "rpc.system": "aws-api",
+        "rpc.service": "DynamoDB",
+        "rpc.method": model.name,
+        "db.system": "dynamodb",
+    }
+    if _TABLE_KEY in context:
+        attributes["aws.dynamodb.table_names"] = [context[_TABLE_KEY]]
+    context[_SPAN_KEY] = tracer.start_span(
+        f"DynamoDB.{model.name}", SPAN_KIND_CLIENT, attributes
+    )
+
+
+def _end_call_span(span, parsed: Dict, consumed: Any, http_response: Any) -> None:
+    metadata = parsed.get("ResponseMetadata", {})
+    span.set_attribute("aws.request_id", metadata.get("RequestId", ""))
+    span.set_attribute("aws.retry_attempts", metadata.get("RetryAttempts", 0))
+    if http_response is not None:
+        span.set_attribute("http.response.status_code", http_response.status_code)
+    if consumed:
+        entries = [consumed] if isinstance(consumed, dict) else consumed
+        span.set_attribute(
+            "aws.dynamodb.consumed_capacity_units",
+            float(sum(float(entry.get("CapacityUnits", 0)) for entry in entries)),
+        )
+    if "Error" in parsed:
+        span.set_error(parsed["Error"].get("Code", ""))
+    tracer.end_span(span)
+
+
+def _on_after_call_error(
+    exception: Exception = None, context: Optional[Dict] = None, **kwargs
+) -> None:
+    span = context.pop(_SPAN_KEY, None) if context else None
+    if span is not None:
+        span.set_error(f"{type(exception).__name__}: {exception}")
+        tracer.end_span(span)
+
+
+def instrument_client(client) -> None:
+    """Registra gli hook di osservabilità sul client DynamoDB.
+
+    Args:
+        client (botocore.client.BaseClient): Client DynamoDB da instrumentare
+    """
+    client.meta.events.register("needs-retry.dynamodb", _on_needs_retry)
+    client.meta.events.register(
+        "before-parameter-build.dynamodb", _on_before_parameter_build
+    )
+    client.meta.events.register("after-call.dynamodb", _on_after_call)
+    client.meta.events.register("before-parameter-build.dynamodb", _on_read_table_name)
+    client.meta.events.register_last("before-call.dynamodb", _on_start_call_span)
+    client.meta.events.register("after-call-error.dynamodb", _on_after_call_error)
@@ -0,0 +1,258 @@
+"""Instradamento delle letture tra più endpoint DynamoDB (global table).
+
+Le scritture e le letture fortemente consistenti vanno sempre alla regione
+principale (``DYNAMODB_REGION``). Le letture eventualmente consistenti del
+client low-level vanno alla replica sana con la latenza media (EWMA) più
+bassa; se la chiamata fallisce per un errore di rete, di throttling o lato
+server, viene ripetuta sulla replica successiva e, come ultima risorsa,
+sulla regione principale. Un thread controlla periodicamente ogni replica
+con una GetItem, così una replica tornata disponibile o più veloce viene
+usata di nuovo.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Callable, Dict, List, Optional
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from ..config.db_credentials import DynamoCredentials
+from ..utils.custom_logger import LogSetupper
+from ..utils.metrics import metrics
+from .instrumentation import THROTTLING_ERROR_CODES
+
+logger = LogSetupper(__name__).setup()
+
+# Peso dell'ultimo campione nella media mobile esponenziale della latenza
+EWMA_ALPHA = 0.2
+# Errori per cui la stessa lettura può riuscire su un'altra replica
+FAILOVER_ERROR_CODES = THROTTLING_ERROR_CODES | {
+    "ResourceNotFoundException",
+    "InternalServerError",
+    "ServiceUnavailable",
+}
+# Operazioni la cui durata entra nella latenza media: una pagina di scan
+# dura molto più di una GetItem e renderebbe lenta la replica che la serve
+LATENCY_OPERATIONS = frozenset({"get_item"})
+
+metrics.describe(
+    "dynamodb_replica_reads_total",
+    "Letture instradate alle repliche per replica ed esito (ok, error)",
+)
+metrics.describe(
+    "dynamodb_replica_latency_seconds",
+    "Latenza media (EWMA) delle letture per replica",
+    "gauge",
+)
+metrics.describe(
+    "dynamodb_replica_healthy", "1 se la replica riceve letture, 0 altrimenti", "gauge"
+)
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """Replica DynamoDB: regione e, solo in ambiente local, URL dell'endpoint."""
+
+    region: str
+    url: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return self.url or self.region
+
+
+def parse_endpoints(value: str) -> List[Endpoint]:
+    """Esegue il parsing delle repliche, es. "eu-south-1,eu-west-1=http://localhost:8001".
+
+    Args:
+        value (str): Repliche separate da virgola nel formato "regione" o "regione=url"
+
+    Returns:
+        List[Endpoint]: Repliche nell'ordine indicato
+    """
+    endpoints = []
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        region, _, url = entry.partition("=")
+        endpoints.append(Endpoint(region.strip(), url.strip() or None))
+    return endpoints
+
+
+def replica_credentials(
+    credentials: DynamoCredentials, endpoint: Endpoint
+) -> DynamoCredentials:
+    """Credenziali della regione principale puntate su una replica."""
+    return replace(
+        credentials,
+        regionName=endpoint.region,
+        endpointUrl=endpoint.url or credentials.endpointUrl,
+        replicaEndpoints="",
+    )
+
+
+def is_failover_error(error: Exception) -> bool:
+    """True se la lettura fallita può essere ripetuta su un'altra replica."""
+    if isinstance(error, BotoCoreError):
+        return True
+    if isinstance(error, ClientError):
+        code = error.response.get("Error", {}).get("Code")
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+        return code in FAILOVER_ERROR_CODES or status >= 500
+    return False
+
+
+class Replica:
+    """Client di una replica con la sua latenza media e il suo stato di salute.
+
+    Args:
+        name (str): Nome della replica, usato nelle metriche
+        client (botocore.client.BaseClient): Client low-level della replica
+        home (bool): True per la regione principale
+    """
+
+    def __init__(self, name: str, client, home: bool = False) -> None:
+        self.name = name
+        self.client = client
+        self.home = home
+        self.latency: Optional[float] = None
+        self.healthy = True
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def record_success(self, seconds: Optional[float] = None) -> None:
+        with self._lock:
+            if seconds is not None:
+                self.latency = (
+                    seconds
+                    if self.latency is None
+                    else self.latency + EWMA_ALPHA * (seconds - self.latency)
+                )
+            self.failures = 0
+            self.healthy = True
+        if self.latency is not None:
+            metrics.set(
+                "dynamodb_replica_latency_seconds", self.latency, replica=self.name
+            )
+        metrics.set("dynamodb_replica_healthy", 1, replica=self.name)
+
+    def record_failure(self, threshold: int) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.failures >= threshold and self.healthy:
+                self.healthy = False
+                logger.warning(f"Replica {self.name} esclusa dalle letture")
+        if not self.healthy:
+            metrics.set("dynamodb_replica_healthy", 0, replica=self.name)
+
+
+class ReplicaRouter:
+    """Sceglie la replica per ogni lettura e passa alla successiva se fallisce.
+
+    Args:
+        home (Replica): Regione principale, sempre tra le candidate
+        replicas (List[Replica]): Altre repliche
+        failure_threshold (int): Errori consecutivi dopo cui una replica viene esclusa
+        health_check (Callable[[Replica], None]): Lettura di prova su una replica
+        interval (float): Secondi tra due controlli delle repliche
+    """
+
+    def __init__(
+        self,
+        home: Replica,
+        replicas: List[Replica],
+        failure_threshold: int,
+        health_check: Callable[[Replica], None],
+        interval: float,
+    ) -> None:
+        self.home = home
+        self.replicas = [home] + replicas
+        self.failure_threshold = failure_threshold
+        self.health_check = health_check
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def candidates(self) -> List[Replica]:
+        """Repliche sane in ordine di latenza, poi la regione principale se esclusa.
+
+        Le repliche non ancora misurate vengono prima, così ricevono un campione.
+        """
+        candidates = [r for r in self.replicas if r.healthy or r.home]
+        candidates.sort(
+            key=lambda r: (
+                not r.healthy,
+                r.latency is not None,
+                r.latency or 0,
+                not r.home,
+            )
+        )
+        return candidates
+
+    def call(self, operation: str, **kwargs) -> Dict:
+        """Esegue una lettura sulla replica migliore, con failover sulle successive.
+
+        Args:
+            operation (str): Metodo del client, es. "get_item"
+
+        Raises:
+            ClientError: Errore non legato alla replica, o errore dell'ultima replica tentata
+            BotoCoreError: Errore di rete dell'ultima replica tentata
+
+        Returns:
+            Dict: Risposta della prima replica che ha risposto
+        """
+        candidates = self.candidates()
+        for position, replica in enumerate(candidates):
+            start = time.perf_counter()
+            try:
+                response = getattr(replica.client, operation)(**kwargs)
+            except (BotoCoreError, ClientError) as e:
+                if not is_failover_error(e):
+                    raise
+                metrics.inc(
+                    "dynamodb_replica_reads_total",
+                    replica=replica.name,
+                    outcome="error",
+                )
+                replica.record_failure(self.failure_threshold)
+                if position == len(candidates) - 1:
+                    raise
+                logger.warning(f"Lettura fallita su {replica.name}, riprovo: {e}")
+                continue
+            elapsed = time.perf_counter() - start
+            replica.record_success(elapsed if operation in LATENCY_OPERATIONS else None)
+            metrics.inc(
+                "dynamodb_replica_reads_total", replica=replica.name, outcome="ok"
+            )
+            return response
+
+    def check(self) -> None:
+        """Esegue la lettura di prova su ogni replica e ne aggiorna latenza e stato."""
+        for replica in self.replicas:
+            start = time.perf_counter()
+            try:
+                self.health_check(replica)
+            except Exception as e:
+                logger.debug(f"Controllo della replica {replica.name} fallito: {e}")
+                # Una replica che non risponde al controllo viene esclusa subito
+                replica.record_failure(1)
+                continue
+            replica.record_success(time.perf_counter() - start)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name="replica-health", daemon=True
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        for replica in self.replicas:
+            replica.client.close()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.check()
+            self._stop.wait(self.interval)
@@ -0,0 +1,318 @@
+"""Indice di ricerca in memoria su nomi, email e indirizzi degli utenti.
+
+L'indice è invertito: ogni parola (minuscola e senza accenti) punta agli id
+degli utenti che la contengono, e il vocabolario ordinato permette la ricerca
+per prefisso con una bisezione. Viene costruito con una scan parallela e poi
+tenuto aggiornato leggendo il change feed, così ogni worker vede anche le
+scritture servite dagli altri processi e dagli import da riga di comando.
+"""
+
+import re
+import sys
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, bisect_right, insort
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..exceptions import ChangeTokenExpired
+from ..utils.custom_logger import LogSetupper
+from ..utils.metrics import metrics
+from .codec import USER_FIELDS
+from .dynamo_context_manager import (
+    FEED_SAFETY_LAG_US,
+    TOMBSTONES_FEED,
+    DynamoConnection,
+    now_micros,
+)
+from .user import UserRecord
+
+logger = LogSetupper(__name__).setup()
+
+SEARCH_FIELDS = (
+    "nome",
+    "cognome",
+    "email",
+    "indirizzo_residenza",
+    "indirizzo_fatturazione",
+)
+_TOKEN_RE = re.compile(r"[^\W_]+")
+FEED_PAGE_SIZE = 1000
+_MAX_CHAR = chr(0x10FFFF)
+
+metrics.describe(
+    "search_index_documents", "Utenti presenti nell'indice di ricerca", "gauge"
+)
+metrics.describe(
+    "search_index_lag_seconds",
+    "Secondi dall'ultimo aggiornamento dell'indice dal change feed",
+    "gauge",
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Divide un testo in parole minuscole, senza accenti né punteggiatura."""
+    if text.isascii():
+        return _TOKEN_RE.findall(text.lower())
+    folded = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(c for c in folded if not unicodedata.combining(c))
+    return _TOKEN_RE.findall(stripped)
+
+
+class SearchIndex:
+    """Indice invertito per prefisso, aggiornabile da più thread."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._docs: Dict[int, Tuple[Tuple[str, ...], UserRecord]] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        # Vocabolario ordinato: le parole con un prefisso sono contigue. Dopo
+        # un caricamento in blocco viene riordinato al primo utilizzo
+        self._terms: List[str] = []
+        self._unsorted = False
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def upsert(self, user: UserRecord) -> None:
+        """Aggiunge un utente o ne sostituisce la versione indicizzata."""
+        terms = _terms_of(user)
+        with self._lock:
+            self._sort_terms()
+            self._remove(user.user_id)
+            self._add(user, terms)
+
+    def load(self, users: Iterable[UserRecord]) -> None:
+        """Aggiunge utenti in blocco, senza mantenere ordinato il vocabolario."""
+        prepared = [(user, _terms_of(user)) for user in users]
+        with self._lock:
+            self._unsorted = True
+            for user, terms in prepared:
+                self._remove(user.user_id)
+                self._add(user, terms)
+
+    def remove(self, user_id: int) -> None:
+        with self._lock:
+            self._sort_terms()
+            self._remove(user_id)
+
+    def replace_with(self, other: "SearchIndex") -> None:
+        """Sostituisce il contenuto con quello di un indice appena costruito."""
+        with other._lock:
+            other._sort_terms()
+            state = other._docs, other._postings, other._terms
+        with self._lock:
+            self._docs, self._postings, self._terms = state
+            self._unsorted = False
+
+    def _sort_terms(self) -> None:
+        if self._unsorted:
+            self._terms = sorted(self._postings)
+            self._unsorted = False
+
+    def _add(self, user: UserRecord, terms: Tuple[str, ...]) -> None:
+        self._docs[user.user_id] = (terms, user)
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = set()
+                if not self._unsorted:
+                    insort(self._terms, term)
+            postings.add(user.user_id)
+
+    def _remove(self, user_id: int) -> None:
+        doc = self._docs.pop(user_id, None)
+        if doc is None:
+            return
+        for term in doc[0]:
+            postings = self._postings[term]
+            postings.discard(user_id)
+            if not postings:
+                del self._postings[term]
+                if not self._unsorted:
+                    del self._terms[bisect_left(self._terms, term)]
+
+    def _prefix_range(self, prefix: str) -> Tuple[int, int]:
+        """Posizioni nel vocabolario delle parole che iniziano con prefix."""
+        return (
+            bisect_left(self._terms, prefix),
+            bisect_right(self._terms, prefix + _MAX_CHAR),
+        )
+
+    def _range_size(self, bounds: Tuple[int, int], cap: float) -> float:
+        """Numero di utenti (con ripetizioni) in un intervallo, fino a cap."""
+        size = 0
+        for i in range(*bounds):
+            size += len(self._postings[self._terms[i]])
+            if size >= cap:
+                break
+        return size
+
+    def search(self, query: str, limit: int) -> List[UserRecord]:
+        """Cerca gli utenti che hanno, per ogni parola della query, una parola
+        che inizia con essa.
+
+        La parola con meno corrispondenze guida la ricerca: il suo intervallo
+        di vocabolario viene percorso in ordine e ci si ferma appena trovati
+        ``limit`` utenti, quindi anche i prefissi di una lettera costano poco.
+        Chi ha la parola esatta viene prima dei completamenti, in ordine
+        alfabetico; tra utenti con la stessa parola l'ordine non è definito.
+
+        Args:
+            query (str): Testo cercato, es. "ross via roma"
+            limit (int): Numero massimo di risultati
+
+        Returns:
+            List[UserRecord]: Utenti trovati
+        """
+        words = set(tokenize(query))
+        if not words:
+            return []
+        with self._lock:
+            self._sort_terms()
+            driver, bounds, best = None, (0, 0), float("inf")
+            for word in words:
+                word_bounds = self._prefix_range(word)
+                size = self._range_size(word_bounds, best)
+                if size < best:
+                    driver, bounds, best = word, word_bounds, size
+            others = [word for word in words if word != driver]
+
+            results: List[UserRecord] = []
+            seen: Set[int] = set()
+            for i in range(*bounds):
+                for user_id in self._postings[self._terms[i]]:
+                    if user_id in seen:
+                        continue
+                    seen.add(user_id)
+                    terms, user = self._docs[user_id]
+                    if all(any(t.startswith(w) for t in terms) for w in others):
+                        results.append(user)
+                        if len(results) == limit:
+                            return results
+            return results
+
+
+def _terms_of(user: UserRecord) -> Tuple[str, ...]:
+    # Parole internate: ogni parola è in memoria una volta sola, non per utente
+    text = " ".join([getattr(user, field) for field in SEARCH_FIELDS])
+    return tuple({sys.intern(term) for term in tokenize(text)})
+
+
+def _record_from_change(item: Dict) -> UserRecord:
+    return UserRecord(
+        **{field: item[field] for field in USER_FIELDS}, user_id=int(item["user_id"])
+    )
+
+
+class SearchIndexUpdater:
+    """Costruisce l'indice e lo aggiorna dal change feed in un thread dedicato.
+
+    Args:
+        index (SearchIndex): Indice da popolare
+        connection (DynamoConnection): Connessione dedicata al thread
+        segments (int): Segmenti della scan parallela iniziale
+        interval (float): Secondi tra due letture del change feed
+    """
+
+    def __init__(
+        self,
+        index: SearchIndex,
+        connection: DynamoConnection,
+        segments: int = 4,
+        interval: float = 1.0,
+    ) -> None:
+        self.index = index
+        self.connection = connection
+        self.segments = segments
+        self.interval = interval
+        self.ready = threading.Event()
+        self._stop = threading.Event()
+        self._since = 0
+        self._needs_build = True
+        self._refreshed_at: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name="search-index", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.connection.close()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self._needs_build:
+                    self.build()
+                else:
+                    self.refresh()
+            except ChangeTokenExpired:
+                # Aggiornamenti fermi oltre la retention: ricostruisco da zero,
+                # nel frattempo la ricerca usa l'indice precedente
+                logger.warning("Change feed scaduto, ricostruisco l'indice di ricerca")
+                self._needs_build = True
+                continue
+            except Exception as e:
+                logger.error(f"Errore nell'aggiornamento dell'indice di ricerca: {e}")
+            metrics.set("search_index_documents", len(self.index))
+            if self._refreshed_at is not None:
+                metrics.set(
+                    "search_index_lag_seconds", time.monotonic() - self._refreshed_at
+                )
+            self._stop.wait(self.interval)
+
+    def build(self) -> None:
+        """Costruisce l'indice con una scan parallela, un thread per segmento.
+
+        Il nuovo indice sostituisce quello servito solo a scan completata. Il
+        token del change feed viene preso prima della scan: le modifiche
+        avvenute durante la scan vengono poi riapplicate da ``refresh``.
+        """
+        since = now_micros()
+        fresh = SearchIndex()
+        # Il client low-level è thread-safe: lo creo qui e lo condividono i segmenti
+        self.connection.client
+        with ThreadPoolExecutor(max_workers=self.segments) as executor:
+            total = sum(
+                executor.map(
+                    lambda segment: self._scan_segment(fresh, segment),
+                    range(self.segments),
+                )
+            )
+        self.index.replace_with(fresh)
+        # Il feed riparte da un po' prima della scan: una scrittura appena
+        # precedente può non essere ancora visibile alla scan
+        self._since = max(since - FEED_SAFETY_LAG_US, 0)
+        self._needs_build = False
+        self.refresh()
+        self.ready.set()
+        logger.info(f"Indice di ricerca costruito con {total} utenti")
+
+    def _scan_segment(self, index: SearchIndex, segment: int) -> int:
+        count = 0
+        for users, _ in self.connection.scan_segment(segment, self.segments):
+            index.load(UserRecord(**user) for user in users)
+            count += len(users)
+        return count
+
+    def refresh(self) -> None:
+        """Applica all'indice le modifiche del change feed dall'ultimo token."""
+        while True:
+            changes, has_more, self._since = self.connection.get_changes(
+                self._since, FEED_PAGE_SIZE
+            )
+            for item in changes:
+                if item["feed"] == TOMBSTONES_FEED:
+                    self.index.remove(int(item["user_id"]))
+                else:
+                    self.index.upsert(_record_from_change(item))
+            if not has_more:
+                self._refreshed_at = time.monotonic()
+                return
@@ -0,0 +1,320 @@
+"""Cache degli utenti in memoria condivisa tra i worker di uvicorn.
+
+La cache è un file mappato in memoria (``/dev/shm`` se disponibile) con un
+layout fisso: un header e una tabella di slot di dimensione costante, dove
+l'utente ``user_id`` occupa lo slot ``user_id % slots``. Il processo padre di
+``serve.py`` la riempie con una scan e la tiene aggiornata dal change feed;
+i worker la mappano in sola lettura dei dati, quindi la memoria non cresce
+con il numero di worker e tutti condividono gli stessi hit.
+
+Layout dello slot (little endian)::
+
+    0   seq      u64  seqlock: dispari durante la scrittura del padre
+    8   dirty    u64  timestamp dell'ultima scrittura di un worker sull'utente
+    16  user_id  u64  0 se lo slot è vuoto
+    24  clean    u64  timestamp da cui il contenuto è aggiornato
+    32  length   u32  lunghezza del JSON
+    36  crc      u32  CRC32 del JSON
+    40  payload       JSON dell'utente, come ``detail`` di GET /v1/users/{id}
+
+Il padre è l'unico a scrivere i contenuti. Un worker che modifica un utente
+scrive solo ``dirty``: lo slot non viene più servito finché il padre non lo
+riempie con dati letti dopo quella scrittura. Python non espone barriere di
+memoria, per questo oltre al seqlock il lettore verifica il CRC del JSON.
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Optional
+
+import orjson
+
+from ..config.app_settings import AppSettings, get_settings
+from ..exceptions import ChangeTokenExpired
+from ..utils.custom_logger import LogSetupper
+from ..utils.metrics import metrics
+from .codec import USER_FIELDS
+from .dynamo_context_manager import (
+    FEED_SAFETY_LAG_US,
+    TOMBSTONES_FEED,
+    DynamoConnection,
+    now_micros,
+)
+from .user import UserRecord
+
+logger = LogSetupper(__name__).setup()
+
+MAGIC = b"USRCACH1"
+_HEADER = struct.Struct("<8sII")
+HEADER_SIZE = 64
+_U64 = struct.Struct("<Q")
+_SLOT = struct.Struct("<QQII")  # user_id, clean, length, crc
+SLOT_HEADER_SIZE = 40
+FEED_PAGE_SIZE = 1000
+
+metrics.describe(
+    "user_cache_lookups_total", "Letture della cache utenti condivisa per esito"
+)
+metrics.describe(
+    "user_cache_documents", "Utenti scritti nella cache condivisa dal padre", "gauge"
+)
+
+
+def cache_path(settings: AppSettings) -> str:
+    """Percorso del file della cache: USER_CACHE_PATH o, se vuoto, un file per
+    porta in /dev/shm (nella cartella temporanea se /dev/shm non esiste).
+    """
+    if settings.userCachePath:
+        return settings.userCachePath
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, f"users-cache-{settings.serverPort}")
+
+
+@lru_cache(maxsize=None)
+def get_user_cache() -> Optional["SharedUserCache"]:
+    """Ritorna la cache creata da serve.py, None se disattivata o non presente.
+
+    La cache esiste solo se il processo padre l'ha creata prima di avviare i
+    worker; con ``uvicorn main:app`` lanciato a mano le letture vanno sempre
+    su DynamoDB.
+    """
+    settings = get_settings()
+    if not settings.userCacheEnabled:
+        return None
+    try:
+        return SharedUserCache.open(cache_path(settings))
+    except (OSError, ValueError) as e:
+        logger.warning(f"Cache utenti condivisa non disponibile: {e}")
+        return None
+
+
+def invalidate_cached_user(user_id: int) -> None:
+    """Invalida l'utente nella cache condivisa, se attiva. Da chiamare dopo ogni scrittura."""
+    cache = get_user_cache()
+    if cache is not None:
+        cache.invalidate(user_id)
+
+
+class SharedUserCache:
+    """Tabella di slot a indirizzamento diretto su un file mappato in memoria."""
+
+    def __init__(self, path: str, mapped: mmap.mmap, slots: int, slot_size: int):
+        self.path = path
+        self._mm = mapped
+        self.slots = slots
+        self.slot_size = slot_size
+        # Serializza le scritture dei thread del padre sullo stesso slot
+        self._write_lock = threading.Lock()
+
+    @classmethod
+    def create(cls, path: str, slots: int, slot_size: int) -> "SharedUserCache":
+        """Crea (o azzera) il file della cache. Va chiamata dal padre prima dei worker."""
+        size = HEADER_SIZE + slots * slot_size
+        with open(path, "w+b") as f:
+            f.truncate(size)
+            mapped = mmap.mmap(f.fileno(), size)
+        _HEADER.pack_into(mapped, 0, MAGIC, slots, slot_size)
+        return cls(path, mapped, slots, slot_size)
+
+    @classmethod
+    def open(cls, path: str) -> "SharedUserCache":
+        """Mappa una cache creata dal padre, con la geometria scritta nell'header.
+
+        Raises:
+            ValueError: Se il file non è una cache utenti
+        """
+        with open(path, "r+b") as f:
+            mapped = mmap.mmap(f.fileno(), 0)
+        magic, slots, slot_size = _HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC or len(mapped) != HEADER_SIZE + slots * slot_size:
+            mapped.close()
+            raise ValueError(f"{path} non è una cache utenti valida")
+        return cls(path, mapped, slots, slot_size)
+
+    def close(self, unlink: bool = False) -> None:
+        self._mm.close()
+        if unlink:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+    def _offset(self, user_id: int) -> int:
+        return HEADER_SIZE + (user_id % self.slots) * self.slot_size
+
+    def get(self, user_id: int) -> Optional[bytes]:
+        """Ritorna il JSON dell'utente, None se assente, in scrittura o invalidato."""
+        mm, offset = self._mm, self._offset(user_id)
+        seq = _U64.unpack_from(mm, offset)[0]
+        slot_user, clean, length, crc = _SLOT.unpack_from(mm, offset + 16)
+        if seq & 1 or slot_user != user_id or length > self.slot_size:
+            metrics.inc("user_cache_lookups_total", outcome="miss")
+            return None
+        start = offset + SLOT_HEADER_SIZE
+        payload = mm[start : start + length]
+        dirty = _U64.unpack_from(mm, offset + 8)[0]
+        if (
+            _U64.unpack_from(mm, offset)[0] != seq
+            or zlib.crc32(payload) != crc
+            or dirty > clean
+        ):
+            metrics.inc("user_cache_lookups_total", outcome="miss")
+            return None
+        metrics.inc("user_cache_lookups_total", outcome="hit")
+        return payload
+
+    def put(self, user_id: int, payload: bytes, clean: int) -> bool:
+        """Scrive un utente nel suo slot (solo dal padre).
+
+        Args:
+            user_id (int): Id dell'utente
+            payload (bytes): JSON dell'utente
+            clean (int): Timestamp (µs) di inizio della lettura da cui viene il JSON
+
+        Returns:
+            bool: False se il JSON non entra nello slot, che in quel caso viene svuotato
+        """
+        if len(payload) > self.slot_size - SLOT_HEADER_SIZE:
+            self.remove(user_id)
+            return False
+        mm, offset = self._mm, self._offset(user_id)
+        start = offset + SLOT_HEADER_SIZE
+        crc = zlib.crc32(payload)
+        with self._write_lock:
+            seq = _U64.unpack_from(mm, offset)[0]
+            _U64.pack_into(mm, offset, seq + 1)
+            _SLOT.pack_into(mm, offset + 16, user_id, clean, len(payload), crc)
+            mm[start : start + len(payload)] = payload
+            _U64.pack_into(mm, offset, seq + 2)
+        return True
+
+    def remove(self, user_id: int) -> None:
+        """Svuota lo slot dell'utente, se lo contiene (solo dal padre)."""
+        mm, offset = self._mm, self._offset(user_id)
+        with self._write_lock:
+            if _SLOT.unpack_from(mm, offset + 16)[0] != user_id:
+                return
+            seq = _U64.unpack_from(mm, offset)[0]
+            _U64.pack_into(mm, offset, seq + 1)
+            _SLOT.pack_into(mm, offset + 16, 0, 0, 0, 0)
+            _U64.pack_into(mm, offset, seq + 2)
+
+    def invalidate(self, user_id: int) -> None:
+        """Segna l'utente come modificato: i worker smettono di servirlo dalla cache.
+
+        Va chiamata dopo la scrittura su DynamoDB. Tocca solo il campo dirty,
+        così non serve coordinarsi con il padre né con gli altri worker.
+        """
+        _U64.pack_into(self._mm, self._offset(user_id) + 8, now_micros())
+
+
+def _payload(item: Dict) -> bytes:
+    record = UserRecord(
+        **{field: item[field] for field in USER_FIELDS}, user_id=int(item["user_id"])
+    )
+    return orjson.dumps(record)
+
+
+class UserCacheFiller:
+    """Riempie la cache con una scan e la aggiorna dal change feed, in un thread.
+
+    Gira nel processo padre di ``serve.py``, con una connessione dedicata.
+
+    Args:
+        cache (SharedUserCache): Cache da riempire
+        connection (DynamoConnection): Connessione dedicata al thread
+        segments (int): Segmenti della scan parallela iniziale
+        interval (float): Secondi tra due letture del change feed
+    """
+
+    def __init__(
+        self,
+        cache: SharedUserCache,
+        connection: DynamoConnection,
+        segments: int = 4,
+        interval: float = 1.0,
+    ) -> None:
+        self.cache = cache
+        self.connection = connection
+        self.segments = segments
+        self.interval = interval
+        self._stop = threading.Event()
+        self._since = 0
+        self._needs_fill = True
+        self._documents = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name="user-cache", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.connection.close()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self._needs_fill:
+                    self.fill()
+                else:
+                    self.refresh()
+            except ChangeTokenExpired:
+                logger.warning("Change feed scaduto, riempio di nuovo la cache utenti")
+                self._needs_fill = True
+                continue
+            except Exception as e:
+                logger.error(f"Errore nell'aggiornamento della cache utenti: {e}")
+            metrics.set("user_cache_documents", self._documents)
+            self._stop.wait(self.interval)
+
+    def fill(self) -> None:
+        """Scrive nella cache tutti gli utenti con una scan parallela."""
+        since = now_micros()
+        # Il client low-level è thread-safe: lo creo qui e lo condividono i segmenti
+        self.connection.client
+        with ThreadPoolExecutor(max_workers=self.segments) as executor:
+            self._documents = sum(
+                executor.map(
+                    lambda segment: self._fill_segment(segment, since),
+                    range(self.segments),
+                )
+            )
+        # Come per l'indice di ricerca, il feed riparte da un po' prima della scan
+        self._since = max(since - FEED_SAFETY_LAG_US, 0)
+        self._needs_fill = False
+        self.refresh()
+        logger.info(f"Cache utenti riempita con {self._documents} utenti")
+
+    def _fill_segment(self, segment: int, clean: int) -> int:
+        count = 0
+        for users, _ in self.connection.scan_segment(segment, self.segments):
+            for user in users:
+                count += self.cache.put(user["user_id"], orjson.dumps(user), clean)
+        return count
+
+    def refresh(self) -> None:
+        """Applica alla cache le modifiche del change feed dall'ultimo token."""
+        clean = now_micros()
+        while True:
+            changes, has_more, self._since = self.connection.get_changes(
+                self._since, FEED_PAGE_SIZE
+            )
+            for item in changes:
+                user_id = int(item["user_id"])
+                if item["feed"] == TOMBSTONES_FEED:
+                    self.cache.remove(user_id)
+                else:
+                    self.cache.put(user_id, _payload(item), clean)
+            if not has_more:
+                return
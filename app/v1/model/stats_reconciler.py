@@ -0,0 +1,76 @@
+"""Riconciliazione periodica delle statistiche degli utenti."""
+
+import threading
+from typing import Optional
+
+from ..utils.custom_logger import LogSetupper
+from ..utils.metrics import metrics
+from .dynamo_context_manager import DynamoConnection
+
+logger = LogSetupper(__name__).setup()
+
+metrics.describe(
+    "user_stats_reconciliations_total",
+    "Riconciliazioni delle statistiche utenti completate",
+    "counter",
+)
+metrics.describe(
+    "user_stats_drift",
+    "Differenza sul totale utenti corretta dall'ultima riconciliazione",
+    "gauge",
+)
+
+
+class StatsReconciler:
+    """Ricalcola le statistiche con una scan in un thread dedicato.
+
+    Ogni worker ha il suo thread, ma la riconciliazione viene presa in carico
+    con una scrittura condizionale: a ogni intervallo la scan la esegue un
+    solo worker. La prima avviene all'avvio se le statistiche non sono mai
+    state riconciliate.
+
+    Args:
+        connection (DynamoConnection): Connessione dedicata al thread
+        interval (int): Secondi tra due riconciliazioni
+    """
+
+    def __init__(self, connection: DynamoConnection, interval: int) -> None:
+        self.connection = connection
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name="stats-reconciler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.connection.close()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.connection.claim_stats_reconciliation(self.interval):
+                    self.reconcile()
+            except Exception as e:
+                logger.error(f"Errore nella riconciliazione delle statistiche: {e}")
+            self._stop.wait(self.interval)
+
+    def reconcile(self) -> None:
+        """Ricalcola le statistiche e registra la deriva corretta."""
+        correction = self.connection.reconcile_stats()
+        if correction is None:
+            return
+        drift = correction.get("total", 0)
+        metrics.inc("user_stats_reconciliations_total")
+        metrics.set("user_stats_drift", drift)
+        if drift:
+            logger.warning(f"Statistiche utenti corrette: totale {drift:+d}")
+        logger.info(
+            f"Statistiche utenti riconciliate: {len(correction)} contatori corretti"
+        )
@@ -1,16 +1,50 @@
-from pydantic import EmailStr, BaseModel
+from dataclasses import dataclass
 
+from pydantic import BaseModel
+
+from .validators import CodiceFiscale, Email, PartitaIva
+
+
+class UserData(BaseModel):
+    """Campi dell'utente senza validazione di formato, usati in lettura."""
 
-class User(BaseModel):
     nome: str
     cognome: str
     cf: str
     p_iva: str
-    email: EmailStr
+    email: str
     n_telefono: str
     indirizzo_residenza: str
     indirizzo_fatturazione: str
 
 
-class UserResponse(User):
+class User(UserData):
+    """Utente in ingresso a inserimento e aggiornamento, con i formati validati."""
+
+    cf: CodiceFiscale
+    p_iva: PartitaIva
+    email: Email
+
+
+class UserResponse(UserData):
+    user_id: int
+
+
+@dataclass(slots=True)
+class UserRecord:
+    """Riga utente compatta usata dalla lista utenti, dalla lettura alla risposta.
+
+    Senza ``__dict__`` e senza validazione: i tipi sono garantiti dal codec,
+    e orjson serializza la dataclass direttamente. L'ordine dei campi è lo
+    stesso del JSON di ``UserResponse``.
+    """
+
+    nome: str
+    cognome: str
+    cf: str
+    p_iva: str
+    email: str
+    n_telefono: str
+    indirizzo_residenza: str
+    indirizzo_fatturazione: str
     user_id: int
@@ -0,0 +1,74 @@
+"""Filtri, ordinamento e limite della lista utenti."""
+
+import heapq
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import List, Optional, Tuple, Union
+
+from .codec import USER_FIELDS
+from .user import UserRecord
+
+FILTER_OPERATORS = ("eq", "prefix", "contains")
+QUERY_FIELDS = ("user_id",) + USER_FIELDS
+MAX_LIST_LIMIT = 1000
+# Con l'ordinamento serve sempre un limite: è la dimensione dell'heap top-k
+DEFAULT_SORTED_LIMIT = 100
+
+
+@dataclass(frozen=True)
+class UserFilter:
+    """Condizione su un attributo, tradotta in FilterExpression DynamoDB."""
+
+    field: str
+    op: str
+    value: Union[str, int]
+
+
+@dataclass(frozen=True)
+class UserQuery:
+    """Parametri della lista utenti. Il default ritorna tutti gli utenti."""
+
+    filters: Tuple[UserFilter, ...] = ()
+    sort: Optional[str] = None
+    descending: bool = False
+    limit: Optional[int] = None
+
+    def top(self, users: List[UserRecord]) -> List[UserRecord]:
+        """Ritorna i primi ``limit`` utenti secondo l'ordinamento richiesto.
+
+        A parità di valore l'ordine è dato dallo user_id, così il risultato
+        non dipende dall'ordine delle pagine della scan.
+        """
+        key = attrgetter(self.sort, "user_id")
+        select = heapq.nlargest if self.descending else heapq.nsmallest
+        return select(self.limit, users, key=key)
+
+
+def parse_filter(raw: str) -> UserFilter:
+    """Legge un filtro nella forma ``campo:valore`` o ``campo:operatore:valore``.
+
+    Senza operatore il confronto è di uguaglianza. Sullo user_id è ammessa
+    solo l'uguaglianza.
+
+    Args:
+        raw (str): Valore del parametro filter, es. "cognome:prefix:Ro"
+
+    Raises:
+        ValueError: Se campo, operatore o valore non sono validi
+
+    Returns:
+        UserFilter: Filtro da applicare alla scan
+    """
+    field, _, rest = raw.partition(":")
+    op, separator, value = rest.partition(":")
+    if not separator or op not in FILTER_OPERATORS:
+        op, value = "eq", rest
+    if field not in QUERY_FIELDS:
+        raise ValueError(f"Campo non filtrabile: '{field}'")
+    if not value:
+        raise ValueError(f"Valore mancante nel filtro '{raw}'")
+    if field == "user_id":
+        if op != "eq":
+            raise ValueError("Sullo user_id è ammessa solo l'uguaglianza")
+        return UserFilter(field, op, int(value))
+    return UserFilter(field, op, value)
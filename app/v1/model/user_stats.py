@@ -0,0 +1,153 @@
+"""Statistiche aggregate degli utenti, tenute come contatori nella tabella di metadati.
+
+L'item ``users#stats`` contiene il numero di utenti, quanti hanno una partita
+IVA e il numero di utenti per provincia di residenza, un attributo
+``province#<sigla>`` per provincia. I contatori vengono aggiornati con ADD
+dopo la scrittura dell'utente, su uno shard a caso tra ``users#stats``,
+``users#stats#1``, ... così le scritture concorrenti non si contendono un
+solo item; leggere le statistiche costa una BatchGetItem indipendentemente
+dalla dimensione della tabella. Una scan periodica di riconciliazione corregge
+le derive: aggiornamenti persi tra la scrittura dell'utente e quella dei
+contatori e import, che sovrascrive gli utenti senza aggiornare i contatori.
+"""
+
+import re
+from typing import Dict, Iterable, Optional, Union
+
+from .user import User
+
+STATS_KEY = "users#stats"
+PROVINCE_PREFIX = "province#"
+UNKNOWN_PROVINCE = "ND"
+# Sigla tra parentesi in fondo all'indirizzo, es. "Via Roma 1, 20121 Milano (MI)"
+_PROVINCE_RE = re.compile(r"\(\s*([A-Za-z]{2})\s*\)\s*$")
+
+UserLike = Union[User, Dict]
+
+
+def shard_key(key: str, shard: int) -> str:
+    """Chiave di uno shard di un contatore: lo shard 0 usa la chiave senza suffisso."""
+    return key if shard == 0 else f"{key}#{shard}"
+
+
+def province_of(address: str) -> str:
+    """Ritorna la sigla della provincia di un indirizzo, "ND" se non presente."""
+    match = _PROVINCE_RE.search(address or "")
+    return match.group(1).upper() if match else UNKNOWN_PROVINCE
+
+
+def _field(user: UserLike, name: str) -> str:
+    return user[name] if isinstance(user, dict) else getattr(user, name)
+
+
+def stats_delta(users: Iterable[UserLike], sign: int = 1) -> Dict[str, int]:
+    """Calcola la variazione dei contatori per gli utenti indicati.
+
+    Args:
+        users (Iterable[UserLike]): Utenti come modelli o item DynamoDB
+        sign (int): 1 per utenti aggiunti, -1 per utenti rimossi
+
+    Returns:
+        Dict[str, int]: Variazione per attributo dell'item delle statistiche
+    """
+    delta: Dict[str, int] = {}
+    for user in users:
+        keys = [
+            "total",
+            PROVINCE_PREFIX + province_of(_field(user, "indirizzo_residenza")),
+        ]
+        if _field(user, "p_iva"):
+            keys.append("with_p_iva")
+        for key in keys:
+            delta[key] = delta.get(key, 0) + sign
+    return delta
+
+
+def stats_code(user: UserLike) -> int:
+    """Codifica in un intero da 16 bit il contributo di un utente alle statistiche.
+
+    La riconciliazione lo usa per ricordare con 2 byte per utente cosa ha
+    letto la scan. 0 indica un utente che non contribuisce.
+    """
+    first, second = province_of(_field(user, "indirizzo_residenza"))
+    province = (ord(first) - ord("A")) * 26 + ord(second) - ord("A")
+    return 1 + province * 2 + bool(_field(user, "p_iva"))
+
+
+def code_delta(code: int, sign: int = 1) -> Dict[str, int]:
+    """Variazione dei contatori per un utente codificato con stats_code."""
+    if not code:
+        return {}
+    province, p_iva = divmod(code - 1, 2)
+    first, second = divmod(province, 26)
+    delta = {
+        "total": sign,
+        PROVINCE_PREFIX + chr(ord("A") + first) + chr(ord("A") + second): sign,
+    }
+    if p_iva:
+        delta["with_p_iva"] = sign
+    return delta
+
+
+def stats_counters(item: Optional[Dict]) -> Dict[str, int]:
+    """Ritorna i soli contatori dell'item delle statistiche."""
+    return {
+        key: int(value)
+        for key, value in (item or {}).items()
+        if key in ("total", "with_p_iva") or key.startswith(PROVINCE_PREFIX)
+    }
+
+
+def combine(*deltas: Dict[str, int]) -> Dict[str, int]:
+    """Somma più variazioni, scartando gli attributi che si annullano."""
+    total: Dict[str, int] = {}
+    for delta in deltas:
+        for key, value in delta.items():
+            total[key] = total.get(key, 0) + value
+    return {key: value for key, value in total.items() if value}
+
+
+def stats_update(delta: Dict[str, int], shard: int = 0) -> Optional[Dict]:
+    """Parametri di UpdateItem (formato resource) che applicano una variazione.
+
+    Args:
+        delta (Dict[str, int]): Variazione dei contatori
+        shard (int): Shard dell'item delle statistiche da aggiornare
+
+    Returns:
+        Optional[Dict]: Key, UpdateExpression e valori; None se non c'è nulla da aggiornare
+    """
+    delta = {key: value for key, value in delta.items() if value}
+    if not delta:
+        return None
+    names, values, parts = {}, {}, []
+    for i, (key, value) in enumerate(sorted(delta.items())):
+        names[f"#s{i}"] = key
+        values[f":s{i}"] = value
+        parts.append(f"#s{i} :s{i}")
+    return {
+        "Key": {"pk": shard_key(STATS_KEY, shard)},
+        "UpdateExpression": "ADD " + ", ".join(parts),
+        "ExpressionAttributeNames": names,
+        "ExpressionAttributeValues": values,
+    }
+
+
+def stats_from_item(item: Optional[Dict]) -> Dict:
+    """Converte l'item delle statistiche nel formato della risposta."""
+    item = item or {}
+    total = int(item.get("total", 0))
+    with_p_iva = int(item.get("with_p_iva", 0))
+    by_province = {
+        key[len(PROVINCE_PREFIX) :]: int(value)
+        for key, value in sorted(item.items())
+        if key.startswith(PROVINCE_PREFIX) and int(value) > 0
+    }
+    reconciled_at = item.get("reconciled_at")
+    return {
+        "total": total,
+        "with_p_iva": with_p_iva,
+        "private": total - with_p_iva,
+        "by_province": by_province,
+        "reconciled_at": int(reconciled_at) if reconciled_at is not None else None,
+    }
@@ -0,0 +1,144 @@
+"""Validatori pydantic v2 per i campi dell'utente.
+
+I validatori usano espressioni regolari precompilate e controlli di checksum
+locali, senza interrogazioni DNS, per mantenere basso il costo per richiesta.
+"""
+
+import re
+from typing import Annotated
+
+from email_validator import EmailNotValidError, validate_email as _strict_validate
+from pydantic import AfterValidator
+
+from ..config.app_settings import get_settings
+
+# Validazione sintattica: local part e dominio con almeno un punto
+_EMAIL_RE = re.compile(
+    r"^[A-Za-z0-9.!#$%&'*+/=?^_`{|}~-]+@"
+    r"[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?"
+    r"(?:\.[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?)+$"
+)
+
+# Codice fiscale delle persone fisiche, incluse le sostituzioni per omocodia
+_CF_RE = re.compile(
+    r"^[A-Z]{6}[0-9LMNPQRSTUV]{2}[ABCDEHLMPRST][0-9LMNPQRSTUV]{2}"
+    r"[A-Z][0-9LMNPQRSTUV]{3}[A-Z]$"
+)
+
+# Partita IVA e codice fiscale numerico (soggetti diversi dalle persone fisiche)
+_P_IVA_RE = re.compile(r"^[0-9]{11}$")
+
+# Valori dei caratteri in posizione dispari per il calcolo del carattere di controllo
+_CF_ODD = dict(
+    zip(
+        "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ",
+        [1, 0, 5, 7, 9, 13, 15, 17, 19, 21]
+        + [1, 0, 5, 7, 9, 13, 15, 17, 19, 21, 2, 4, 18, 20, 11, 3, 6, 8, 12, 14]
+        + [16, 10, 22, 25, 24, 23],
+    )
+)
+_CF_EVEN = {
+    **{str(digit): digit for digit in range(10)},
+    **{chr(ord("A") + i): i for i in range(26)},
+}
+
+
+def validate_email(value: str) -> str:
+    """Valida un indirizzo email.
+
+    In modalità fast il controllo è solo sintattico; in modalità strict viene
+    usato email_validator, sempre senza verifiche di deliverability.
+
+    Args:
+        value (str): Indirizzo email da validare
+
+    Raises:
+        ValueError: Se l'indirizzo non è valido
+
+    Returns:
+        str: L'indirizzo email normalizzato
+    """
+    if get_settings().validationMode == "strict":
+        try:
+            return _strict_validate(value, check_deliverability=False).normalized
+        except EmailNotValidError as e:
+            raise ValueError(f"Indirizzo email non valido: {e}")
+
+    value = value.strip()
+    if len(value) > 254 or not _EMAIL_RE.match(value):
+        raise ValueError("Indirizzo email non valido")
+    return value
+
+
+def _p_iva_checksum(value: str) -> bool:
+    """True se l'ultima delle 11 cifre è la cifra di controllo corretta."""
+    total = 0
+    for i, char in enumerate(value[:10]):
+        digit = int(char)
+        if i % 2 == 1:
+            digit *= 2
+            if digit > 9:
+                digit -= 9
+        total += digit
+    return (10 - total % 10) % 10 == int(value[10])
+
+
+def validate_cf(value: str) -> str:
+    """Valida formato e carattere di controllo di un codice fiscale.
+
+    Sono ammessi il codice di 16 caratteri delle persone fisiche e quello
+    numerico di 11 cifre (società, enti, codici provvisori), che ha la stessa
+    cifra di controllo della partita IVA.
+
+    Args:
+        value (str): Codice fiscale da validare
+
+    Raises:
+        ValueError: Se il codice fiscale non è valido
+
+    Returns:
+        str: Il codice fiscale in maiuscolo
+    """
+    value = value.strip().upper()
+    if _P_IVA_RE.match(value):
+        if not _p_iva_checksum(value):
+            raise ValueError("Cifra di controllo del codice fiscale non valida")
+        return value
+    if not _CF_RE.match(value):
+        raise ValueError("Formato del codice fiscale non valido")
+    total = sum(
+        _CF_ODD[char] if i % 2 == 0 else _CF_EVEN[char]
+        for i, char in enumerate(value[:15])
+    )
+    if chr(ord("A") + total % 26) != value[15]:
+        raise ValueError("Carattere di controllo del codice fiscale non valido")
+    return value
+
+
+def validate_p_iva(value: str) -> str:
+    """Valida formato e cifra di controllo di una partita IVA.
+
+    La stringa vuota è ammessa e indica un utente privato senza partita IVA.
+
+    Args:
+        value (str): Partita IVA da validare
+
+    Raises:
+        ValueError: Se la partita IVA non è valida
+
+    Returns:
+        str: La partita IVA senza spazi
+    """
+    value = value.strip()
+    if not value:
+        return value
+    if not _P_IVA_RE.match(value):
+        raise ValueError("Formato della partita IVA non valido")
+    if not _p_iva_checksum(value):
+        raise ValueError("Cifra di controllo della partita IVA non valida")
+    return value
+
+
+Email = Annotated[str, AfterValidator(validate_email)]
+CodiceFiscale = Annotated[str, AfterValidator(validate_cf)]
+PartitaIva = Annotated[str, AfterValidator(validate_p_iva)]
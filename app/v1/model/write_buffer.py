@@ -0,0 +1,131 @@
+"""Buffer asincrono per l'inserimento a blocchi (write-behind) degli utenti."""
+
+import asyncio
+from typing import List, Optional, Set, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from ..exceptions import DeadlineExceeded
+from .deadline import current_deadline
+from .dynamo_context_manager import DynamoConnection
+from .instrumentation import CapacityUsage, current_capacity
+from .user import User
+from ..utils.custom_logger import LogSetupper
+
+logger = LogSetupper(__name__).setup()
+
+
+class InsertBuffer:
+    """Raccoglie gli inserimenti concorrenti e li scrive con BatchWriteItem.
+
+    Il buffer viene svuotato quando raggiunge max_batch_size elementi oppure
+    dopo max_delay secondi dal primo elemento in attesa. Ogni chiamante attende
+    solo la future del proprio utente, che viene risolta con l'id assegnato
+    quando il blocco che lo contiene è stato scritto su DynamoDB. La capacità
+    consumata dal blocco viene ripartita in parti uguali tra le sue richieste.
+    Il flush non ha la scadenza di nessuna richiesta: ogni chiamante smette di
+    attendere alla propria scadenza, ma il blocco viene scritto comunque.
+    """
+
+    def __init__(
+        self,
+        connection: DynamoConnection,
+        max_batch_size: int = 25,
+        max_delay: float = 0.01,
+    ) -> None:
+        self.connection = connection
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self._pending: List[Tuple[User, asyncio.Future, Optional[CapacityUsage]]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: Set[asyncio.Task] = set()
+        # Un solo flush alla volta: la connessione boto3 non è thread-safe e
+        # nel frattempo i nuovi inserimenti si accumulano nel blocco successivo
+        self._lock = asyncio.Lock()
+
+    async def submit(self, user: User) -> int:
+        """Accoda un utente e attende che venga scritto su DynamoDB.
+
+        Args:
+            user (User): Dettagli dell'utente da inserire
+
+        Raises:
+            DeadlineExceeded: Se la richiesta scade prima che il blocco sia scritto
+
+        Returns:
+            int: Id assegnato all'utente
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((user, future, current_capacity.get()))
+        if len(self._pending) >= self.max_batch_size:
+            self._schedule_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._schedule_flush)
+        # Lo shield evita che la cancellazione della richiesta annulli la future
+        # condivisa con il flush: l'utente viene comunque scritto
+        deadline = current_deadline.get()
+        remaining = None if deadline is None else deadline.remaining()
+        if remaining is None:
+            return await asyncio.shield(future)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), remaining)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("BatchWriteItem", deadline.cancelled)
+
+    def _schedule_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.create_task(self._flush(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(
+        self, batch: List[Tuple[User, asyncio.Future, Optional[CapacityUsage]]]
+    ) -> None:
+        # Il task ha un contesto proprio: la capacità del blocco non finisce
+        # nell'accumulatore della richiesta che ha causato il flush, e la
+        # scadenza di quella richiesta non blocca le scritture delle altre
+        batch_usage = CapacityUsage()
+        current_capacity.set(batch_usage)
+        current_deadline.set(None)
+        async with self._lock:
+            try:
+                user_ids = await run_in_threadpool(
+                    self.connection.insert_users, [user for user, _, _ in batch]
+                )
+            except Exception as e:
+                logger.error(f"Errore nella scrittura di {len(batch)} utenti: {e}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            finally:
+                _share_usage(batch_usage, [usage for _, _, usage in batch])
+
+        logger.debug(f"Scritto blocco di {len(batch)} utenti")
+        for (_, future, _), user_id in zip(batch, user_ids):
+            if not future.done():
+                future.set_result(user_id)
+
+    async def close(self) -> None:
+        """Scrive gli utenti ancora in attesa e attende i flush in corso."""
+        self._schedule_flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+
+def _share_usage(
+    batch_usage: CapacityUsage, requests: List[Optional[CapacityUsage]]
+) -> None:
+    """Ripartisce la capacità consumata da un blocco tra le richieste che lo compongono."""
+    share = 1 / len(requests)
+    for usage in requests:
+        if usage is None:
+            continue
+        for (table, operation), units in batch_usage.by_operation.items():
+            usage.add(table, operation, units * share)
@@ -5,16 +5,30 @@ from .controller import (
     ready,
     insert_user,
     delete_user,
+    delete_users,
     get_users,
+    search_users,
+    get_stats,
     get_user,
     update_user,
+    get_changes,
+    metrics,
+    admin_profiling,
 )
 
 router_v1 = APIRouter(prefix="/v1")
 
 router_v1.include_router(ready.router, tags=["Ready"])
+router_v1.include_router(metrics.router, tags=["Metrics"])
+router_v1.include_router(admin_profiling.router, tags=["Admin"])
 router_v1.include_router(insert_user.router, tags=["Insert new user"])
 router_v1.include_router(delete_user.router, tags=["Delete a user"])
+router_v1.include_router(delete_users.router, tags=["Delete users"])
 router_v1.include_router(get_users.router, tags=["Get all users"])
+# Da includere prima di /users/{user_id}, altrimenti "changes", "search" e
+# "stats" vengono letti come user_id
+router_v1.include_router(get_changes.router, tags=["Get user changes"])
+router_v1.include_router(search_users.router, tags=["Search users"])
+router_v1.include_router(get_stats.router, tags=["User statistics"])
 router_v1.include_router(get_user.router, tags=["Get user details"])
 router_v1.include_router(update_user.router, tags=["Update user details"])
@@ -0,0 +1 @@
+"""Strumenti a riga di comando per la manutenzione della tabella utenti."""
@@ -0,0 +1,416 @@
+"""CLI per l'import e l'export massivo degli utenti in NDJSON o CSV.
+
+Entrambi i comandi lavorano in streaming con memoria limitata, quindi
+gestiscono anche file più grandi della RAM disponibile:
+
+- export: scan parallela della tabella, un thread per segmento con una propria
+  connessione; le pagine passano da una coda limitata a un unico writer.
+- import: lettura riga per riga, validazione con il modello ``User`` e scrittura
+  a blocchi con BatchWriteItem. I record senza id aggiornano anche le
+  statistiche; quelli con id sovrascrivono gli utenti esistenti senza
+  toccarle, quindi a fine import le statistiche vengono ricalcolate con una
+  scan (``--no-reconcile`` per lasciarle alla riconciliazione periodica).
+
+Con ``--checkpoint`` lo stato viene salvato dopo ogni pagina (export) o blocco
+(import) e un nuovo avvio con lo stesso file riprende da dove si era fermato.
+La ripresa è at-least-once: dopo un'interruzione può ripetersi l'ultima
+pagina o l'ultimo blocco.
+
+Uso (dalla cartella app):
+    python -m v1.tools.users export users.ndjson --segments 4
+    python -m v1.tools.users import users.csv --checkpoint import.ckpt
+"""
+
+import argparse
+import csv
+import json
+import os
+import queue
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from botocore.exceptions import ClientError
+from pydantic import ValidationError
+
+from ..exceptions import DynamoTableDoesNotExist
+from ..model.dynamo_context_manager import DynamoConnection
+from ..model.user import User, UserData
+from ..utils.custom_logger import LogSetupper
+
+logger = LogSetupper(__name__).setup()
+
+FIELDS = ["user_id"] + list(UserData.model_fields)
+FORMATS = ("ndjson", "csv")
+# Pagine in attesa di essere scritte: limita la memoria usata dall'export
+QUEUE_SIZE = 8
+_SEGMENT_DONE = object()
+
+
+def detect_format(path: str, explicit: Optional[str] = None) -> str:
+    """Determina il formato del file dall'opzione esplicita o dall'estensione.
+
+    Args:
+        path (str): Percorso del file
+        explicit (Optional[str]): Formato indicato da riga di comando
+
+    Raises:
+        ValueError: Se il formato non è riconosciuto
+
+    Returns:
+        str: "ndjson" oppure "csv"
+    """
+    if explicit:
+        return explicit
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".ndjson", ".jsonl", ".json"):
+        return "ndjson"
+    raise ValueError(f"Impossibile determinare il formato di '{path}', usa --format")
+
+
+# Checkpoint
+
+
+def load_checkpoint(path: Optional[str]) -> Dict:
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(path: Optional[str], state: Dict) -> None:
+    """Salva il checkpoint in modo atomico (scrittura su file temporaneo e rename)."""
+    if not path:
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+# Lettura e scrittura dei file
+
+
+def read_ndjson(f: TextIO) -> Iterator[Dict]:
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def read_csv(f: TextIO) -> Iterator[Dict]:
+    yield from csv.DictReader(f)
+
+
+def read_records(f: TextIO, fmt: str) -> Iterator[Dict]:
+    """Ritorna un generatore dei record del file, uno per riga."""
+    return read_ndjson(f) if fmt == "ndjson" else read_csv(f)
+
+
+class RecordWriter:
+    """Scrive i record su file nel formato richiesto, solo con i campi utente."""
+
+    def __init__(self, f: TextIO, fmt: str, write_header: bool):
+        self._f = f
+        self._csv = None
+        if fmt == "csv":
+            self._csv = csv.DictWriter(f, fieldnames=FIELDS, extrasaction="ignore")
+            if write_header:
+                self._csv.writeheader()
+
+    def write(self, items: Iterable[Dict]) -> int:
+        count = 0
+        for item in items:
+            record = {field: item.get(field) for field in FIELDS}
+            if self._csv is not None:
+                self._csv.writerow(record)
+            else:
+                self._f.write(json.dumps(record) + "\n")
+            count += 1
+        return count
+
+    def flush(self) -> None:
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+
+# Export
+
+
+def _scan_worker(
+    segment: int,
+    total_segments: int,
+    start_key: Optional[Dict],
+    pages: "queue.Queue",
+    stop: threading.Event,
+    consistent: bool,
+) -> None:
+    # Le risorse boto3 non sono thread-safe: ogni segmento ha la sua connessione
+    connection = DynamoConnection()
+    try:
+        for items, last_key in connection.scan_segment(
+            segment, total_segments, start_key, consistent
+        ):
+            if stop.is_set():
+                return
+            pages.put((segment, items, last_key))
+    finally:
+        pages.put((segment, _SEGMENT_DONE, None))
+        connection.close()
+
+
+def export_users(
+    path: str,
+    fmt: str,
+    segments: int = 4,
+    checkpoint: Optional[str] = None,
+    consistent: bool = False,
+) -> int:
+    """Esporta tutti gli utenti con una scan parallela.
+
+    Di default la scan è eventually consistent e costa metà delle RCU.
+
+    Args:
+        path (str): File di destinazione
+        fmt (str): Formato del file, "ndjson" o "csv"
+        segments (int): Numero di segmenti della scan parallela
+        checkpoint (Optional[str]): File di checkpoint per la ripresa
+        consistent (bool): True per una scan fortemente consistente
+
+    Raises:
+        ValueError: Se il checkpoint è stato creato con un numero di segmenti diverso
+
+    Returns:
+        int: Numero di utenti scritti in questa esecuzione
+    """
+    state = load_checkpoint(checkpoint)
+    if state and state.get("total_segments") != segments:
+        raise ValueError(
+            f"Il checkpoint usa {state.get('total_segments')} segmenti, "
+            f"non {segments}"
+        )
+    resuming = bool(state) and os.path.exists(path)
+    if not resuming:
+        state = {"total_segments": segments, "segments": {}}
+    progress: Dict[str, Dict] = state["segments"]
+
+    pending = [
+        segment
+        for segment in range(segments)
+        if not progress.get(str(segment), {}).get("done")
+    ]
+    if resuming:
+        logger.info(f"Riprendo l'export, segmenti da completare: {pending}")
+
+    pages: "queue.Queue" = queue.Queue(maxsize=QUEUE_SIZE)
+    stop = threading.Event()
+    written = 0
+    with open(path, "a" if resuming else "w", encoding="utf-8", newline="") as f:
+        writer = RecordWriter(f, fmt, write_header=not resuming)
+        with ThreadPoolExecutor(max_workers=max(len(pending), 1)) as executor:
+            futures = [
+                executor.submit(
+                    _scan_worker,
+                    segment,
+                    segments,
+                    progress.get(str(segment), {}).get("last_key"),
+                    pages,
+                    stop,
+                    consistent,
+                )
+                for segment in pending
+            ]
+            running = len(pending)
+            try:
+                while running:
+                    segment, items, last_key = pages.get()
+                    if items is _SEGMENT_DONE:
+                        running -= 1
+                        continue
+                    written += writer.write(items)
+                    writer.flush()
+                    progress[str(segment)] = {
+                        "last_key": last_key,
+                        "done": last_key is None,
+                    }
+                    save_checkpoint(checkpoint, state)
+            finally:
+                stop.set()
+                # Svuoto la coda per sbloccare i worker ancora in attesa
+                while any(not future.done() for future in futures):
+                    try:
+                        pages.get(timeout=0.1)
+                    except queue.Empty:
+                        pass
+            for future in futures:
+                future.result()
+
+    logger.info(f"Export completato: {written} utenti scritti in '{path}'")
+    return written
+
+
+# Import
+
+
+def _batches(records: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    iterator = iter(records)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _validate(
+    batch: List[Dict], first_record: int
+) -> Tuple[List[Tuple[int, User]], List[User], int]:
+    """Valida un blocco di record separando quelli con id esplicito dagli altri."""
+    with_id, without_id, rejected = [], [], 0
+    for position, record in enumerate(batch, start=first_record):
+        try:
+            user = User.model_validate(record)
+            user_id = record.get("user_id")
+            if user_id in (None, ""):
+                without_id.append(user)
+            else:
+                with_id.append((int(user_id), user))
+        except (ValidationError, TypeError, ValueError) as e:
+            rejected += 1
+            logger.warning(f"Record {position} scartato: {e}")
+    return with_id, without_id, rejected
+
+
+def import_users(
+    path: str,
+    fmt: str,
+    batch_size: int = 25,
+    checkpoint: Optional[str] = None,
+    reconcile: bool = True,
+) -> Tuple[int, int]:
+    """Importa gli utenti da file scrivendoli a blocchi.
+
+    I record con ``user_id`` mantengono l'id (sovrascrivendo l'utente esistente),
+    quelli senza ricevono un nuovo id dal contatore della tabella di metadati.
+    Il contatore viene portato oltre gli id espliciti prima di scriverli.
+
+    Args:
+        path (str): File sorgente
+        fmt (str): Formato del file, "ndjson" o "csv"
+        batch_size (int): Numero di record per blocco
+        checkpoint (Optional[str]): File di checkpoint per la ripresa
+        reconcile (bool): Ricalcola le statistiche a fine import se sono stati
+            scritti record con id esplicito
+
+    Raises:
+        DynamoTableDoesNotExist: Se manca la tabella di metadati e il file
+            contiene record con id esplicito
+
+    Returns:
+        Tuple[int, int]: Utenti importati e righe scartate in questa esecuzione
+    """
+    state = load_checkpoint(checkpoint) or {"records": 0}
+    skip = state["records"]
+    if skip:
+        logger.info(f"Riprendo l'import dopo {skip} record")
+
+    connection = DynamoConnection()
+    imported = rejected = overwritten = 0
+    try:
+        with open(path, encoding="utf-8", newline="") as f:
+            records = islice(read_records(f, fmt), skip, None)
+            for batch in _batches(records, batch_size):
+                with_id, without_id, batch_rejected = _validate(
+                    batch, state["records"] + 1
+                )
+                if with_id:
+                    connection.reserve_user_ids_up_to(max(i for i, _ in with_id))
+                    connection.put_users(with_id)
+                if without_id:
+                    connection.insert_users(without_id)
+                imported += len(with_id) + len(without_id)
+                overwritten += len(with_id)
+                rejected += batch_rejected
+                state["records"] += len(batch)
+                save_checkpoint(checkpoint, state)
+
+        logger.info(
+            f"Import completato: {imported} utenti importati, {rejected} scartati"
+        )
+        if overwritten and reconcile:
+            logger.info("Ricalcolo le statistiche dopo la scrittura con id espliciti")
+            correction = connection.reconcile_stats()
+            logger.info(f"Statistiche riconciliate: correzione {correction}")
+        elif overwritten:
+            logger.warning(
+                "Statistiche non ricalcolate: restano approssimate fino alla "
+                "prossima riconciliazione"
+            )
+    finally:
+        connection.close()
+
+    return imported, rejected
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m v1.tools.users",
+        description="Import ed export massivo della tabella utenti.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Esporta gli utenti su file")
+    export_parser.add_argument("path", help="File di destinazione")
+    export_parser.add_argument(
+        "--segments", type=int, default=4, help="Segmenti della scan parallela"
+    )
+    export_parser.add_argument(
+        "--consistent",
+        action="store_true",
+        help="Scan fortemente consistente (doppio delle RCU)",
+    )
+
+    import_parser = commands.add_parser("import", help="Importa gli utenti da file")
+    import_parser.add_argument("path", help="File sorgente")
+    import_parser.add_argument(
+        "--batch-size", type=int, default=25, help="Record per blocco di scrittura"
+    )
+    import_parser.add_argument(
+        "--no-reconcile",
+        dest="reconcile",
+        action="store_false",
+        help="Non ricalcola le statistiche a fine import: con record con id "
+        "esplicito restano approssimate fino alla riconciliazione periodica",
+    )
+
+    for command in (export_parser, import_parser):
+        command.add_argument("--format", choices=FORMATS, help="Formato del file")
+        command.add_argument("--checkpoint", help="File di checkpoint per la ripresa")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        fmt = detect_format(args.path, args.format)
+        if args.command == "export":
+            export_users(
+                args.path, fmt, args.segments, args.checkpoint, args.consistent
+            )
+            return 0
+        _, rejected = import_users(
+            args.path, fmt, args.batch_size, args.checkpoint, args.reconcile
+        )
+        return 1 if rejected else 0
+    except (OSError, ValueError, ClientError, DynamoTableDoesNotExist) as e:
+        logger.error(str(e))
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,31 @@
+"""Autorizzazione degli endpoint di amministrazione."""
+
+import hmac
+from typing import Optional
+
+from fastapi import Header
+
+from ..config.app_settings import get_settings
+from ..exceptions import ErrorCatalogue
+
+
+def require_admin_token(
+    x_admin_token: Optional[str] = Header(
+        default=None, description="Token di amministrazione (ADMIN_TOKEN)"
+    ),
+) -> None:
+    """Dipendenza FastAPI che protegge gli endpoint admin con l'header X-Admin-Token.
+
+    Senza ADMIN_TOKEN configurato gli endpoint admin sono sempre rifiutati.
+
+    Args:
+        x_admin_token (Optional[str]): Valore dell'header X-Admin-Token
+
+    Raises:
+        HTTPException: 403 se il token manca o non corrisponde
+    """
+    expected = get_settings().adminToken
+    if not expected or not x_admin_token:
+        raise ErrorCatalogue.ADMIN_FORBIDDEN.exception()
+    if not hmac.compare_digest(x_admin_token.encode(), expected.encode()):
+        raise ErrorCatalogue.ADMIN_FORBIDDEN.exception()
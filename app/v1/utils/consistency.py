@@ -0,0 +1,37 @@
+"""Scelta della consistenza delle letture DynamoDB per singola richiesta."""
+
+from typing import Optional
+
+from fastapi import Header, Query
+
+_TRUE_VALUES = ("1", "true", "yes", "strong")
+
+
+def consistent_read(
+    consistent: Optional[bool] = Query(
+        default=None,
+        description="Lettura fortemente consistente (costa il doppio delle RCU)",
+    ),
+    x_consistent_read: Optional[str] = Header(
+        default=None,
+        description="Alternativa al parametro consistent, es. 'true' o 'strong'",
+    ),
+) -> bool:
+    """Dipendenza FastAPI che indica se la richiesta vuole letture consistenti.
+
+    Il parametro di query ha la precedenza sull'header X-Consistent-Read. In
+    assenza di entrambi le letture sono eventually consistent, il default di
+    DynamoDB.
+
+    Args:
+        consistent (Optional[bool]): Parametro di query ?consistent=
+        x_consistent_read (Optional[str]): Header X-Consistent-Read
+
+    Returns:
+        bool: True per una lettura fortemente consistente
+    """
+    if consistent is not None:
+        return consistent
+    if x_consistent_read is not None:
+        return x_consistent_read.strip().lower() in _TRUE_VALUES
+    return False
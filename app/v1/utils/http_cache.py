@@ -0,0 +1,59 @@
+"""Funzioni di supporto per le richieste HTTP condizionali (ETag / Last-Modified)."""
+
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional
+
+from fastapi import Request
+
+
+def cache_headers(version: int, updated_at: int) -> Dict[str, str]:
+    """Costruisce gli header di validazione a partire dal token di modifica.
+
+    Args:
+        version (int): Contatore delle modifiche della tabella.
+        updated_at (int): Timestamp (epoch) dell'ultima modifica.
+
+    Returns:
+        Dict[str, str]: Header ETag, Last-Modified e Cache-Control.
+    """
+    return {
+        # ETag debole: la rappresentazione cambia con la codifica negoziata
+        "ETag": f'W/"{version}"',
+        "Last-Modified": formatdate(updated_at, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+
+
+def _strip_weak(etag: str) -> str:
+    etag = etag.strip()
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def is_not_modified(request: Request, etag: str, updated_at: int) -> bool:
+    """Verifica se il client possiede già la versione corrente della risorsa.
+
+    If-None-Match ha la precedenza su If-Modified-Since (RFC 7232, sezione 6).
+
+    Args:
+        request (Request): Richiesta HTTP in ingresso.
+        etag (str): ETag corrente della risorsa.
+        updated_at (int): Timestamp (epoch) dell'ultima modifica della risorsa.
+
+    Returns:
+        bool: True se si può rispondere 304 Not Modified, False altrimenti.
+    """
+    if_none_match: Optional[str] = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        current = _strip_weak(etag)
+        return any(_strip_weak(tag) == current for tag in if_none_match.split(","))
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return updated_at <= since
+    return False
@@ -0,0 +1,64 @@
+"""Parametri di filtro, ordinamento e limite di GET /v1/users."""
+
+from typing import List, Literal, Optional
+
+from fastapi import Query
+
+from ..exceptions import ErrorCatalogue
+from ..model.user_query import (
+    DEFAULT_SORTED_LIMIT,
+    MAX_LIST_LIMIT,
+    QUERY_FIELDS,
+    UserQuery,
+    parse_filter,
+)
+from .custom_logger import LogSetupper
+
+logger = LogSetupper(__name__).setup()
+
+
+def user_list_query(
+    filters: List[str] = Query(
+        default=[],
+        alias="filter",
+        description=(
+            "Filtro 'campo:valore' o 'campo:operatore:valore', operatori eq, "
+            "prefix e contains. Ripetibile, i filtri sono in AND"
+        ),
+    ),
+    sort: Optional[str] = Query(
+        default=None, description=f"Campo di ordinamento: {', '.join(QUERY_FIELDS)}"
+    ),
+    order: Literal["asc", "desc"] = Query(default="asc"),
+    limit: Optional[int] = Query(
+        default=None,
+        ge=1,
+        le=MAX_LIST_LIMIT,
+        description=f"Numero massimo di utenti, {DEFAULT_SORTED_LIMIT} se è indicato sort",
+    ),
+) -> UserQuery:
+    """Dipendenza FastAPI che costruisce la UserQuery dai parametri di query.
+
+    Args:
+        filters (List[str]): Parametri filter
+        sort (Optional[str]): Campo di ordinamento
+        order (str): "asc" o "desc"
+        limit (Optional[int]): Numero massimo di utenti
+
+    Raises:
+        HTTPException: 400 se un filtro o il campo di ordinamento non sono validi
+
+    Returns:
+        UserQuery: Parametri della lista utenti
+    """
+    try:
+        parsed = tuple(parse_filter(raw) for raw in filters)
+    except ValueError as e:
+        logger.error(f"Filtro non valido: {e}")
+        raise ErrorCatalogue.INVALID_QUERY.exception()
+    if sort is not None and sort not in QUERY_FIELDS:
+        logger.error(f"Campo di ordinamento non valido: {sort}")
+        raise ErrorCatalogue.INVALID_QUERY.exception()
+    if sort is not None and limit is None:
+        limit = DEFAULT_SORTED_LIMIT
+    return UserQuery(parsed, sort, order == "desc", limit)
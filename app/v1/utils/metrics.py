@@ -0,0 +1,121 @@
+"""Registro in memoria delle metriche del servizio, esposto in formato Prometheus.
+
+Il registro è per processo: con più worker ``render_workers`` unisce le
+fotografie dei registri di tutti i worker (vedi ``utils.worker_state``).
+"""
+
+import threading
+from typing import Any, Dict, List, Mapping, Tuple
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+class MetricsRegistry:
+    """Contatori e gauge con etichette, aggiornabili da più thread."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._meta: Dict[str, Tuple[str, str]] = {}
+        self._values: Dict[str, Dict[LabelSet, float]] = {}
+
+    def describe(self, name: str, help_text: str, kind: str = "counter") -> None:
+        """Registra descrizione e tipo di una metrica.
+
+        Args:
+            name (str): Nome della metrica
+            help_text (str): Descrizione riportata nella riga HELP
+            kind (str): "counter" oppure "gauge"
+        """
+        with self._lock:
+            self._meta[name] = (help_text, kind)
+            self._values.setdefault(name, {})
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        """Incrementa un contatore per l'insieme di etichette indicato."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        """Imposta il valore di una gauge per l'insieme di etichette indicato."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values.setdefault(name, {})[key] = value
+
+    def get(self, name: str, **labels: str) -> float:
+        """Ritorna il valore corrente di una serie, 0 se non ancora registrata."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            return self._values.get(name, {}).get(key, 0.0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Ritorna descrizioni e valori del registro in una forma serializzabile in JSON."""
+        with self._lock:
+            return {
+                "meta": {name: list(meta) for name, meta in self._meta.items()},
+                "values": {
+                    name: [
+                        [list(map(list, labels)), value]
+                        for labels, value in series.items()
+                    ]
+                    for name, series in self._values.items()
+                },
+            }
+
+    def render(self) -> str:
+        """Serializza tutte le metriche nel formato testuale di Prometheus."""
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(self._values):
+                help_text, kind = self._meta.get(name, ("", "untyped"))
+                if help_text:
+                    lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in sorted(self._values[name].items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def render_workers(snapshots: Mapping[str, Tuple[Dict[str, Any], bool]]) -> str:
+    """Unisce le fotografie dei registri di più worker nel formato di Prometheus.
+
+    I contatori sono sommati su tutti i worker, compresi quelli terminati,
+    così restano monotoni quando uvicorn ricicla un worker. Le gauge non si
+    possono sommare: sono riportate con l'etichetta ``worker`` e solo per i
+    worker ancora attivi.
+
+    Args:
+        snapshots (Mapping[str, Tuple[Dict[str, Any], bool]]): Per ogni worker
+            la fotografia di ``MetricsRegistry.snapshot`` e se è ancora attivo
+
+    Returns:
+        str: Metriche nel formato testuale di Prometheus
+    """
+    merged = MetricsRegistry()
+    for worker, (snapshot, alive) in sorted(snapshots.items()):
+        for name, (help_text, kind) in snapshot["meta"].items():
+            merged.describe(name, help_text, kind)
+        for name, series in snapshot["values"].items():
+            kind = snapshot["meta"].get(name, ("", "untyped"))[1]
+            for labels, value in series:
+                if kind == "counter":
+                    merged.inc(name, value, **dict(labels))
+                elif alive:
+                    merged.set(name, value, worker=worker, **dict(labels))
+    return merged.render()
+
+
+def _format_labels(labels: LabelSet) -> str:
+    if not labels:
+        return ""
+    pairs = (f'{key}="{_escape(value)}"' for key, value in labels)
+    return "{" + ",".join(pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Registro condiviso da tutto il processo
+metrics = MetricsRegistry()
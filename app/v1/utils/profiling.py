@@ -0,0 +1,242 @@
+"""Profiler a campionamento dello stack per le richieste HTTP.
+
+Un thread legge periodicamente lo stack di tutti i thread con
+``sys._current_frames`` e conta solo gli stack che stanno eseguendo una
+richiesta campionata, cioè che passano per il frame del ProfilingMiddleware
+o, per il lavoro spostato nel threadpool, per quello di ``run_marked``.
+Il thread gira solo mentre almeno una richiesta campionata è in corso, quindi
+a profiler acceso ma senza richieste campionate il costo è nullo.
+
+Gli stack vengono aggregati nel formato "folded" (``frame;frame;frame N``)
+accettato da flamegraph.pl, speedscope e inferno.
+"""
+
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from types import CodeType, FrameType
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+# Oltre questo numero di stack distinti i nuovi vengono sommati in uno solo
+MAX_STACKS = 10000
+_TRUNCATED = "[altri stack]"
+
+T = TypeVar("T")
+
+# Scope della richiesta campionata in corso; i thread del threadpool ricevono
+# una copia del contesto, ma il loro stack non passa per il middleware
+current_sampled_scope: ContextVar[Optional[Dict[str, Any]]] = ContextVar(
+    "current_sampled_scope", default=None
+)
+
+
+def run_marked(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Esegue fn in un frame che il sampler attribuisce alla richiesta in corso.
+
+    Va usata per il lavoro che una richiesta esegue nel threadpool: le
+    variabili locali ``sampled`` e ``scope`` sono le stesse del middleware.
+    """
+    scope = current_sampled_scope.get()
+    sampled = scope is not None
+    return fn(*args, **kwargs)
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+class StackSampler:
+    """Campiona gli stack delle richieste in corso e li aggrega per route.
+
+    Args:
+        marker (CodeType): Codice del frame che identifica una richiesta; le
+            sue variabili locali ``sampled`` e ``scope`` indicano se la
+            richiesta va campionata e quale route sta servendo.
+        interval (float): Intervallo di campionamento in secondi
+    """
+
+    def __init__(self, marker: CodeType, interval: float = 0.005) -> None:
+        self.marker = marker
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._lock = threading.Lock()
+        self._active = 0
+        self._wakeup = threading.Condition(self._lock)
+        self._thread: Optional[threading.Thread] = None
+
+    def request_started(self) -> None:
+        """Segnala l'inizio di una richiesta campionata, avvia il thread se serve."""
+        with self._lock:
+            self._active += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="stack-sampler", daemon=True
+                )
+                self._thread.start()
+            self._wakeup.notify()
+
+    def request_finished(self) -> None:
+        with self._lock:
+            self._active -= 1
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while True:
+            with self._lock:
+                # In pausa finché non ci sono richieste campionate in corso
+                while self._active <= 0:
+                    self._wakeup.wait()
+            self._sample(own_id)
+            time.sleep(self.interval)
+
+    def _sample(self, own_id: int) -> None:
+        collected: List[str] = []
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            folded = self._fold(frame)
+            if folded is not None:
+                collected.append(folded)
+        if not collected:
+            return
+        with self._lock:
+            self.samples += 1
+            for folded in collected:
+                if folded not in self.stacks and len(self.stacks) >= MAX_STACKS:
+                    folded = _TRUNCATED
+                self.stacks[folded] += 1
+
+    def _fold(self, frame: FrameType) -> Optional[str]:
+        labels: List[str] = []
+        while frame is not None:
+            if frame.f_code is self.marker or frame.f_code is run_marked.__code__:
+                local = frame.f_locals
+                if not local.get("sampled"):
+                    return None
+                scope = local["scope"]
+                route = getattr(scope.get("route"), "path", scope["path"])
+                labels.append(f"{scope['method']} {route}")
+                # Lo stack inizia dalla route: asyncio e uvicorn non interessano
+                return ";".join(reversed(labels))
+            labels.append(_frame_label(frame))
+            frame = frame.f_back
+        return None
+
+    def folded(self) -> str:
+        """Ritorna gli stack aggregati nel formato folded, dal più frequente."""
+        with self._lock:
+            items = self.stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+    def top_frames(self, limit: int = 20) -> List[Tuple[str, int]]:
+        """Ritorna le funzioni in cima allo stack più spesso (tempo self)."""
+        leaves: Dict[str, int] = Counter()
+        with self._lock:
+            for stack, count in self.stacks.items():
+                leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(limit)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stacks.clear()
+            self.samples = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Ritorna campioni e stack raccolti in una forma serializzabile in JSON."""
+        with self._lock:
+            return {"samples": self.samples, "stacks": dict(self.stacks)}
+
+    def merge(self, snapshot: Dict[str, Any]) -> None:
+        """Somma a questo sampler i campioni di ``snapshot``, es. di un altro worker."""
+        with self._lock:
+            self.samples += snapshot["samples"]
+            self.stacks.update(snapshot["stacks"])
+
+
+class Profiler:
+    """Stato del profiler del processo, modificabile a runtime dagli endpoint admin."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.sample_rate = 0.01
+        self.interval_ms = 5
+        self.routes: Tuple[str, ...] = ()
+        # Incrementata a ogni azzeramento: distingue i campioni dei worker
+        # raccolti prima dell'ultimo DELETE da quelli successivi
+        self.generation = 0
+        self._marker: Optional[CodeType] = None
+        self._sampler: Optional[StackSampler] = None
+
+    def bind(self, marker: CodeType) -> None:
+        """Registra il codice del frame che identifica una richiesta (il middleware)."""
+        self._marker = marker
+
+    @property
+    def sampler(self) -> StackSampler:
+        if self._sampler is None:
+            self._sampler = StackSampler(self._marker, self.interval_ms / 1000)
+        return self._sampler
+
+    def configure(
+        self,
+        enabled: Optional[bool] = None,
+        sample_rate: Optional[float] = None,
+        interval_ms: Optional[int] = None,
+        routes: Optional[Sequence[str]] = None,
+    ) -> None:
+        """Aggiorna i parametri indicati, lasciando invariati gli altri.
+
+        Args:
+            enabled (Optional[bool]): Accende o spegne il campionamento
+            sample_rate (Optional[float]): Frazione delle richieste da campionare
+            interval_ms (Optional[int]): Intervallo tra due campioni
+            routes (Optional[Sequence[str]]): Prefissi dei path da campionare,
+                vuoto per tutti
+        """
+        if enabled is not None:
+            self.enabled = enabled
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if interval_ms is not None:
+            self.interval_ms = interval_ms
+            if self._sampler is not None:
+                self._sampler.interval = interval_ms / 1000
+        if routes is not None:
+            self.routes = tuple(route for route in routes if route)
+
+    def reset(self) -> None:
+        """Azzera i campioni raccolti e passa a una nuova generazione."""
+        self.sampler.reset()
+        self.generation += 1
+
+    def state(self) -> Dict[str, Any]:
+        """Ritorna configurazione e generazione, condivise tra i worker."""
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "interval_ms": self.interval_ms,
+            "routes": list(self.routes),
+            "generation": self.generation,
+        }
+
+    def should_sample(self, path: str) -> bool:
+        if not self.enabled or self._marker is None:
+            return False
+        if self.routes and not path.startswith(self.routes):
+            return False
+        return random.random() < self.sample_rate
+
+
+def parse_routes(value: str) -> List[str]:
+    """Legge PROFILING_ROUTES, es. "/v1/users,/v1/users/changes"."""
+    return [route.strip() for route in value.split(",") if route.strip()]
+
+
+# Profiler condiviso da tutto il processo, configurato nel lifespan dell'app
+profiler = Profiler()
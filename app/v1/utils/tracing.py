@@ -0,0 +1,337 @@
+"""Tracing distribuito compatibile con OpenTelemetry e W3C Trace Context.
+
+Implementazione minima senza dipendenze esterne: gli span hanno gli stessi
+identificativi e la stessa forma (OTLP/JSON) di quelli OpenTelemetry, quindi i
+file prodotti possono essere importati da un collector OTLP. Il contesto
+``traceparent`` ricevuto viene proseguito, così gli span del servizio si
+agganciano alla traccia del chiamante.
+"""
+
+import json
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+_TRACEPARENT_RE = re.compile(
+    r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})(?:-.*)?$"
+)
+_INVALID_TRACE_ID = "0" * 32
+_INVALID_SPAN_ID = "0" * 16
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+class Span:
+    """Operazione tracciata, con tempi in nanosecondi epoch come in OpenTelemetry."""
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_span_id",
+        "kind",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "status",
+        "status_message",
+        "sampled",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_span_id: Optional[str],
+        kind: int,
+        sampled: bool,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _random_id(16)
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = STATUS_UNSET
+        self.status_message = ""
+        self.sampled = sampled
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, message: str) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = message
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Serializza lo span nel formato OTLP/JSON."""
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in self.attributes.items()
+            ],
+            "status": {"code": self.status},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+
+def _random_id(length: int) -> str:
+    return f"{random.getrandbits(length * 4):0{length}x}"
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(v) for v in value]}}
+    return {"stringValue": str(value)}
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """Legge l'header W3C traceparent.
+
+    Args:
+        header (Optional[str]): Valore dell'header traceparent
+
+    Returns:
+        Optional[Tuple[str, str, bool]]: trace id, span id del chiamante e flag
+            sampled; None se l'header manca o non è valido
+    """
+    if not header:
+        return None
+    match = _TRACEPARENT_RE.match(header.strip().lower())
+    if not match:
+        return None
+    version, trace_id, span_id, flags = match.groups()
+    if version == "ff" or trace_id == _INVALID_TRACE_ID or span_id == _INVALID_SPAN_ID:
+        return None
+    return trace_id, span_id, bool(int(flags, 16) & 0x01)
+
+
+# Exporter
+
+
+class SpanExporter:
+    """Riceve gli span conclusi. L'implementazione base li scarta."""
+
+    def export(self, span: Span) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        pass
+
+
+class InMemoryExporter(SpanExporter):
+    """Conserva gli span in memoria, pensato per i test."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._spans: List[Span] = []
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+
+    @property
+    def spans(self) -> List[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+
+class FileExporter(SpanExporter):
+    """Scrive ogni span su file come una riga JSON in formato OTLP."""
+
+    def __init__(self, path: str) -> None:
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_otlp(), separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+# Tracer
+
+
+class Tracer:
+    """Crea gli span e mantiene quello corrente in una contextvar.
+
+    Con il tracer disabilitato (nessun exporter) ``start_span`` non alloca
+    nulla e ritorna None.
+    """
+
+    def __init__(
+        self, exporter: Optional[SpanExporter] = None, sample_rate: float = 1.0
+    ) -> None:
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self._current: ContextVar[Optional[Span]] = ContextVar(
+            "current_span", default=None
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    @property
+    def current_span(self) -> Optional[Span]:
+        return self._current.get()
+
+    def start_span(
+        self,
+        name: str,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+        traceparent: Optional[str] = None,
+    ) -> Optional[Span]:
+        """Crea uno span figlio di quello corrente, o del traceparent ricevuto.
+
+        Lo span non diventa corrente: usare ``span`` per i blocchi annidati.
+
+        Args:
+            name (str): Nome dello span
+            kind (int): Tipo dello span (internal, server, client)
+            attributes (Optional[Dict[str, Any]]): Attributi iniziali
+            traceparent (Optional[str]): Header W3C del chiamante, per gli span server
+
+        Returns:
+            Optional[Span]: Lo span, None se il tracing è disabilitato
+        """
+        if not self.enabled:
+            return None
+        parent = self._current.get()
+        if parent is not None:
+            trace_id, parent_id, sampled = (
+                parent.trace_id,
+                parent.span_id,
+                parent.sampled,
+            )
+        else:
+            remote = parse_traceparent(traceparent)
+            if remote is not None:
+                trace_id, parent_id, sampled = remote
+            else:
+                trace_id, parent_id = _random_id(32), None
+                sampled = random.random() < self.sample_rate
+        return Span(name, trace_id, parent_id, kind, sampled, attributes)
+
+    def end_span(self, span: Optional[Span]) -> None:
+        """Chiude lo span e lo esporta se la traccia è campionata."""
+        if span is None or span.end_ns is not None:
+            return
+        span.end_ns = time.time_ns()
+        if span.sampled and self.exporter is not None:
+            self.exporter.export(span)
+
+    def activate(self, span: Optional[Span]):
+        """Rende corrente lo span, ritorna il token per ``deactivate``."""
+        return self._current.set(span)
+
+    def deactivate(self, token) -> None:
+        self._current.reset(token)
+
+    @contextmanager
+    def span(
+        self,
+        name: str,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[Optional[Span]]:
+        """Context manager che apre uno span corrente e lo chiude all'uscita."""
+        span = self.start_span(name, kind, attributes)
+        if span is None:
+            yield None
+            return
+        token = self.activate(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            self.deactivate(token)
+            self.end_span(span)
+
+    def configure(
+        self, exporter: Optional[SpanExporter], sample_rate: Optional[float] = None
+    ) -> None:
+        """Sostituisce l'exporter (es. InMemoryExporter nei test)."""
+        if self.exporter is not None and self.exporter is not exporter:
+            self.exporter.shutdown()
+        self.exporter = exporter
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+
+    def shutdown(self) -> None:
+        self.configure(None)
+
+
+def exporter_from_settings(kind: str, path: str) -> Optional[SpanExporter]:
+    """Crea l'exporter indicato da TRACING_EXPORTER.
+
+    Args:
+        kind (str): "none", "memory" oppure "file"
+        path (str): File di destinazione per l'exporter "file"
+
+    Returns:
+        Optional[SpanExporter]: L'exporter, None se il tracing è disabilitato
+    """
+    if kind == "file":
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        return FileExporter(path)
+    if kind == "memory":
+        return InMemoryExporter()
+    return None
+
+
+# Tracer condiviso da tutto il processo, configurato nel lifespan dell'app
+tracer = Tracer()
@@ -0,0 +1,224 @@
+"""Metriche e profiler condivisi tra i worker di uvicorn attraverso una cartella.
+
+Registro delle metriche e profiler vivono nella memoria di ogni worker, ma
+``/v1/metrics`` e gli endpoint admin del profiler vengono serviti dal worker a
+cui il socket condiviso assegna la connessione. ``serve.py`` crea quindi una
+cartella (in ``/dev/shm`` se disponibile) prima di avviare i worker, e ogni
+processo ci scrive a intervalli regolari:
+
+- ``metrics-<pid>.json``: la fotografia del proprio registro delle metriche;
+- ``profile-<pid>.json``: gli stack raccolti dal proprio profiler.
+
+Il worker che riceve una richiesta admin scrive la nuova configurazione del
+profiler in ``profiling.json``; gli altri la applicano entro un intervallo.
+Chi risponde a ``/v1/metrics`` o alla lettura del profiler unisce i propri
+dati, aggiornati, con le fotografie degli altri, in ritardo al massimo di
+``WORKER_STATE_INTERVAL_MS``.
+
+I file scritti da un worker restano dopo la sua terminazione: i contatori e
+gli stack dei worker riciclati da uvicorn non vanno persi.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+
+from ..config.app_settings import AppSettings, get_settings
+from .custom_logger import LogSetupper
+from .metrics import metrics, render_workers
+from .profiling import StackSampler, profiler
+
+logger = LogSetupper(__name__).setup()
+
+PROFILING_FILE = "profiling.json"
+
+
+def state_path(settings: AppSettings) -> str:
+    """Percorso della cartella: WORKER_STATE_PATH o, se vuoto, una cartella per
+    porta in /dev/shm (nella cartella temporanea se /dev/shm non esiste).
+    """
+    if settings.workerStatePath:
+        return settings.workerStatePath
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(directory, f"users-workers-{settings.serverPort}")
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class WorkerState:
+    """Pubblica metriche e stack del processo e legge quelli degli altri worker.
+
+    Args:
+        path (str): Cartella condivisa, creata dal processo padre
+        interval (float): Secondi tra due pubblicazioni
+    """
+
+    def __init__(self, path: str, interval: float) -> None:
+        self.path = path
+        self.interval = interval
+        self.worker = str(os.getpid())
+        self._lock = threading.Lock()
+        self._applied: Optional[Dict[str, Any]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def prepare(path: str) -> None:
+        """Crea la cartella vuota, eliminando i file di un avvio precedente.
+
+        Args:
+            path (str): Cartella da creare
+        """
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+
+    @staticmethod
+    def remove(path: str) -> None:
+        shutil.rmtree(path, ignore_errors=True)
+
+    def start(self) -> None:
+        # Prima pubblicazione e configurazione del profiler prima di servire
+        self._sync()
+        self._thread = threading.Thread(
+            target=self._run, name="worker-state", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        # Ultima fotografia: i contatori del worker sopravvivono alla sua uscita
+        self.publish()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sync()
+
+    def _sync(self) -> None:
+        try:
+            self.sync_profiler()
+            self.publish()
+        except Exception as e:
+            logger.error(f"Errore nella condivisione dello stato del worker: {e}")
+
+    def publish(self) -> None:
+        """Scrive le fotografie di metriche e stack del processo."""
+        self._write(f"metrics-{self.worker}.json", metrics.snapshot())
+        snapshot = profiler.sampler.snapshot()
+        snapshot["generation"] = profiler.generation
+        self._write(f"profile-{self.worker}.json", snapshot)
+
+    def sync_profiler(self) -> None:
+        """Applica la configurazione del profiler scritta da un altro worker."""
+        with self._lock:
+            state = self._read(PROFILING_FILE)
+            if state is None or state == self._applied:
+                return
+            config = dict(state)
+            generation = config.pop("generation")
+            profiler.configure(**config)
+            if generation != profiler.generation:
+                profiler.sampler.reset()
+                profiler.generation = generation
+            self._applied = state
+
+    def update_profiler(self, changes: Dict[str, Any], reset: bool = False) -> None:
+        """Modifica il profiler di questo processo e la propaga agli altri worker.
+
+        Args:
+            changes (Dict[str, Any]): Parametri di ``Profiler.configure`` da modificare
+            reset (bool): True per azzerare i campioni di tutti i worker
+        """
+        # Parto dall'ultima configurazione condivisa, altrimenti riscriverei
+        # i parametri cambiati da un altro worker che non ho ancora applicato
+        self.sync_profiler()
+        with self._lock:
+            profiler.configure(**changes)
+            if reset:
+                profiler.reset()
+            state = profiler.state()
+            self._write(PROFILING_FILE, state)
+            self._applied = state
+
+    def metric_snapshots(self) -> Dict[str, Tuple[Dict[str, Any], bool]]:
+        """Ritorna le fotografie delle metriche per worker, con il suo stato.
+
+        Per questo processo usa il registro in memoria, non la fotografia.
+        """
+        snapshots = {}
+        for worker, snapshot in self._snapshots("metrics-"):
+            snapshots[worker] = (snapshot, _alive(int(worker)))
+        snapshots[self.worker] = (metrics.snapshot(), True)
+        return snapshots
+
+    def render_metrics(self) -> str:
+        """Metriche di tutti i worker nel formato testuale di Prometheus."""
+        return render_workers(self.metric_snapshots())
+
+    def profile(self) -> StackSampler:
+        """Ritorna un sampler non avviato con gli stack di tutti i worker.
+
+        Sono esclusi gli stack raccolti prima dell'ultimo azzeramento.
+        """
+        self.sync_profiler()
+        merged = StackSampler(profiler.sampler.marker, profiler.sampler.interval)
+        merged.merge(profiler.sampler.snapshot())
+        for worker, snapshot in self._snapshots("profile-"):
+            if snapshot["generation"] == profiler.generation:
+                merged.merge(snapshot)
+        return merged
+
+    def _snapshots(self, prefix: str):
+        for name in os.listdir(self.path):
+            if not (name.startswith(prefix) and name.endswith(".json")):
+                continue
+            worker = name[len(prefix) : -len(".json")]
+            if worker == self.worker:
+                continue
+            snapshot = self._read(name)
+            if snapshot is not None:
+                yield worker, snapshot
+
+    def _read(self, name: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.path, name), "rb") as f:
+                return orjson.loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, name: str, content: Dict[str, Any]) -> None:
+        # Scrittura atomica: chi legge trova il file precedente o quello nuovo
+        target = os.path.join(self.path, name)
+        temporary = f"{target}.{self.worker}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(orjson.dumps(content))
+        os.replace(temporary, target)
+
+
+@lru_cache(maxsize=None)
+def get_worker_state() -> Optional[WorkerState]:
+    """Ritorna lo stato condiviso del worker, None se la cartella non esiste.
+
+    La cartella esiste solo se il processo padre di ``serve.py`` l'ha creata
+    prima di avviare i worker; con ``uvicorn main:app`` lanciato a mano
+    metriche e profiler restano quelli del singolo processo.
+    """
+    settings = get_settings()
+    path = state_path(settings)
+    if not os.path.isdir(path):
+        return None
+    return WorkerState(path, settings.workerStateIntervalMs / 1000)
@@ -3,9 +3,14 @@ from .ready import ReadyResponse
 from .health import HealthResponse
 from .user_inserted import UserInsertedResponse
 from .user_deleted import UserDeletedResponse
+from .users_deleted import BulkDeleteRequest, UsersDeletedResponse
 from .get_users import GetAllUsersResponse
+from .search_users import SearchUsersResponse
+from .user_stats import UserStatsResponse
 from .get_user import GetUserResponse
 from .update_user import UserUpdatedResponse
+from .get_changes import GetChangesResponse, UserChange
+from .profiling import ProfilingConfig, ProfilingFrame, ProfilingStatusResponse
 
 __all__ = (
     "ErrorResponse",
@@ -14,7 +19,16 @@ __all__ = (
     "ErrorModel",
     "UserInsertedResponse",
     "UserDeletedResponse",
+    "BulkDeleteRequest",
+    "UsersDeletedResponse",
     "GetAllUsersResponse",
+    "SearchUsersResponse",
+    "UserStatsResponse",
     "GetUserResponse",
-    "UserUpdatedResponse"
+    "UserUpdatedResponse",
+    "GetChangesResponse",
+    "UserChange",
+    "ProfilingConfig",
+    "ProfilingFrame",
+    "ProfilingStatusResponse",
 )
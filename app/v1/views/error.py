@@ -1,7 +1,39 @@
+from functools import lru_cache
 from typing import Dict, Any, Optional, List, Union
 from http import HTTPStatus
 
-from pydantic import BaseModel, root_validator
+from pydantic import BaseModel, ConfigDict, computed_field
+
+
+@lru_cache(maxsize=None)
+def _status_name(code: int) -> str:
+    return HTTPStatus(code).name
+
+
+def _error_model_schema(schema: Dict[str, Any]) -> None:
+    """Post-process the generated schema.
+
+    Args:
+        schema (typing.Dict[str, typing.Any]): The schema dictionary.
+
+    """
+    # Override schema description, by default is taken from docstring.
+    schema["description"] = "Error model."
+    # The computed status field is only part of the serialization schema.
+    schema["properties"].setdefault("status", {"title": "Status", "type": "string"})
+    if "status" not in schema["required"]:
+        schema["required"].append("status")
+
+
+def _error_response_schema(schema: Dict[str, Any]) -> None:
+    """Post-process the generated schema.
+
+    Args:
+        schema (typing.Dict[str, typing.Any]): The schema dictionary.
+
+    """
+    # Override schema description, by default is taken from docstring.
+    schema["description"] = "Error response model."
 
 
 class ErrorModel(BaseModel):
@@ -14,59 +46,22 @@ class ErrorModel(BaseModel):
             automatically based on HTTP error status code.
 
     Raises:
-        pydantic.error_wrappers.ValidationError: If any of provided attribute
-            doesn't pass type validation.
+        pydantic.ValidationError: If any of provided attribute doesn't pass
+            type validation.
 
     """
 
+    model_config = ConfigDict(json_schema_extra=_error_model_schema)
+
     code: int
     message: str
     details: Optional[List[Dict[str, Any]]] = None
 
-    @root_validator(pre=False, skip_on_failure=True)
-    def _set_status(cls, values: Dict[str, Any]) -> Dict[str, Any]:
-        """Set the status field value based on the code attribute value.
-
-        Args:
-            values(typing.Dict[str, typing.Any]): Stores the attributes of the
-                ErrorModel object.
-
-        Returns:
-            typing.Dict[str, typing.Any]: The attributes of the ErrorModel object
-                with the status field.
-
-        """
-        values["status"] = HTTPStatus(values["code"]).name
-        return values
-
-    class Config:
-        """Config sub-class needed to extend/override the generated JSON schema.
-
-        More details can be found in pydantic documentation:
-        https://pydantic-docs.helpmanual.io/usage/schema/#schema-customization
-
-        """
-
-        @staticmethod
-        def schema_extra(schema: Dict[str, Any]) -> None:
-            """Post-process the generated schema.
-
-            Method can have one or two positional arguments. The first will be
-            the schema dictionary. The second, if accepted, will be the model
-            class. The callable is expected to mutate the schema dictionary
-            in-place; the return value is not used.
-
-            Args:
-                schema (typing.Dict[str, typing.Any]): The schema dictionary.
-
-            """
-            # Override schema description, by default is taken from docstring.
-            schema["description"] = "Error model."
-            # Add status to schema properties.
-            schema["properties"].update(
-                {"status": {"title": "Status", "type": "string"}}
-            )
-            schema["required"].append("status")
+    @computed_field
+    @property
+    def status(self) -> str:
+        """HTTP error reason-phrase derived from the code attribute value."""
+        return _status_name(self.code)
 
 
 class ErrorResponse(BaseModel):
@@ -76,38 +71,16 @@ class ErrorResponse(BaseModel):
         error (ErrorModel): ErrorModel class object instance.
 
     Raises:
-        pydantic.error_wrappers.ValidationError: If any of provided attribute
-            doesn't pass type validation.
+        pydantic.ValidationError: If any of provided attribute doesn't pass
+            type validation.
 
     """
 
+    model_config = ConfigDict(json_schema_extra=_error_response_schema)
+
     error: ErrorModel
 
     def __init__(self, **kwargs: Union[int, str, List[Dict[str, Any]]]):
         """Initialize ErrorResponse class object instance."""
         # Neat trick to still use kwargs on ErrorResponse model.
         super().__init__(error=ErrorModel(**kwargs))
-
-    class Config:
-        """Config sub-class needed to extend/override the generated JSON schema.
-
-        More details can be found in pydantic documentation:
-        https://pydantic-docs.helpmanual.io/usage/schema/#schema-customization
-
-        """
-
-        @staticmethod
-        def schema_extra(schema: Dict[str, Any]) -> None:
-            """Post-process the generated schema.
-
-            Method can have one or two positional arguments. The first will be
-            the schema dictionary. The second, if accepted, will be the model
-            class. The callable is expected to mutate the schema dictionary
-            in-place; the return value is not used.
-
-            Args:
-                schema (typing.Dict[str, typing.Any]): The schema dictionary.
-
-            """
-            # Override schema description, by default is taken from docstring.
-            schema["description"] = "Error response model."
@@ -0,0 +1,44 @@
+"""Implementazione della risposta del change feed degli utenti"""
+
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel
+from ..model.user import UserResponse
+
+
+class UserChange(BaseModel):
+    user_id: int
+    op: Literal["upsert", "delete"]
+    updated_at: int
+    user: Optional[UserResponse] = None
+
+
+class GetChangesResponse(BaseModel):
+    status: str
+    changes: List[UserChange]
+    next_token: str
+    has_more: bool
+
+    class Config:
+        """Config sub-class needed to extend/override the generated JSON schema.
+
+        More details can be found in pydantic documentation:
+        https://pydantic-docs.helpmanual.io/usage/schema/#schema-customization
+
+        """
+
+        @staticmethod
+        def schema_extra(schema: Dict[str, Any]) -> None:
+            """Post-process the generated schema.
+
+            Method can have one or two positional arguments. The first will be
+            the schema dictionary. The second, if accepted, will be the model
+            class. The callable is expected to mutate the schema dictionary
+            in-place; the return value is not used.
+
+            Args:
+                schema (typing.Dict[str, typing.Any]): The schema dictionary.
+
+            """
+            # Override schema description, by default is taken from docstring.
+            schema["description"] = "Get user changes response model."
@@ -0,0 +1,76 @@
+"""Implementazione dei modelli degli endpoint admin del profiler"""
+
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class ProfilingConfig(BaseModel):
+    enabled: Optional[bool] = None
+    sample_rate: Optional[float] = Field(default=None, ge=0, le=1)
+    interval_ms: Optional[int] = Field(default=None, ge=1)
+    routes: Optional[List[str]] = None
+
+    class Config:
+        """Config sub-class needed to extend/override the generated JSON schema.
+
+        More details can be found in pydantic documentation:
+        https://pydantic-docs.helpmanual.io/usage/schema/#schema-customization
+
+        """
+
+        @staticmethod
+        def schema_extra(schema: Dict[str, Any]) -> None:
+            """Post-process the generated schema.
+
+            Method can have one or two positional arguments. The first will be
+            the schema dictionary. The second, if accepted, will be the model
+            class. The callable is expected to mutate the schema dictionary
+            in-place; the return value is not used.
+
+            Args:
+                schema (typing.Dict[str, typing.Any]): The schema dictionary.
+
+            """
+            # Override schema description, by default is taken from docstring.
+            schema["description"] = "Profiling configuration update model."
+
+
+class ProfilingFrame(BaseModel):
+    frame: str
+    samples: int
+
+
+class ProfilingStatusResponse(BaseModel):
+    status: str
+    enabled: bool
+    sample_rate: float
+    interval_ms: int
+    routes: List[str]
+    samples: int
+    stacks: int
+    top_frames: List[ProfilingFrame]
+
+    class Config:
+        """Config sub-class needed to extend/override the generated JSON schema.
+
+        More details can be found in pydantic documentation:
+        https://pydantic-docs.helpmanual.io/usage/schema/#schema-customization
+
+        """
+
+        @staticmethod
+        def schema_extra(schema: Dict[str, Any]) -> None:
+            """Post-process the generated schema.
+
+            Method can have one or two positional arguments. The first will be
+            the schema dictionary. The second, if accepted, will be the model
+            class. The callable is expected to mutate the schema dictionary
+            in-place; the return value is not used.
+
+            Args:
+                schema (typing.Dict[str, typing.Any]): The schema dictionary.
+
+            """
+            # Override schema description, by default is taken from docstring.
+            schema["description"] = "Profiling status response model."
@@ -0,0 +1,36 @@
+"""Implementazione della risposta della ricerca utenti"""
+
+from typing import Any, Dict, List
+
+from pydantic import BaseModel
+
+from ..model.user import UserResponse
+
+
+class SearchUsersResponse(BaseModel):
+    status: str
+    users: List[UserResponse]
+
+    class Config:
+        """Config sub-class needed to extend/override the generated JSON schema.
+
+        More details can be found in pydantic documentation:
+        https://pydantic-docs.helpmanual.io/usage/schema/#schema-customization
+
+        """
+
+        @staticmethod
+        def schema_extra(schema: Dict[str, Any]) -> None:
+            """Post-process the generated schema.
+
+            Method can have one or two positional arguments. The first will be
+            the schema dictionary. The second, if accepted, will be the model
+            class. The callable is expected to mutate the schema dictionary
+            in-place; the return value is not used.
+
+            Args:
+                schema (typing.Dict[str, typing.Any]): The schema dictionary.
+
+            """
+            # Override schema description, by default is taken from docstring.
+            schema["description"] = "Users search response model."
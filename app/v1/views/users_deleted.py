@@ -0,0 +1,41 @@
+"""Implementazione della richiesta e della risposta della cancellazione massiva"""
+
+from typing import Any, Dict, List
+
+from pydantic import BaseModel, Field
+
+
+class BulkDeleteRequest(BaseModel):
+    user_ids: List[int] = Field(min_length=1, max_length=1000)
+
+
+class UsersDeletedResponse(BaseModel):
+    status: str
+    deleted: List[int]
+    not_found: List[int]
+    # Id la cui cancellazione è fallita per un errore di DynamoDB, da ripetere
+    failed: List[int] = []
+
+    class Config:
+        """Config sub-class needed to extend/override the generated JSON schema.
+
+        More details can be found in pydantic documentation:
+        https://pydantic-docs.helpmanual.io/usage/schema/#schema-customization
+
+        """
+
+        @staticmethod
+        def schema_extra(schema: Dict[str, Any]) -> None:
+            """Post-process the generated schema.
+
+            Method can have one or two positional arguments. The first will be
+            the schema dictionary. The second, if accepted, will be the model
+            class. The callable is expected to mutate the schema dictionary
+            in-place; the return value is not used.
+
+            Args:
+                schema (typing.Dict[str, typing.Any]): The schema dictionary.
+
+            """
+            # Override schema description, by default is taken from docstring.
+            schema["description"] = "Users bulk deleted response model."